@@ -0,0 +1,120 @@
+from collections import deque
+from typing import Any
+
+import tiktoken
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, get_buffer_string
+from pydantic import PrivateAttr
+
+
+# ---------------------------- MEMORY ----------------------------
+
+class TokenBufferMemory(BaseChatMemory):
+    """
+    Conversation buffer limited by the number of tokens.
+
+    A drop-in replacement for ConversationTokenBufferMemory that does not
+    recount the whole buffer on every save:
+    - messages live in chat_memory, as in every LangChain memory;
+    - every message is counted with tiktoken once, when it is added, and
+      (message, count) pairs are kept in a deque next to chat_memory with
+      a running total;
+    - pruning pops the oldest pairs from the left until the total fits
+      max_token_limit and removes the same messages from chat_memory in one
+      slice, so no message is ever recounted.
+
+    Messages added, removed or replaced in chat_memory directly are picked up
+    on the next call (only messages not seen before are counted).
+
+    No LLM is needed: counts come from the tiktoken encoding of the model
+    (cl100k_base for gpt-3.5/gpt-4, o200k_base for gpt-4o).
+    """
+
+    human_prefix: str = "Human"
+    ai_prefix: str = "AI"
+    memory_key: str = "history"
+    max_token_limit: int = 2000
+    encoding: str = "cl100k_base"
+
+    _encoder: Any = PrivateAttr(default=None)
+    _counts: deque = PrivateAttr(default_factory=deque)
+    _total_tokens: int = PrivateAttr(default=0)
+
+    @property
+    def memory_variables(self) -> list:
+        return [self.memory_key]
+
+    @property
+    def buffer(self) -> list:
+        return self.chat_memory.messages
+
+    @property
+    def total_tokens(self) -> int:
+        self.sync()
+        return self._total_tokens
+
+    def count_tokens(self, message: BaseMessage) -> int:
+        if self._encoder is None:
+            self._encoder = tiktoken.get_encoding(self.encoding)
+        text = get_buffer_string([message], human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)
+        return len(self._encoder.encode_ordinary(text))
+
+    def sync(self) -> None:
+        """
+        Recounts the tokens if chat_memory was changed directly (not through this memory).
+
+        Messages are compared by identity, so a message replaced in place with
+        a same-length history is detected too. The pairs hold the messages,
+        which keeps their ids from being reused.
+        """
+        messages = self.chat_memory.messages
+        if len(messages) == len(self._counts) and all(
+            message is counted for message, (counted, _) in zip(messages, self._counts)
+        ):
+            return
+        known = {id(counted): tokens for counted, tokens in self._counts}
+        self._counts = deque(
+            (message, known[id(message)] if id(message) in known else self.count_tokens(message))
+            for message in messages
+        )
+        self._total_tokens = sum(tokens for _, tokens in self._counts)
+
+    def prune(self) -> None:
+        """
+        Removes the oldest messages until the buffer fits max_token_limit.
+        """
+        pruned = 0
+        while self._total_tokens > self.max_token_limit and self._counts:
+            self._total_tokens -= self._counts.popleft()[1]
+            pruned += 1
+        if pruned:
+            del self.chat_memory.messages[:pruned]
+
+    def add_message(self, message: BaseMessage) -> None:
+        """
+        Appends a message, counts its tokens once and prunes the oldest messages over the limit.
+        """
+        self.sync()
+        tokens = self.count_tokens(message)
+        self.chat_memory.add_message(message)
+        self._counts.append((message, tokens))
+        self._total_tokens += tokens
+        self.prune()
+
+    def load_memory_variables(self, inputs: dict) -> dict:
+        self.sync()
+        self.prune()
+        if self.return_messages:
+            return {self.memory_key: self.buffer}
+        buffer = get_buffer_string(self.buffer, human_prefix=self.human_prefix, ai_prefix=self.ai_prefix)
+        return {self.memory_key: buffer}
+
+    def save_context(self, inputs: dict, outputs: dict) -> None:
+        input_str, output_str = self._get_input_output(inputs, outputs)
+        self.add_message(HumanMessage(content=input_str))
+        self.add_message(AIMessage(content=output_str))
+
+    def clear(self) -> None:
+        super().clear()
+        self._counts.clear()
+        self._total_tokens = 0
@@ -10,8 +10,8 @@ from langchain.chat_models import init_chat_model
 from langchain_core.tools import tool
 from langchain_core.messages import SystemMessage
 from langchain.agents import initialize_agent, AgentType
-from langchain.memory import ConversationTokenBufferMemory
 
+from functions.token_buffer_memory import TokenBufferMemory
 from tools.ping import ping
 
 
@@ -31,8 +31,8 @@ tools = [ping_tool]
 llm = init_chat_model("gpt-4o-mini", model_provider="openai")
 
 # Creating memory with a token limit
-memory = ConversationTokenBufferMemory(
-    llm=llm,
+# Token counts are kept per message, old messages are pruned without recounting the buffer
+memory = TokenBufferMemory(
     max_token_limit=40,
     memory_key="chat_history",
     input_key="input",
@@ -40,7 +40,7 @@ memory = ConversationTokenBufferMemory(
 )
 
 # System message — how to behave
-memory.chat_memory.add_message(SystemMessage(content=(
+memory.add_message(SystemMessage(content=(
     "You are a network engineer’s assistant. "
     "You can use the ping() command."
 )))
@@ -0,0 +1,47 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from functions.token_buffer_memory import TokenBufferMemory
+
+
+def buffer_tokens(memory: TokenBufferMemory) -> int:
+    return sum(memory.count_tokens(message) for message in memory.buffer)
+
+
+def test_prune_drops_oldest_messages_over_the_limit():
+    memory = TokenBufferMemory(max_token_limit=60)
+    for i in range(20):
+        memory.save_context({"input": f"question number {i} about the switch"}, {"output": f"answer number {i}"})
+
+    assert memory.total_tokens <= 60
+    assert memory.total_tokens == buffer_tokens(memory)
+    assert memory.buffer[-1].content == "answer number 19"
+    assert all("number 0 " not in message.content for message in memory.buffer)
+
+
+def test_messages_added_directly_are_counted():
+    memory = TokenBufferMemory(max_token_limit=1000)
+    memory.save_context({"input": "hello"}, {"output": "hi"})
+    memory.chat_memory.add_message(HumanMessage(content="what is the IP of asw1"))
+
+    assert memory.total_tokens == buffer_tokens(memory)
+    assert len(memory.load_memory_variables({})["history"].splitlines()) == 3
+
+
+def test_message_replaced_directly_is_recounted():
+    memory = TokenBufferMemory(max_token_limit=1000)
+    memory.save_context({"input": "hello"}, {"output": "hi"})
+    before = memory.total_tokens
+
+    memory.chat_memory.messages[1] = AIMessage(content="a much longer reply that takes many more tokens")
+
+    assert memory.total_tokens > before
+    assert memory.total_tokens == buffer_tokens(memory)
+
+
+def test_clear_resets_the_count():
+    memory = TokenBufferMemory()
+    memory.save_context({"input": "hello"}, {"output": "hi"})
+    memory.clear()
+
+    assert memory.buffer == []
+    assert memory.total_tokens == 0
@@ -1,4 +1,3 @@
-import os
 from datetime import datetime
 
 import streamlit as st
@@ -12,11 +11,12 @@ warnings.filterwarnings("ignore", category=LangChainDeprecationWarning)
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, AIMessage
 
-from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_openai import OpenAIEmbeddings
 from langchain.chains import ConversationalRetrievalChain
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from functions.indexing_job import finished_vectorstore, show_indexing_progress, start_indexing
+from functions.rag_pipeline import standalone_question
+from functions.semantic_cache import semantic_cache
+from functions.streaming import StreamlitChatHandler
 
 
 # ---------------------- HELPER FUNCTIONS ----------------------
@@ -45,36 +45,50 @@ def chat_rag_main():
         model_name,
         model_provider="openai",
         temperature=0.3,
+        streaming=True,
+    )
+
+    # Answers to questions with the same meaning are reused
+    cache_threshold = st.sidebar.slider("Semantic cache threshold:", 0.80, 1.00, 0.95, 0.01)
+    cache = semantic_cache.stats()
+    st.sidebar.caption(
+        f"Semantic cache: {cache['hits']} hits, {cache['misses']} misses, "
+        f"{cache['entries']} answers stored"
     )
 
     # Message history
     if "messages" not in st.session_state:
         st.session_state.messages = []
+    if "chat_history" not in st.session_state:
+        # (question, answer) pairs for rephrasing follow-ups, built once and then appended per turn
+        # Pairs are matched by role: an answer belongs to the question right before it
+        chat_history = []
+        question = None
+        for message in st.session_state.messages:
+            if isinstance(message, HumanMessage):
+                question = message
+            elif isinstance(message, AIMessage) and question is not None:
+                chat_history.append((question.content, message.content))
+                question = None
+        st.session_state.chat_history = chat_history
 
     # ---------------------- DOCUMENT LOADING ----------------------
 
     with st.expander("Load documents for RAG"):
         if st.button("Index ./docs"):
-            docs_path = "./docs"
-            if os.path.exists(docs_path) and os.listdir(docs_path):
-                with st.spinner("Indexing documents..."):
-                    loader = DirectoryLoader(
-                        docs_path,
-                        loader_cls=TextLoader,
-                        show_progress=True
-                    )
-                    documents = loader.load()
-                    splitter = RecursiveCharacterTextSplitter(
-                        chunk_size=1000,
-                        chunk_overlap=200
-                    )
-                    splits = splitter.split_documents(documents)
-                    embeddings = OpenAIEmbeddings()
-                    vectorstore = FAISS.from_documents(splits, embeddings)
-                    st.session_state.retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
-                    st.success("✅ Documents loaded.")
-            else:
-                st.warning("./docs is empty. Place .txt or .md files there.")
+            start_indexing("./docs", chunk_size=1000)
+
+        # The previous index keeps serving queries until the new one is ready
+        try:
+            vectorstore = finished_vectorstore()
+        except Exception as e:
+            vectorstore = None
+            st.error(f"Indexing error: {e}")
+        if vectorstore is not None:
+            st.session_state.retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
+            st.success("✅ Documents loaded.")
+
+        show_indexing_progress()
 
     # ---------------------- DISPLAYING HISTORY ----------------------
 
@@ -91,33 +105,63 @@ def chat_rag_main():
         st.chat_message("user").write(prompt)
         st.session_state.messages.append(user_msg)
 
+        stream = None
         try:
             if "retriever" in st.session_state:
-                # Convert messages to (question, answer) format
-                chat_history = []
-                last_user_msg = None
-                for m in st.session_state.messages:
-                    if isinstance(m, HumanMessage):
-                        last_user_msg = m.content
-                    elif isinstance(m, AIMessage) and last_user_msg:
-                        chat_history.append((last_user_msg, m.content))
-                        last_user_msg = None
-
-                # RAG chain initialization
-                qa_chain = ConversationalRetrievalChain.from_llm(
-                    llm=llm,
-                    retriever=st.session_state.retriever,
-                    return_source_documents=True
-                )
-
-                result = qa_chain.invoke({
-                    "question": prompt,
-                    "chat_history": chat_history
-                })
+                # The answer is streamed into the assistant message while it is generated
+                assistant = st.chat_message("assistant")
+                with assistant:
+                    stream = StreamlitChatHandler()
+
+                chat_history = st.session_state.chat_history
+
+                # Follow-ups are rephrased into a standalone question (cached per history),
+                # self-contained questions go to retrieval as is without an LLM call
+                question, condensed_by = standalone_question(llm, prompt, chat_history, model_name)
+                if condensed_by != "as is":
+                    assistant.caption(f"Standalone question ({condensed_by}): {question}")
+
+                # Semantic cache: the index and the model define which answers are valid
+                vectorstore = st.session_state.retriever.vectorstore
+                scope = (getattr(vectorstore, "index_version", id(vectorstore)), model_name)
+                question_vector = semantic_cache.embed(vectorstore.embeddings, question)
+                cached = semantic_cache.lookup(question_vector, scope, threshold=cache_threshold)
+
+                if cached:
+                    result = {
+                        "answer": cached["answer"],
+                        "source_documents": cached["sources"],
+                    }
+                    assistant.caption(f"⚡ Answer from the semantic cache (similarity {cached['similarity']:.2f})")
+                else:
+                    # The chain is built once per model and index and reused;
+                    # it gets the standalone question, so it never rephrases it again
+                    chain_key = (model_name, id(st.session_state.retriever))
+                    if st.session_state.get("qa_chain_key") != chain_key:
+                        st.session_state.qa_chain = ConversationalRetrievalChain.from_llm(
+                            llm=llm,
+                            retriever=st.session_state.retriever,
+                            return_source_documents=True,
+                        )
+                        st.session_state.qa_chain_key = chain_key
+
+                    result = st.session_state.qa_chain.invoke(
+                        {"question": question, "chat_history": []},
+                        config={"callbacks": [stream]},
+                    )
+
+                    semantic_cache.store(
+                        question_vector,
+                        question,
+                        scope,
+                        result.get("answer", "(no answer)"),
+                        result.get("source_documents", []),
+                    )
 
                 answer = result.get("answer", "(no answer)")
-                st.chat_message("assistant").write(answer)
+                stream.finish(answer)
                 st.session_state.messages.append(AIMessage(content=answer))
+                chat_history.append((prompt, answer))
 
                 # Log only the question and answer
                 log_interaction(prompt, answer)
@@ -133,5 +177,8 @@ def chat_rag_main():
                 st.warning("Please load the documents first.")
         except Exception as e:
             error_msg = f"Error: {e}"
-            st.chat_message("assistant").write(error_msg)
+            if stream is not None:
+                stream.fail(error_msg)
+            else:
+                st.chat_message("assistant").write(error_msg)
             st.session_state.messages.append(AIMessage(content=error_msg))
\ No newline at end of file
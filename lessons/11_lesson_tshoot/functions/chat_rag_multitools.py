@@ -1,5 +1,5 @@
-import os
 import ipaddress
+import json
 
 import streamlit as st
 from pydantic import BaseModel, Field
@@ -15,21 +15,24 @@ from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.tools import ToolException, tool
 
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from functions.indexing_job import finished_vectorstore, show_indexing_progress, start_indexing
+from functions.intent_router import route_intent
+from functions.retrieval_cache import retrieval_cache
+from functions.streaming import StreamlitChatHandler
 
 from tools.ping import ping
-from tools.cmdb import cmdb
+from tools.cmdb import cmdb, cmdb_suggest
 from tools.show_vlan_port import show_vlan_port
 from tools.show_vlan_ports_all import show_vlan_ports_all
-from tools.change_vlan import change_vlan
+from tools.change_vlan import change_vlan, change_vlans
+from tools.fleet_audit import fleet_query
+from tools.deadline import with_timeout
 
 
 # ---------------------------- TOOLS ----------------------------
 
 @tool
+@with_timeout(20) # TUNING
 def lookup_docs(query: str) -> str:
     """
     lookup_docs(query: str) -> str
@@ -42,7 +45,8 @@ def lookup_docs(query: str) -> str:
     """
     if retriever is None:
         raise ToolException("Knowledge base not loaded.")
-    docs = retriever.invoke(query)
+    # Repeated queries are served from the cache until the index is rebuilt
+    docs = retrieval_cache.invoke(retriever, query)
     if not docs:
         raise ToolException("Nothing found in documentation.")
     return "\n\n".join(doc.page_content for doc in docs)
@@ -52,6 +56,7 @@ class PingInput(BaseModel):
     ip: str = Field(..., description="Device IPv4 address")
 
 @tool(args_schema=PingInput)
+@with_timeout(10) # TUNING
 def ping_tool(ip: str) -> bool:
     """
     Checks IP address availability via ping.
@@ -71,7 +76,9 @@ def cmdb_tool(name: str) -> str:
     """
     ip = cmdb(name)
     if not ip:
-        raise ToolException(f"IP address for {name} not found in CMDB.")
+        similar = cmdb_suggest(name)
+        hint = f" Similar names: {', '.join(similar)}." if similar else ""
+        raise ToolException(f"IP address for {name} not found in CMDB.{hint}")
     return ip
 
 class ShowVlanPortInput(BaseModel):
@@ -79,6 +86,7 @@ class ShowVlanPortInput(BaseModel):
     port: str = Field(..., description="Port name (e.g., Gi0/1)")
 
 @tool(args_schema=ShowVlanPortInput)
+@with_timeout(15) # TUNING
 def show_vlan_port_tool(ip: str, port: str) -> str:
     """
     Shows the VLAN configured on a specific network device port.
@@ -89,15 +97,21 @@ def show_vlan_port_tool(ip: str, port: str) -> str:
 
 class ShowAllPortsInput(BaseModel):
     ip: str = Field(..., description="Device IP address")
+    vlan: int | None = Field(None, description="Only ports in this VLAN")
+    ports: list[str] | None = Field(None, description="Only these ports (e.g., Gi0/1, Gi0/2)")
 
 @tool(args_schema=ShowAllPortsInput)
-def show_vlan_ports_all_tool(ip: str) -> str:
+@with_timeout(15) # TUNING
+def show_vlan_ports_all_tool(ip: str, vlan: int | None = None, ports: list[str] | None = None) -> str:
     """
     Shows a list of all device ports with corresponding VLANs.
     Requires device IP address.
+    Pass vlan or ports to get only the rows needed for the question.
+    Returns JSON columns: {"device", "ip", "port": [...], "vlan": [...]},
+    a port "Gi0/1-8" means ports Gi0/1 to Gi0/8.
     """
     ipaddress.IPv4Address(ip)
-    return show_vlan_ports_all(ip)
+    return show_vlan_ports_all(ip, vlan=vlan, ports=ports, output="json")
 
 class ChangeVlanInput(BaseModel):
     ip: str = Field(..., description="Device IP address")
@@ -105,6 +119,7 @@ class ChangeVlanInput(BaseModel):
     vlan: int = Field(..., description="VLAN number  (for example, 10)")
 
 @tool(args_schema=ChangeVlanInput)
+@with_timeout(30) # TUNING
 def change_vlan_tool(ip: str, port: str, vlan: int) -> str:
     """
     Changes VLAN on the specified device port.
@@ -113,6 +128,44 @@ def change_vlan_tool(ip: str, port: str, vlan: int) -> str:
     ipaddress.IPv4Address(ip)
     return change_vlan(ip, port, vlan)
 
+class ChangeVlansInput(BaseModel):
+    ip: str = Field(..., description="Device IP address")
+    changes: dict[str, int] = Field(..., description="Port name -> VLAN number (e.g., Gi0/1 -> 40, Gi0/2 -> 40)")
+
+@tool(args_schema=ChangeVlansInput)
+@with_timeout(30) # TUNING
+def change_vlans_tool(ip: str, changes: dict[str, int]) -> str:
+    """
+    Changes VLANs on several ports of one device in a single step.
+    Use instead of repeated change_vlan_tool() calls when more than one port is changed.
+    Nothing is changed if any port or VLAN is invalid.
+    """
+    ipaddress.IPv4Address(ip)
+    return change_vlans(ip, changes)
+
+class FleetAuditInput(BaseModel):
+    vlan: int | None = Field(None, description="Only ports in this VLAN")
+    exclude_vlans: list[int] | None = Field(None, description="Only ports NOT in these VLANs (the allowed VLANs)")
+    unconfigured_only: bool = Field(False, description="Only ports in a VLAN that does not exist on their device")
+    devices: list[str] | None = Field(None, description="Device names (hostnames), all devices if empty")
+    group_by: str = Field("device", description="device: matching ports per device; vlan: port and device counts per VLAN")
+
+@tool(args_schema=FleetAuditInput)
+@with_timeout(30) # TUNING
+def fleet_audit_tool(vlan: int | None = None, exclude_vlans: list[int] | None = None, unconfigured_only: bool = False,
+                     devices: list[str] | None = None, group_by: str = "device") -> str:
+    """
+    Audits access port VLANs across all devices at once, e.g. "which ports are in VLAN 99"
+    or "which ports are not in an allowed VLAN".
+    Use instead of calling show_vlan_ports_all_tool() device by device.
+    Returns JSON; a port "Gi0/1-8" means ports Gi0/1 to Gi0/8.
+    """
+    if group_by not in ("device", "vlan"):
+        raise ToolException('group_by must be "device" or "vlan".')
+    result = fleet_query(vlan=vlan, exclude_vlans=exclude_vlans, unconfigured_only=unconfigured_only,
+                         devices=devices, group_by=group_by)
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+
 # ---------------------------- SETUP ----------------------------
 
 retriever = None
@@ -150,34 +203,33 @@ def chat_rag_multitools_main():
         ["gpt-4o-mini", "gpt-3.5-turbo", "gpt-4o"]
     )
 
-    llm = init_chat_model(model_name, model_provider="openai", temperature=0.3)
+    llm = init_chat_model(model_name, model_provider="openai", temperature=0.3, streaming=True)
+
+    cache = retrieval_cache.stats()
+    st.sidebar.caption(
+        f"lookup_docs cache: {cache['hits']} hits, {cache['misses']} misses, "
+        f"hit rate {cache['hit_rate']:.0%}"
+    )
 
     if "messages" not in st.session_state:
         st.session_state.messages = []
 
     with st.expander("Load documents for RAG"):
         if st.button("Index ./docs"):
-            docs_path = "./docs"
-            if os.path.exists(docs_path) and os.listdir(docs_path):
-                with st.spinner("Indexing documents..."):
-                    loader = DirectoryLoader(
-                        docs_path,
-                        loader_cls=TextLoader,
-                        show_progress=True
-                    )
-                    documents = loader.load()
-                    splitter = RecursiveCharacterTextSplitter(
-                        chunk_size=1000,
-                        chunk_overlap=200
-                    )
-                    splits = splitter.split_documents(documents)
-                    embeddings = OpenAIEmbeddings()
-                    vectorstore = FAISS.from_documents(splits, embeddings)
-                    retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
-                    st.session_state.retriever = retriever
-                    st.success("✅ Loaded and indexed")
-            else:
-                st.warning("The ./docs directory is empty")
+            start_indexing("./docs", chunk_size=1000)
+
+        # The previous index keeps serving queries until the new one is ready
+        try:
+            vectorstore = finished_vectorstore()
+        except Exception as e:
+            vectorstore = None
+            st.error(f"Indexing error: {e}")
+        if vectorstore is not None:
+            retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
+            st.session_state.retriever = retriever
+            st.success("✅ Loaded and indexed")
+
+        show_indexing_progress()
 
     for msg in st.session_state.messages:
         if isinstance(msg, HumanMessage):
@@ -190,12 +242,32 @@ def chat_rag_multitools_main():
         st.chat_message("user").write(user_msg.content)
         st.session_state.messages.append(user_msg)
 
+        # Trivial requests ("ping 10.0.0.1", "show vlans on asw1", "ip of core1")
+        # are answered directly, without the agent loop and LLM calls
+        try:
+            routed = route_intent(prompt)
+        except Exception as e:
+            # The agent handles the request instead, with its own error reporting
+            print(f"==> fast path error: {e}")
+            routed = None
+        if routed is not None:
+            intent, answer = routed
+            with st.chat_message("assistant"):
+                st.write(answer)
+                st.caption(f"⚡ Fast path: {intent}")
+            st.session_state.messages.append(
+                SystemMessage(name="assistant", content=answer)
+            )
+            return
+
         tools = [
             lookup_docs,
             ping_tool,
             show_vlan_port_tool,
             show_vlan_ports_all_tool,
             change_vlan_tool,
+            change_vlans_tool,
+            fleet_audit_tool,
             cmdb_tool,
         ]
 
@@ -207,18 +279,22 @@ def chat_rag_multitools_main():
             handle_parsing_errors=True,
         )
 
+        # Tool calls and the final answer are streamed into the assistant message
+        with st.chat_message("assistant"):
+            stream = StreamlitChatHandler(final_answer_only=True, show_tools=True)
+
         try:
             full_prompt = build_prompt_with_system_prompt(prompt)
             print(f"Full prompt:\n{full_prompt}\n")
-            result = agent.invoke({"input": full_prompt})
+            result = agent.invoke({"input": full_prompt}, config={"callbacks": [stream]})
             answer = result.get("output", "(no answer)")
-            st.chat_message("assistant").write(answer)
+            stream.finish(answer)
             st.session_state.messages.append(
                 SystemMessage(name="assistant", content=answer)
             )
         except Exception as e:
             error_msg = f"Agent error: {e}"
-            st.chat_message("assistant").write(error_msg)
+            stream.fail(error_msg)
             st.session_state.messages.append(
                 SystemMessage(name="assistant", content=error_msg)
             )
@@ -1,5 +1,6 @@
-import os
 import ipaddress
+import json
+import uuid
 
 import streamlit as st
 from pydantic import BaseModel, Field
@@ -15,21 +16,29 @@ from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.tools import ToolException, tool
 
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from functions.conversation_memory import ConversationMemory
+from functions.embeddings_provider import EMBEDDING_PROVIDERS, get_embeddings
+from functions.indexing_job import finished_vectorstore, show_indexing_progress, start_indexing
+from functions.long_term_memory import LongTermMemory, ToolObservationCollector
+from functions.message_store import get_message_store
+from functions.reranker import RerankingRetriever
+from functions.retrieval_cache import retrieval_cache
+from functions.streaming import StreamlitChatHandler
+from functions.vector_index import INDEX_TYPES
 
 from tools.ping import ping
-from tools.cmdb import cmdb
+from tools.cmdb import cmdb, cmdb_suggest
 from tools.show_vlan_port import show_vlan_port
 from tools.show_vlan_ports_all import show_vlan_ports_all
-from tools.change_vlan import change_vlan
+from tools.change_vlan import change_vlan, change_vlans
+from tools.fleet_audit import fleet_query
+from tools.deadline import with_timeout
 
 
 # ---------------------------- TOOLS ----------------------------
 
 @tool
+@with_timeout(20) # TUNING
 def lookup_docs(query: str) -> str:
     """
     Searches for information in internal documentation:
@@ -40,7 +49,8 @@ def lookup_docs(query: str) -> str:
     """
     if retriever is None:
         raise ToolException("Knowledge base is not loaded.")
-    docs = retriever.invoke(query)
+    # Repeated queries are served from the cache until the index is rebuilt
+    docs = retrieval_cache.invoke(retriever, query)
     if not docs:
         raise ToolException("Nothing found in the documentation.")
     return "\n\n".join(doc.page_content for doc in docs)
@@ -50,6 +60,7 @@ class PingInput(BaseModel):
     ip: str = Field(..., description="IPv4 address of the device")
 
 @tool(args_schema=PingInput)
+@with_timeout(10) # TUNING
 def ping_tool(ip: str) -> str: # TSHOOT
     """
     Checks the availability of an IP address via ping.
@@ -70,7 +81,9 @@ def cmdb_tool(name: str) -> str:
     """
     ip = cmdb(name)
     if not ip:
-        raise ToolException(f"IP address for {name} not found in CMDB.")
+        similar = cmdb_suggest(name)
+        hint = f" Similar names: {', '.join(similar)}." if similar else ""
+        raise ToolException(f"IP address for {name} not found in CMDB.{hint}")
     return ip
 
 class ShowVlanPortInput(BaseModel):
@@ -78,6 +91,7 @@ class ShowVlanPortInput(BaseModel):
     port: str = Field(..., description="Port name (for example, Gi0/1)")
 
 @tool(args_schema=ShowVlanPortInput)
+@with_timeout(15) # TUNING
 def show_vlan_port_tool(ip: str, port: str) -> str:
     """
     Shows the VLAN configured on a specific port of the network device.
@@ -88,15 +102,21 @@ def show_vlan_port_tool(ip: str, port: str) -> str:
 
 class ShowAllPortsInput(BaseModel):
     ip: str = Field(..., description="Device IP address")
+    vlan: int | None = Field(None, description="Only ports in this VLAN")
+    ports: list[str] | None = Field(None, description="Only these ports (e.g., Gi0/1, Gi0/2)")
 
 @tool(args_schema=ShowAllPortsInput)
-def show_vlan_ports_all_tool(ip: str) -> str:
+@with_timeout(15) # TUNING
+def show_vlan_ports_all_tool(ip: str, vlan: int | None = None, ports: list[str] | None = None) -> str:
     """
     Displays a list of all ports on the device with their corresponding VLANs.
     Requires the IP address of the device.
+    Pass vlan or ports to get only the rows needed for the question.
+    Returns JSON columns: {"device", "ip", "port": [...], "vlan": [...]},
+    a port "Gi0/1-8" means ports Gi0/1 to Gi0/8.
     """
     ipaddress.IPv4Address(ip)
-    return show_vlan_ports_all(ip)
+    return show_vlan_ports_all(ip, vlan=vlan, ports=ports, output="json")
 
 class ChangeVlanInput(BaseModel):
     ip: str = Field(..., description="Device IP address")
@@ -104,6 +124,7 @@ class ChangeVlanInput(BaseModel):
     vlan: int = Field(..., description="VLAN number (for example, 10)")
 
 @tool(args_schema=ChangeVlanInput)
+@with_timeout(30) # TUNING
 def change_vlan_tool(ip: str, port: str, vlan: int) -> str:
     """
     Changes the VLAN on the specified port of the device.
@@ -112,23 +133,61 @@ def change_vlan_tool(ip: str, port: str, vlan: int) -> str:
     ipaddress.IPv4Address(ip)
     return change_vlan(ip, port, vlan)
 
+class ChangeVlansInput(BaseModel):
+    ip: str = Field(..., description="Device IP address")
+    changes: dict[str, int] = Field(..., description="Port name -> VLAN number (for example, Gi0/1 -> 40, Gi0/2 -> 40)")
+
+@tool(args_schema=ChangeVlansInput)
+@with_timeout(30) # TUNING
+def change_vlans_tool(ip: str, changes: dict[str, int]) -> str:
+    """
+    Changes VLANs on several ports of one device in a single step.
+    Use instead of repeated change_vlan_tool() calls when more than one port is changed.
+    Nothing is changed if any port or VLAN is invalid.
+    """
+    ipaddress.IPv4Address(ip)
+    return change_vlans(ip, changes)
+
+class FleetAuditInput(BaseModel):
+    vlan: int | None = Field(None, description="Only ports in this VLAN")
+    exclude_vlans: list[int] | None = Field(None, description="Only ports NOT in these VLANs (the allowed VLANs)")
+    unconfigured_only: bool = Field(False, description="Only ports in a VLAN that does not exist on their device")
+    devices: list[str] | None = Field(None, description="Device names (hostnames), all devices if empty")
+    group_by: str = Field("device", description="device: matching ports per device; vlan: port and device counts per VLAN")
+
+@tool(args_schema=FleetAuditInput)
+@with_timeout(30) # TUNING
+def fleet_audit_tool(vlan: int | None = None, exclude_vlans: list[int] | None = None, unconfigured_only: bool = False,
+                     devices: list[str] | None = None, group_by: str = "device") -> str:
+    """
+    Audits access port VLANs across all devices at once, e.g. "which ports are in VLAN 99"
+    or "which ports are not in an allowed VLAN".
+    Use instead of calling show_vlan_ports_all_tool() device by device.
+    Returns JSON; a port "Gi0/1-8" means ports Gi0/1 to Gi0/8.
+    """
+    if group_by not in ("device", "vlan"):
+        raise ToolException('group_by must be "device" or "vlan".')
+    result = fleet_query(vlan=vlan, exclude_vlans=exclude_vlans, unconfigured_only=unconfigured_only,
+                         devices=devices, group_by=group_by)
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+
 
 # ---------------------------- SETUP ----------------------------
 
 retriever = None
 
 
-def build_prompt_from_history(messages, system_prompt: str) -> str:
+def build_prompt_from_history(memory: ConversationMemory, system_prompt: str, recalled: list = None) -> str:
     """
-    Creates a request text for the agent from the message history and the current input.
+    Creates a request text for the agent from the conversation memory and the current input.
+    Older turns come as a summary and as facts recalled from the long-term memory,
+    the last turns verbatim.
     """
     lines = [f"[System message]: {system_prompt}"]
-    for msg in messages:
-        if isinstance(msg, HumanMessage):
-            lines.append(f"User: {msg.content}")
-        elif hasattr(msg, "name") and msg.name == "assistant":
-            lines.append(f"Assistant: {msg.content}")
-    #lines.append(f"User: {new_user_input}\n")
+    if recalled:
+        lines.append("[Relevant facts from earlier in the conversation]:")
+        lines.extend(f"- {fact}" for fact in recalled)
+    lines.extend(memory.lines())
     return "\n".join(lines)
 
 
@@ -144,7 +203,22 @@ def chat_rag_multitools_memory_main():
         ["gpt-4o-mini", "gpt-3.5-turbo", "gpt-4o"]
     )
 
-    llm = init_chat_model(model_name, model_provider="openai", temperature=0.3)
+    llm = init_chat_model(model_name, model_provider="openai", temperature=0.3, streaming=True)
+
+    cache = retrieval_cache.stats()
+    st.sidebar.caption(
+        f"lookup_docs cache: {cache['hits']} hits, {cache['misses']} misses, "
+        f"hit rate {cache['hit_rate']:.0%}"
+    )
+
+    # Approximate indexes (ivf_*, hnsw) are only worth it for large corpora
+    index_type = st.sidebar.selectbox("Index type:", INDEX_TYPES)
+    nprobe = st.sidebar.number_input("nprobe (IVF):", min_value=1, value=16)
+    ef_search = st.sidebar.number_input("efSearch (HNSW):", min_value=1, value=64)
+    rerank = st.sidebar.checkbox("Exact re-ranking from disk (fp16, sq8, pq, ivf_pq)")
+    rerank_budget_ms = st.sidebar.number_input("Re-ranker budget, ms (0 = off):", min_value=0, value=0) # TUNING: off by default, e.g. 20 to opt in
+    embeddings_provider = st.sidebar.selectbox("Embeddings:", EMBEDDING_PROVIDERS)
+    parallel = st.sidebar.checkbox("Parallel document loading (large doc mirrors)")
 
     system_prompt = (
         "You are an assistant in a corporate IT infrastructure.\n"
@@ -159,32 +233,82 @@ def chat_rag_multitools_memory_main():
         "If you list commands, write each command on a new line."
     )
 
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+    # The session id is kept in the URL, so a browser refresh resumes the conversation
+    if "session" not in st.query_params:
+        st.query_params["session"] = uuid.uuid4().hex
+    session_id = st.query_params["session"]
+
+    # Prompt memory: last turns verbatim, older ones summarized, persisted in the chat store
+    if st.session_state.get("memory_session") != session_id:
+        memory = ConversationMemory(
+            max_tokens=2000, # TUNING
+            keep_turns=3, # TUNING
+            store=get_message_store(),
+            session_id=session_id,
+        )
+        st.session_state.memory = memory
+        st.session_state.memory_session = session_id
+        # Only the resumed tail is shown, older turns live in the summary
+        st.session_state.messages = [
+            HumanMessage(content=content) if role == "user" else SystemMessage(name="assistant", content=content)
+            for role, content, _, _ in memory.messages
+        ]
+    memory = st.session_state.memory
+
+    # Long-term memory: past turns and tool results of the session, recalled by similarity.
+    # Fact vectors are saved in the chat store, resuming embeds only turns without them
+    long_term_key = (session_id, embeddings_provider)
+    if st.session_state.get("long_term_memory_key") != long_term_key:
+        long_term_memory = LongTermMemory(
+            get_embeddings(embeddings_provider),
+            k=3, # TUNING
+            store=memory.store,
+            session_id=session_id,
+            provider=embeddings_provider,
+        )
+        st.session_state.long_term_memory = long_term_memory
+        st.session_state.long_term_memory_key = long_term_key
+    long_term_memory = st.session_state.long_term_memory
+
+    stats = memory.stats()
+    st.sidebar.caption(
+        f"Memory: {stats['tokens']} tokens, {stats['messages']} recent messages, "
+        f"summary {stats['summary_tokens']} tokens"
+    )
 
     with st.expander("Load documents for RAG"):
         if st.button("Index ./docs"):
-            docs_path = "./docs"
-            if os.path.exists(docs_path) and os.listdir(docs_path):
-                with st.spinner("Indexing documents..."):
-                    loader = DirectoryLoader(
-                        docs_path,
-                        loader_cls=TextLoader,
-                        show_progress=True
-                    )
-                    documents = loader.load()
-                    splitter = RecursiveCharacterTextSplitter(
-                        chunk_size=500, # TUNING
-                        chunk_overlap=100 # TUNING
-                    )
-                    splits = splitter.split_documents(documents)
-                    embeddings = OpenAIEmbeddings()
-                    vectorstore = FAISS.from_documents(splits, embeddings)
-                    retriever = vectorstore.as_retriever(search_kwargs={"k": 2}) # TUNING
-                    st.session_state.retriever = retriever
-                    st.success("✅ Loaded and indexed")
+            start_indexing(
+                "./docs",
+                chunk_size=500, # TUNING
+                index_type=index_type,
+                nprobe=nprobe,
+                ef_search=ef_search,
+                parallel=parallel,
+                embeddings_provider=embeddings_provider,
+                rerank=rerank,
+            )
+
+        # The previous index keeps serving queries until the new one is ready
+        try:
+            vectorstore = finished_vectorstore()
+        except Exception as e:
+            vectorstore = None
+            st.error(f"Indexing error: {e}")
+        if vectorstore is not None:
+            if rerank_budget_ms:
+                # Wide candidate set, only the re-ranked top k goes into the prompt
+                retriever = RerankingRetriever(
+                    vectorstore=vectorstore,
+                    search_kwargs={"k": 2, "fetch_k": 20}, # TUNING
+                    budget_ms=rerank_budget_ms,
+                )
             else:
-                st.warning("The ./docs directory is empty")
+                retriever = vectorstore.as_retriever(search_kwargs={"k": 2}) # TUNING
+            st.session_state.retriever = retriever
+            st.success("✅ Loaded and indexed")
+
+        show_indexing_progress()
 
     for msg in st.session_state.messages:
         if isinstance(msg, HumanMessage):
@@ -196,6 +320,7 @@ def chat_rag_multitools_memory_main():
         user_msg = HumanMessage(content=prompt)
         st.chat_message("user").write(user_msg.content)
         st.session_state.messages.append(user_msg)
+        memory.add("user", prompt)
 
         tools = [
             lookup_docs,
@@ -203,6 +328,8 @@ def chat_rag_multitools_memory_main():
             show_vlan_port_tool,
             show_vlan_ports_all_tool,
             change_vlan_tool,
+            change_vlans_tool,
+            fleet_audit_tool,
             cmdb_tool
         ]
 
@@ -216,21 +343,39 @@ def chat_rag_multitools_memory_main():
             max_execution_time=90, # TUNING
         )
 
+        # Tool calls and the final answer are streamed into the assistant message
+        with st.chat_message("assistant"):
+            stream = StreamlitChatHandler(final_answer_only=True, show_tools=True)
+        observations = ToolObservationCollector()
+
         try:
+            memory.compact(llm)
+            # Turns still in the prompt verbatim are not recalled again
+            recalled = long_term_memory.recall(prompt, before_id=memory.messages[0][3])
             full_prompt = build_prompt_from_history(
-                messages=st.session_state.messages,
-                system_prompt=system_prompt
+                memory=memory,
+                system_prompt=system_prompt,
+                recalled=recalled,
             )
             print(f"==> full prompt:\n{full_prompt}")
-            result = agent.invoke({"input": full_prompt})
+            result = agent.invoke({"input": full_prompt}, config={"callbacks": [stream, observations]})
             answer = result.get("output", "(no answer)")
-            st.chat_message("assistant").write(answer)
-            st.session_state.messages.append(
-                SystemMessage(name="assistant", content=answer)
+            stream.finish(answer)
+        except Exception as e:
+            answer = f"Agent error: {e}"
+            stream.fail(answer)
+
+        st.session_state.messages.append(
+            SystemMessage(name="assistant", content=answer)
+        )
+
+        try:
+            # Tool results are stored before the answer that used them
+            observation_ids = memory.add_observations(observations.observations)
+            answer_id = memory.add("assistant", answer)
+            long_term_memory.remember(
+                [("tool", text, message_id) for text, message_id in zip(observations.observations, observation_ids)]
+                + [("turn", f"User: {prompt}\nAssistant: {answer}", answer_id)]
             )
         except Exception as e:
-            error_msg = f"Agent error: {e}"
-            st.chat_message("assistant").write(error_msg)
-            st.session_state.messages.append(
-                SystemMessage(name="assistant", content=error_msg)
-            )
\ No newline at end of file
+            st.warning(f"Memory error: {e}")
\ No newline at end of file
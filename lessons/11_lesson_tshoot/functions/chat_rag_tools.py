@@ -1,4 +1,3 @@
-import os
 import ipaddress
 
 import streamlit as st
@@ -14,10 +13,8 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.tools import tool
 from langchain.agents import initialize_agent, AgentType
 
-from langchain_community.vectorstores import FAISS
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_openai import OpenAIEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from functions.indexing_job import finished_vectorstore, show_indexing_progress, start_indexing
+from functions.streaming import StreamlitChatHandler
 
 from tools.ping import ping
 
@@ -71,7 +68,7 @@ def chat_rag_tools_main():
         ["gpt-4o-mini", "gpt-3.5-turbo", "gpt-4o"]
     )
 
-    llm = init_chat_model(model_name, model_provider="openai", temperature=0.3)
+    llm = init_chat_model(model_name, model_provider="openai", temperature=0.3, streaming=True)
 
     # Message history
     if "messages" not in st.session_state:
@@ -80,27 +77,20 @@ def chat_rag_tools_main():
     # Load documents to retriever
     with st.expander("Load documents for RAG"):
         if st.button("Index ./docs"):
-            docs_path = "./docs"
-            if os.path.exists(docs_path) and os.listdir(docs_path):
-                with st.spinner("Indexing documents..."):
-                    loader = DirectoryLoader(
-                        docs_path,
-                        loader_cls=TextLoader,
-                        show_progress=True
-                    )
-                    documents = loader.load()
-                    splitter = RecursiveCharacterTextSplitter(
-                        chunk_size=1000,
-                        chunk_overlap=200
-                    )
-                    splits = splitter.split_documents(documents)
-                    embeddings = OpenAIEmbeddings()
-                    vectorstore = FAISS.from_documents(splits, embeddings)
-                    st.session_state.retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
-                    retriever = st.session_state.retriever
-                    st.success("✅ Loaded and indexed")
-            else:
-                st.warning("The ./docs directory is empty")
+            start_indexing("./docs", chunk_size=1000)
+
+        # The previous index keeps serving queries until the new one is ready
+        try:
+            vectorstore = finished_vectorstore()
+        except Exception as e:
+            vectorstore = None
+            st.error(f"Indexing error: {e}")
+        if vectorstore is not None:
+            st.session_state.retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
+            retriever = st.session_state.retriever
+            st.success("✅ Loaded and indexed")
+
+        show_indexing_progress()
 
     # Displaying message history
     for msg in st.session_state.messages:
@@ -126,16 +116,20 @@ def chat_rag_tools_main():
                 verbose=True
             )
 
+            # Tool calls and the answer tokens are streamed into the assistant message
+            with st.chat_message("assistant"):
+                stream = StreamlitChatHandler(show_tools=True)
+
             try:
-                result = agent.invoke({"input": prompt})
+                result = agent.invoke({"input": prompt}, config={"callbacks": [stream]})
                 answer = result.get("output", "(no answer)")
-                st.chat_message("assistant").write(answer)
+                stream.finish(answer)
                 st.session_state.messages.append(
                     SystemMessage(name="assistant", content=answer)
                 )
             except Exception as e:
                 error_msg = f"Agent error: {e}"
-                st.chat_message("assistant").write(error_msg)
+                stream.fail(error_msg)
                 st.session_state.messages.append(
                     SystemMessage(name="assistant", content=error_msg)
                 )
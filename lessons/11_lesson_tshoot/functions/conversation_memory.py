@@ -0,0 +1,160 @@
+import itertools
+from collections import deque
+
+import tiktoken
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+
+
+ROLES = {"user": "User", "assistant": "Assistant"}
+
+SUMMARY_PROMPT = PromptTemplate.from_template(
+    "You maintain a running summary of a network troubleshooting conversation.\n"
+    "Extend the current summary with the new lines.\n"
+    "Keep every fact that may be needed later: device names, IP addresses, ports, VLANs, "
+    "results of checks and changes made, open questions.\n"
+    "Drop greetings and repetitions. At most {max_words} words, plain text.\n\n"
+    "Current summary:\n{summary}\n\n"
+    "New lines:\n{lines}\n\n"
+    "New summary:"
+)
+
+
+# ---------------------------- MEMORY ----------------------------
+
+class ConversationMemory:
+    """
+    Conversation memory with a token budget for the agent prompt.
+
+    The last keep_turns turns (user message + answer) stay verbatim.
+    When the prompt part of the memory grows over max_tokens, all older
+    messages are folded into a running summary with one LLM call, so the
+    summary is updated incrementally and the prompt size stays flat over
+    long sessions.
+
+    Token counts are computed once per message and kept with it;
+    the running total is updated on add and eviction.
+
+    With a store (see functions/message_store.py) every message and summary
+    is persisted, and the memory is resumed from the latest summary plus
+    the messages after it.
+    """
+
+    def __init__(self, max_tokens: int = 2000, keep_turns: int = 3, summary_words: int = 200,
+                 encoding: str = "cl100k_base", store=None, session_id: str = None):
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.summary_words = summary_words
+        self.encoding = tiktoken.get_encoding(encoding)
+        self.messages = deque()
+        self.total_tokens = 0
+        self.summary = ""
+        self.summary_tokens = 0
+        self.summaries = 0
+        self.store = store
+        self.session_id = session_id
+        if store is not None:
+            self.resume()
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encoding.encode_ordinary(text))
+
+    def line(self, role: str, content: str) -> str:
+        return f"{ROLES[role]}: {content}"
+
+    def resume(self) -> None:
+        """
+        Loads the latest summary and the messages after it from the store.
+        Stored token counts are used as is.
+        """
+        summary, messages = self.store.load(self.session_id)
+        if summary:
+            self.summary = summary["summary"]
+            self.summary_tokens = summary["tokens"]
+        for message in messages:
+            # Tool observations are stored for long-term recall, not for the prompt
+            if message["role"] not in ROLES:
+                continue
+            self.messages.append((message["role"], message["content"], message["tokens"], message["id"]))
+            self.total_tokens += message["tokens"]
+
+    def add(self, role: str, content: str) -> int:
+        """
+        Appends a message ("user" or "assistant"), counts its tokens once and persists it.
+        Returns the message id in the store (None without a store).
+        """
+        tokens = self.count_tokens(self.line(role, content))
+        message_id = None
+        if self.store is not None:
+            message_id = self.store.append(self.session_id, role, content, tokens)
+        self.messages.append((role, content, tokens, message_id))
+        self.total_tokens += tokens
+        return message_id
+
+    def add_observations(self, observations: list) -> list:
+        """
+        Persists tool observations without adding them to the prompt.
+        Returns their ids in the store (None without a store).
+        """
+        if self.store is None:
+            return [None] * len(observations)
+        return [self.store.append(self.session_id, "tool", observation, 0) for observation in observations]
+
+    @property
+    def tokens(self) -> int:
+        return self.summary_tokens + self.total_tokens
+
+    def compact(self, llm) -> bool:
+        """
+        Folds messages older than the last keep_turns turns into the summary
+        if the memory is over its token budget.
+
+        Arguments:
+            llm: Chat model used to update the summary.
+
+        Returns:
+            bool: True if the summary was updated.
+        """
+        keep = 2 * self.keep_turns
+        if self.tokens <= self.max_tokens or len(self.messages) <= keep:
+            return False
+
+        # An answer is never kept without its question
+        count = len(self.messages) - keep
+        while count < len(self.messages) and self.messages[count][0] == "assistant":
+            count += 1
+        evicted = list(itertools.islice(self.messages, count))
+
+        # Messages leave the memory only after the summary call succeeds
+        chain = SUMMARY_PROMPT | llm | StrOutputParser()
+        summary = chain.invoke({
+            "max_words": self.summary_words,
+            "summary": self.summary or "(empty)",
+            "lines": "\n".join(self.line(role, content) for role, content, _, _ in evicted),
+        }).strip()
+        for _ in range(count):
+            self.messages.popleft()
+        self.total_tokens -= sum(tokens for _, _, tokens, _ in evicted)
+        message_id = evicted[-1][3]
+        self.summary = summary
+        self.summary_tokens = self.count_tokens(self.summary)
+        self.summaries += 1
+        if self.store is not None:
+            self.store.save_summary(self.session_id, self.summary, self.summary_tokens, message_id)
+        print(f"==> memory: {len(evicted)} messages summarized, {self.tokens} tokens in memory")
+        return True
+
+    def lines(self) -> list:
+        """
+        Returns the summary and the verbatim messages as prompt lines.
+        """
+        lines = [f"[Summary of earlier conversation]: {self.summary}"] if self.summary else []
+        return lines + [self.line(role, content) for role, content, _, _ in self.messages]
+
+    def stats(self) -> dict:
+        return {
+            "tokens": self.tokens,
+            "messages": len(self.messages),
+            "summary_tokens": self.summary_tokens,
+            "summaries": self.summaries,
+        }
@@ -0,0 +1,204 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import tiktoken
+from langchain_core.embeddings import Embeddings
+
+
+# ---------------------------- RATE LIMIT ----------------------------
+
+class RateLimiter:
+    """
+    Token bucket limiting requests per minute and tokens per minute
+    (the two limits the OpenAI embeddings API enforces).
+    """
+
+    def __init__(self, requests_per_minute: int = 3000, tokens_per_minute: int = 1_000_000):
+        self.rpm = requests_per_minute
+        self.tpm = tokens_per_minute
+        self.requests = float(requests_per_minute)
+        self.tokens = float(tokens_per_minute)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> None:
+        """
+        Blocks until one request with the given number of tokens is allowed.
+        """
+        tokens = min(tokens, self.tpm)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                elapsed = now - self.updated
+                self.updated = now
+                self.requests = min(self.rpm, self.requests + elapsed * self.rpm / 60)
+                self.tokens = min(self.tpm, self.tokens + elapsed * self.tpm / 60)
+                if self.requests >= 1 and self.tokens >= tokens:
+                    self.requests -= 1
+                    self.tokens -= tokens
+                    return
+                wait_s = max(
+                    (1 - self.requests) * 60 / self.rpm,
+                    (tokens - self.tokens) * 60 / self.tpm,
+                )
+            time.sleep(max(wait_s, 0.01))
+
+
+# ---------------------------- STATS ----------------------------
+
+class EmbeddingStats:
+    """
+    Throughput counters of the embedding stage.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = None
+        self.chunks = 0
+        self.tokens = 0
+        self.requests = 0
+        self.retries = 0
+
+    def add(self, chunks: int, tokens: int) -> None:
+        with self.lock:
+            self.chunks += chunks
+            self.tokens += tokens
+            self.requests += 1
+
+    def __str__(self) -> str:
+        elapsed = max(time.monotonic() - self.started, 1e-9) if self.started else 0
+        chunks_s = self.chunks / elapsed if elapsed else 0
+        tokens_s = self.tokens / elapsed if elapsed else 0
+        return (
+            f"{self.chunks} chunks, {self.tokens} tokens in {elapsed:.1f}s: "
+            f"{chunks_s:.0f} chunks/s, {tokens_s:.0f} tokens/s, "
+            f"{self.requests} requests, {self.retries} retries"
+        )
+
+
+# ---------------------------- EMBEDDER ----------------------------
+
+class ConcurrentEmbedder(Embeddings):
+    """
+    Wraps a LangChain embeddings object (for example, OpenAIEmbeddings())
+    and sends embedding requests in token-bounded batches, several at a time.
+
+    - Chunks are packed into batches of up to max_batch_tokens tokens.
+    - Up to max_concurrency batches are in flight, all under one rate limiter.
+    - A failed batch is retried chunk by chunk, each with exponential backoff,
+      so one bad chunk does not fail the whole batch.
+    - The batch size adapts: it is halved after a failure and grows back
+      by 25% after each success.
+    - Throughput is collected in self.stats.
+
+    It is a drop-in replacement: FAISS and retrievers use it as any other embeddings.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_tokens: int = 20_000,
+        max_batch_size: int = 512,
+        max_concurrency: int = 8,
+        max_retries: int = 5,
+        rate_limiter: RateLimiter = None,
+        encoding: str = "cl100k_base",
+    ):
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.encoding = tiktoken.get_encoding(encoding)
+        self.stats = EmbeddingStats()
+        self.lock = threading.Lock()
+
+    def count_tokens(self, texts: list) -> list:
+        return [len(tokens) for tokens in self.encoding.encode_ordinary_batch(texts)]
+
+    def take_batch(self, pending: deque, tokens: list) -> list:
+        """
+        Takes chunk ids from the queue until the token budget or size limit is reached.
+        """
+        with self.lock:
+            budget = self.batch_tokens
+        ids = [pending.popleft()]
+        used = tokens[ids[0]]
+        while pending and len(ids) < self.max_batch_size and used + tokens[pending[0]] <= budget:
+            used += tokens[pending[0]]
+            ids.append(pending.popleft())
+        return ids
+
+    def embed_batch(self, texts: list, n_tokens: int, retries: int = 0) -> list:
+        """
+        Sends one request; a single chunk is retried with exponential backoff.
+        """
+        for attempt in range(retries + 1):
+            self.rate_limiter.acquire(n_tokens)
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+                self.stats.add(len(texts), n_tokens)
+                return vectors
+            except Exception:
+                if attempt == retries:
+                    raise
+                with self.stats.lock:
+                    self.stats.retries += 1
+                time.sleep(min(2 ** attempt, 30))
+
+    def embed_documents(self, texts: list) -> list:
+        if not texts:
+            return []
+        if self.stats.started is None:
+            self.stats.started = time.monotonic()
+
+        tokens = self.count_tokens(texts)
+        vectors = [None] * len(texts)
+        pending = deque(range(len(texts)))
+        single = deque()
+
+        with ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="embedding") as pool:
+            futures = {}
+            while pending or single or futures:
+                while (pending or single) and len(futures) < self.max_concurrency:
+                    if single:
+                        ids = [single.popleft()]
+                        retries = self.max_retries
+                    else:
+                        ids = self.take_batch(pending, tokens)
+                        retries = self.max_retries if len(ids) == 1 else 0
+                    future = pool.submit(
+                        self.embed_batch,
+                        [texts[i] for i in ids],
+                        sum(tokens[i] for i in ids),
+                        retries,
+                    )
+                    futures[future] = ids
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ids = futures.pop(future)
+                    try:
+                        batch_vectors = future.result()
+                    except Exception:
+                        if len(ids) == 1:
+                            raise
+                        # Retry each chunk of the failed batch on its own, send smaller batches
+                        single.extend(ids)
+                        with self.lock:
+                            self.batch_tokens = max(self.batch_tokens // 2, 1)
+                        with self.stats.lock:
+                            self.stats.retries += 1
+                        continue
+                    for i, vector in zip(ids, batch_vectors):
+                        vectors[i] = vector
+                    with self.lock:
+                        self.batch_tokens = min(int(self.batch_tokens * 1.25) + 1, self.max_batch_tokens)
+        return vectors
+
+    def embed_query(self, text: str) -> list:
+        return self.embeddings.embed_query(text)
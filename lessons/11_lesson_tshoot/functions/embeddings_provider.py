@@ -0,0 +1,155 @@
+import functools
+import hashlib
+import itertools
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+# Embedding backends:
+# - openai:  OpenAIEmbeddings(), remote API, best quality
+# - hashing: local hashed TF-IDF vectors, no network and no model download
+EMBEDDING_PROVIDERS = ["openai", "hashing"]
+
+# IPs, port names and versions ("10.1.1.15", "Gi0/1", "17.9.3") stay single tokens
+TOKEN_RE = re.compile(r"\w+(?:[./:-]\w+)*")
+
+
+# ---------------------------- LOCAL BACKEND ----------------------------
+
+def tokens(text: str) -> list:
+    words = TOKEN_RE.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+# TUNING: a corpus has a small vocabulary, so every distinct token is hashed once per process
+@functools.lru_cache(maxsize=2 ** 20)
+def bucket(token: str) -> int:
+    # Python's hash() is salted per process, blake2b is stable
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def hashed_counts(texts: list, dim: int) -> np.ndarray:
+    """
+    Returns the signed hashed term-count matrix of shape (len(texts), dim).
+
+    Module-level function, so the hashing pool processes can run it.
+    """
+    text_tokens = [tokens(text) for text in texts]
+    lengths = np.fromiter(map(len, text_tokens), dtype=np.int64, count=len(texts))
+    hashes = np.fromiter(
+        (bucket(token) for row in text_tokens for token in row), dtype=np.uint64, count=int(lengths.sum())
+    )
+    rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+    cols = (hashes % np.uint64(dim)).astype(np.int64)
+    signs = np.where(hashes >> np.uint64(63), 1.0, -1.0)
+    counts = np.bincount(rows * dim + cols, weights=signs, minlength=len(texts) * dim)
+    return counts.reshape(len(texts), dim).astype("float32")
+
+
+# Tokenizing and hashing are pure Python and hold the GIL, so batches run in processes.
+# The pool is created on first use and shared by all sessions of the Streamlit server.
+hashing_pool = None
+hashing_pool_lock = threading.Lock()
+
+
+def get_hashing_pool(workers: int) -> ProcessPoolExecutor:
+    global hashing_pool
+    with hashing_pool_lock:
+        if hashing_pool is None:
+            # "spawn" avoids forking the multi-threaded Streamlit server process
+            hashing_pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        return hashing_pool
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Local CPU embeddings: hashed TF-IDF over words and word bigrams.
+
+    Every token is hashed into one of dim buckets with a +1/-1 sign
+    (the "hashing trick"), term frequencies are scaled as log(1 + tf),
+    optionally weighted by IDF (see fit()) and L2-normalized,
+    so L2 search in FAISS ranks by cosine similarity.
+
+    Texts are counted in batches in a process pool (a single batch, e.g. a query,
+    is counted in place), weighting and normalization are done with NumPy.
+    Vectors are deterministic across processes and restarts.
+    """
+
+    def __init__(self, dim: int = 1024, batch_size: int = 256, workers: int = None):
+        self.dim = dim
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count()
+        self.idf = None
+
+    def counts(self, texts: list) -> np.ndarray:
+        """
+        Returns the signed hashed term-count matrix of shape (len(texts), dim).
+        """
+        return hashed_counts(texts, self.dim)
+
+    def batch_counts(self, texts: list) -> list:
+        """
+        Returns the count matrices of the batches of texts, counted in the hashing pool.
+        """
+        batches = self.batches(texts)
+        if len(batches) == 1 or self.workers == 1:
+            return [self.counts(batch) for batch in batches]
+        pool = get_hashing_pool(self.workers)
+        return list(pool.map(hashed_counts, batches, itertools.repeat(self.dim)))
+
+    def fit(self, texts: list) -> "HashingEmbeddings":
+        """
+        Computes IDF weights of the buckets on the corpus.
+        Must be called before the corpus is embedded, otherwise plain TF is used.
+        """
+        df = np.zeros(self.dim, dtype="float32")
+        for counts in self.batch_counts(texts):
+            df += (counts != 0).sum(axis=0)
+        self.idf = (np.log((1 + len(texts)) / (1 + df)) + 1).astype("float32")
+        return self
+
+    def batches(self, texts: list) -> list:
+        return [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+
+    def weigh(self, matrix: np.ndarray) -> np.ndarray:
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        if self.idf is not None:
+            matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def embed_documents(self, texts: list) -> list:
+        if not texts:
+            return []
+        return self.weigh(np.concatenate(self.batch_counts(texts))).tolist()
+
+    def embed_query(self, text: str) -> list:
+        return self.weigh(self.counts([text]))[0].tolist()
+
+
+# ---------------------------- FACTORY ----------------------------
+
+def get_embeddings(provider: str = None) -> Embeddings:
+    """
+    Returns the embeddings backend by name.
+
+    Arguments:
+        provider (str): One of EMBEDDING_PROVIDERS. By default, taken from
+            the EMBEDDINGS_PROVIDER environment variable, otherwise "openai".
+
+    Returns:
+        Embeddings: LangChain-compatible embeddings object.
+    """
+    provider = provider or os.getenv("EMBEDDINGS_PROVIDER", "openai")
+    if provider == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings()
+    if provider == "hashing":
+        return HashingEmbeddings()
+    raise ValueError(f"Unknown embeddings provider: {provider}. Use one of {EMBEDDING_PROVIDERS}.")
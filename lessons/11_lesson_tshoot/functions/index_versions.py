@@ -0,0 +1,6 @@
+import itertools
+
+
+# Every built index gets a new version, caches key their entries by it.
+# A module of its own: the caches import it without the indexing job and FAISS.
+index_versions = itertools.count(1)
@@ -0,0 +1,252 @@
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import streamlit as st
+
+from langchain_community.document_loaders import TextLoader
+
+from functions.embedding_stage import ConcurrentEmbedder
+from functions.embeddings_provider import HashingEmbeddings, get_embeddings
+from functions.index_versions import index_versions
+from functions.md_splitter import split_markdown
+from functions.parallel_loader import iter_chunk_batches, list_files
+from functions.vector_index import build_vectorstore, build_vectorstore_from_batches
+
+
+# Indexing runs in background threads shared by all sessions of the Streamlit server.
+# Threads are enough here: embedding is network I/O and FAISS releases the GIL,
+# and the resulting vectorstore can be used directly without pickling.
+executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="indexing")
+
+# (docs directory, settings) -> latest job; a finished job serves its store to every session
+jobs = {}
+jobs_lock = threading.Lock()
+
+
+# ---------------------------- JOB ----------------------------
+
+class IndexingJob:
+    """
+    A background indexing run with its progress.
+
+    The worker reports progress via report(), the UI reads it via progress().
+    """
+
+    def __init__(self, key: tuple, docs_hash: str):
+        self.key = key
+        self.docs_hash = docs_hash
+        self.future = None
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+        self.stage = "queued"
+        self.done_count = 0
+        self.total = 0
+
+    def report(self, stage: str, done: int, total: int) -> None:
+        with self.lock:
+            self.stage, self.done_count, self.total = stage, done, total
+
+    def progress(self) -> tuple:
+        with self.lock:
+            return self.stage, self.done_count, self.total
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    @property
+    def failed(self) -> bool:
+        return self.future.done() and self.future.exception() is not None
+
+    def result(self):
+        """
+        Returns the built vectorstore (re-raises the worker exception, if any).
+        """
+        return self.future.result()
+
+
+# ---------------------------- PIPELINE ----------------------------
+
+def load_documents(docs_path: str, progress=None) -> list:
+    """
+    Loads all non-hidden files under docs_path, reporting progress per file.
+    """
+    files = sorted(
+        path for path in Path(docs_path).rglob("*")
+        if path.is_file() and not path.name.startswith(".")
+    )
+    documents = []
+    for i, path in enumerate(files, 1):
+        documents.extend(TextLoader(str(path), encoding="utf-8").load())
+        if progress:
+            progress("loading", i, len(files))
+    return documents
+
+
+def docs_hash(docs_path: str) -> str:
+    """
+    Fingerprint of the documents: path, size and modification time of every file.
+    """
+    digest = hashlib.sha256()
+    for path in list_files(docs_path):
+        stat = os.stat(path)
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def index_docs(
+    docs_path: str,
+    chunk_size: int = 1000,
+    index_type: str = "flat",
+    nprobe: int = 16,
+    ef_search: int = 64,
+    parallel: bool = False,
+    embeddings_provider: str = None,
+    rerank: bool = False,
+    progress=None,
+):
+    """
+    Full indexing pipeline: load files, split them and build the FAISS vectorstore.
+
+    In parallel mode, files are read by a thread pool, split by a process pool
+    and streamed into embedding in batches (for large documentation mirrors).
+    The serial mode has no pool start-up cost and suits a few files.
+
+    Arguments:
+        docs_path (str): Directory with documents.
+        chunk_size (int): Maximum chunk length in characters.
+        index_type (str): FAISS index type (see vector_index.INDEX_TYPES).
+        nprobe (int): IVF clusters scanned per query.
+        ef_search (int): HNSW candidate list size per query.
+        parallel (bool): Use the parallel streaming loader.
+        embeddings_provider (str): Embeddings backend (see EMBEDDING_PROVIDERS).
+        rerank (bool): Re-rank results exactly from float32 vectors on disk.
+        progress (callable): progress(stage, done, total) callback.
+
+    Returns:
+        FAISS: The built vectorstore.
+    """
+    embeddings = get_embeddings(embeddings_provider)
+    # Remote APIs benefit from concurrent batched requests, the local backend parallelizes itself
+    if not isinstance(embeddings, HashingEmbeddings):
+        embeddings = ConcurrentEmbedder(embeddings)
+    stats = getattr(embeddings, "stats", None)
+
+    def report(stage: str, done: int, total: int) -> None:
+        # Adds live embedding throughput to the progress text
+        if progress:
+            progress(f"{stage} [{stats}]" if stats else stage, done, total)
+
+    if parallel:
+        batches = iter_chunk_batches(docs_path, chunk_size=chunk_size, progress=report)
+        if isinstance(embeddings, HashingEmbeddings):
+            # IDF needs the whole corpus before the first vector; the chunk texts are kept
+            # in the vectorstore docstore anyway, so collecting them adds little memory
+            batches = list(batches)
+            embeddings.fit([doc.page_content for batch in batches for doc in batch])
+        vectorstore = build_vectorstore_from_batches(
+            batches,
+            embeddings,
+            index_type=index_type,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            rerank=rerank,
+        )
+    else:
+        documents = load_documents(docs_path, progress=report)
+        splits = split_markdown(documents, chunk_size=chunk_size)
+        report("splitting", len(splits), len(splits))
+        if isinstance(embeddings, HashingEmbeddings):
+            embeddings.fit([doc.page_content for doc in splits])
+        vectorstore = build_vectorstore(
+            splits,
+            embeddings,
+            index_type=index_type,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            rerank=rerank,
+            progress=report,
+        )
+
+    if stats:
+        print(f"==> embedding: {stats}")
+    vectorstore.index_version = next(index_versions)
+    return vectorstore
+
+
+def submit_indexing(docs_path: str, **settings) -> IndexingJob:
+    """
+    Starts indexing in the background and returns the job.
+
+    Jobs are shared by all sessions: if the same directory with unchanged
+    files is already being indexed or has been indexed with the same settings,
+    that job is returned and its vectorstore is reused instead of building
+    a duplicate one. Changed files or a failed job start a new job, which
+    replaces the old one in the registry.
+
+    Arguments:
+        docs_path (str): Directory with documents.
+        **settings: Arguments for index_docs() (chunk_size, index_type, ...).
+
+    Returns:
+        IndexingJob: The new, running or finished job.
+    """
+    key = (os.path.abspath(docs_path), tuple(sorted(settings.items())))
+    fingerprint = docs_hash(docs_path)
+    with jobs_lock:
+        job = jobs.get(key)
+        if job is not None and job.docs_hash == fingerprint and not job.failed:
+            return job
+        job = IndexingJob(key, fingerprint)
+        job.future = executor.submit(index_docs, docs_path, progress=job.report, **settings)
+        jobs[key] = job
+        return job
+
+
+# ---------------------------- UI ----------------------------
+
+def start_indexing(docs_path: str = "./docs", **settings) -> None:
+    """
+    Submits an indexing job for the current session (called from the "Index ./docs" button).
+    """
+    if os.path.exists(docs_path) and os.listdir(docs_path):
+        st.session_state.indexing_job = submit_indexing(docs_path, **settings)
+    else:
+        st.warning(f"The {docs_path} directory is empty")
+
+
+@st.fragment(run_every=1)
+def show_indexing_progress() -> None:
+    """
+    Polls the session's indexing job once a second without blocking the chat.
+    When the job finishes, the whole script is rerun to swap in the new index.
+    """
+    job = st.session_state.get("indexing_job")
+    if job is None:
+        return
+    if job.done:
+        st.rerun()
+    stage, done, total = job.progress()
+    elapsed = int(time.time() - job.started_at)
+    st.progress(
+        done / total if total else 0.0,
+        text=f"Indexing documents: {stage} {done}/{total} ({elapsed}s)",
+    )
+
+
+def finished_vectorstore():
+    """
+    Returns the vectorstore of the session's finished indexing job, or None.
+
+    Until the job finishes, the previous index keeps serving queries.
+    Re-raises the indexing error, if any.
+    """
+    job = st.session_state.get("indexing_job")
+    if job is None or not job.done:
+        return None
+    del st.session_state.indexing_job
+    return job.result()
@@ -0,0 +1,126 @@
+import ipaddress
+import re
+
+from tools.ping import ping
+from tools.cmdb import cmdb, cmdb_reverse
+from tools.port_table import PortTable
+from tools.show_cache import show_cache
+from tools.show_vlan_port import show_vlan_port
+from tools.show_vlan_ports_all import show_vlan_ports_all
+from tools.transport import TransportError, UnknownDeviceError
+
+
+# Device: IPv4 address or hostname ("asw1", "vpn-gw")
+TARGET = r"(?P<target>\d{1,3}(?:\.\d{1,3}){3}|[a-z][\w-]*)"
+PORT = r"(?P<port>(?:gi|te|ten|fa|eth?)[a-z]*\s?\d+(?:/\d+)*)"
+END = r"\s*[?.!]?\s*$"
+
+# Patterns are matched against the whole normalized input, anything else goes to the agent
+INTENTS = [
+    ("ping", re.compile(rf"^(?:please\s+)?(?:ping|check)\s+{TARGET}{END}")),
+    ("ping", re.compile(rf"^(?:check\s+if\s+|is\s+){TARGET}\s+(?:is\s+)?(?:reachable|alive|up)(?:\s+via\s+ping)?{END}")),
+    ("show_vlan_port", re.compile(
+        rf"^(?:show\s+|what\s+is\s+(?:the\s+)?)?vlan\s+(?:of|on|for)\s+(?:port\s+)?{PORT}\s+(?:on|of|at)\s+{TARGET}{END}"
+    )),
+    ("show_vlan_ports_all", re.compile(
+        rf"^show\s+(?:all\s+)?(?:vlans?|ports|vlan\s+ports)\s+(?:on|of|for)\s+{TARGET}{END}"
+    )),
+    ("cmdb", re.compile(
+        rf"^(?:what\s+is\s+(?:the\s+)?)?ip(?:\s+address)?\s+(?:of|for)\s+{TARGET}{END}"
+    )),
+]
+
+
+# ---------------------------- HELPERS ----------------------------
+
+def normalize_port(port: str) -> str:
+    """
+    Brings a port name to the form used by the devices: "gi 0/5" -> "Gi0/5", "ten0/1" -> "Ten0/1".
+    """
+    port = port.replace(" ", "")
+    prefix = re.match(r"[a-z]+", port).group()
+    return prefix.capitalize() + port[len(prefix):]
+
+
+def resolve(target: str):
+    """
+    Returns (name, ip) of the target or None if the hostname is not in the CMDB.
+    """
+    try:
+        ip = str(ipaddress.IPv4Address(target))
+    except ValueError:
+        pass
+    else:
+        names = cmdb_reverse(ip)
+        return (names[0] if names else ip), ip
+    ip = cmdb(target)
+    if ip is None:
+        return None
+    return target, ip
+
+
+def match_intent(text: str):
+    """
+    Matches the input against the intent patterns.
+
+    Returns:
+        tuple[str, dict] | None: (intent, named groups) or None.
+    """
+    text = " ".join(text.lower().split())
+    for intent, pattern in INTENTS:
+        match = pattern.match(text)
+        if match:
+            return intent, {key: value for key, value in match.groupdict().items() if value}
+    return None
+
+
+# ---------------------------- ROUTER ----------------------------
+
+def route_intent(text: str):
+    """
+    Runs trivial tool requests directly, without the agent and the LLM.
+
+    Recognized inputs: "ping 10.0.0.1", "is asw1 reachable?",
+    "show vlans on asw1", "vlan of port Gi0/5 on asw2", "ip of core1".
+    Anything the router is not sure about (no pattern match, unknown
+    hostname, invalid port) returns None and goes to the agent, which can
+    fall back to lookup_docs().
+
+    Arguments:
+        text (str): User input.
+
+    Returns:
+        tuple[str, str] | None: (intent, formatted answer) or None.
+    """
+    matched = match_intent(text)
+    if matched is None:
+        return None
+    intent, groups = matched
+    resolved = resolve(groups["target"])
+    if resolved is None:
+        return None
+    name, ip = resolved
+    device = ip if name == ip else f"{name} ({ip})"
+
+    if intent == "ping":
+        reachable = ping(ip)
+        answer = f"{device} is {'reachable' if reachable else 'not reachable'} by ping."
+    elif intent == "cmdb":
+        answer = f"IP address of {name}: {ip}"
+    else:
+        # Unknown devices and ports go to the agent; the show tools then format
+        # the answer from the same cached table
+        try:
+            table = show_cache.view(ip, "show interfaces status", PortTable)
+        except UnknownDeviceError:
+            return None
+        except TransportError as e:
+            return intent, f"{device} is not reachable: {e}"
+        if intent == "show_vlan_ports_all":
+            answer = show_vlan_ports_all(ip)
+        else:
+            port = normalize_port(groups["port"])
+            if table.vlan(port) is None:
+                return None
+            answer = show_vlan_port(ip, port)
+    return intent, answer
@@ -3,7 +3,7 @@ import streamlit as st
 from pydantic import BaseModel
 from langchain.chat_models import init_chat_model
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
+from langchain_core.output_parsers import PydanticOutputParser, StrOutputParser
 
 
 def log_analysis_main():
@@ -162,10 +162,10 @@ def log_analysis_main():
                 ("system", EXPLANATION_PROMPT),
                 ("user", "{input_text}")
             ])
-            explanation_chain = explanation_prompt | llm
+            explanation_chain = explanation_prompt | llm | StrOutputParser()
             try:
-                response = explanation_chain.invoke({"input_text": full_context})
                 st.subheader("💡 Analysis by LLM:")
-                st.write(response.content)
+                # Tokens are shown as they arrive instead of after the whole answer
+                st.write_stream(explanation_chain.stream({"input_text": full_context}))
             except Exception as e:
                 st.error(f"Error during analysis: {e}")
\ No newline at end of file
@@ -0,0 +1,163 @@
+import numpy as np
+from langchain_core.callbacks import BaseCallbackHandler
+
+from functions.vector_index import new_vectorstore
+
+
+# Tool observations are shortened before indexing, the facts are at the beginning
+MAX_FACT_CHARS = 500
+
+
+# ---------------------------- MEMORY ----------------------------
+
+class LongTermMemory:
+    """
+    Vector index of past turns and tool observations of one conversation.
+
+    Every finished turn ("User: ... / Assistant: ...") and every tool call
+    with its result is embedded into a flat FAISS vectorstore, the same
+    machinery lookup_docs uses. For a new question only the k most similar
+    facts are put into the prompt, so the prompt size does not grow with
+    the conversation, while facts that fell out of the recent turns and
+    the summary can still be recalled.
+
+    Facts carry the id of their message in the chat store: those still
+    present verbatim in the prompt are not recalled twice.
+
+    With a store, fact vectors are saved next to the messages: resuming a
+    session loads them and embeds only the turns that have no vector yet.
+    """
+
+    def __init__(self, embeddings, k: int = 3, store=None, session_id: str = None, provider: str = "default"):
+        self.embeddings = embeddings
+        self.k = k
+        self.store = store
+        self.session_id = session_id
+        self.provider = provider
+        self.vectorstore = None
+        if store is not None:
+            self.resume()
+
+    def resume(self) -> None:
+        """
+        Indexes the saved fact vectors of the session and embeds the facts missing from them.
+        """
+        saved = self.store.load_fact_vectors(self.session_id, self.provider)
+        if saved:
+            self.index(
+                [(fact["kind"], fact["text"], fact["message_id"]) for fact in saved],
+                [np.frombuffer(fact["vector"], dtype="float32") for fact in saved],
+            )
+        # Facts are saved when their turn ends: only the turns after the last saved one can miss vectors
+        saved_ids = {fact["message_id"] for fact in saved}
+        last_turn = max((fact["message_id"] for fact in saved if fact["kind"] == "turn"), default=0)
+        missing = [
+            fact for fact in history_facts(self.store.history(self.session_id, after_id=last_turn))
+            if fact[2] not in saved_ids
+        ]
+        self.remember(missing)
+
+    def remember(self, facts: list) -> None:
+        """
+        Embeds, indexes and (with a store) saves facts.
+
+        Arguments:
+            facts (list[tuple[str, str, int | None]]): (kind, text, message id) of every fact,
+                kind is "turn" or "tool".
+        """
+        if not facts:
+            return
+        facts = [(kind, text[:MAX_FACT_CHARS], message_id) for kind, text, message_id in facts]
+        vectors = [np.asarray(vector, dtype="float32") for vector in
+                   self.embeddings.embed_documents([text for _, text, _ in facts])]
+        self.index(facts, vectors)
+        if self.store is not None:
+            self.store.save_fact_vectors(self.session_id, self.provider, [
+                (message_id, kind, text, vector.tobytes())
+                for (kind, text, message_id), vector in zip(facts, vectors)
+                if message_id is not None
+            ])
+
+    def index(self, facts: list, vectors: list) -> None:
+        """
+        Adds already embedded facts to the vector index.
+        """
+        texts = [text for _, text, _ in facts]
+        if self.vectorstore is None:
+            sample = np.asarray(vectors[:1], dtype="float32")
+            self.vectorstore = new_vectorstore(self.embeddings, "flat", sample, n_vectors=len(texts))
+        self.vectorstore.add_embeddings(
+            zip(texts, vectors),
+            metadatas=[{"kind": kind, "message_id": message_id} for kind, _, message_id in facts],
+        )
+
+    def recall(self, query: str, before_id: int = None) -> list:
+        """
+        Returns up to k facts relevant to the query.
+
+        Arguments:
+            query (str): Current user question.
+            before_id (int): Turns from this message id on are in the prompt verbatim and skipped.
+
+        Returns:
+            list[str]: Facts, most relevant first.
+        """
+        if self.vectorstore is None:
+            return []
+        docs = self.vectorstore.similarity_search(query, k=self.k * 2)
+        facts = []
+        for doc in docs:
+            message_id = doc.metadata.get("message_id")
+            in_prompt = before_id is not None and message_id is not None and message_id >= before_id
+            if doc.metadata.get("kind") == "turn" and in_prompt:
+                continue
+            facts.append(doc.page_content)
+        return facts[:self.k]
+
+
+def history_facts(messages: list) -> list:
+    """
+    Turns stored messages into facts: user + assistant pairs and tool observations.
+
+    Arguments:
+        messages (list[dict]): Chat store rows with id, role and content.
+
+    Returns:
+        list[tuple[str, str, int]]: (kind, text, message id) for LongTermMemory.remember().
+    """
+    facts = []
+    question = None
+    for message in messages:
+        if message["role"] == "user":
+            question = message["content"]
+        elif message["role"] == "assistant" and question is not None:
+            facts.append(("turn", f"User: {question}\nAssistant: {message['content']}", message["id"]))
+            question = None
+        elif message["role"] == "tool":
+            facts.append(("tool", message["content"], message["id"]))
+    return facts
+
+
+# ---------------------------- CALLBACKS ----------------------------
+
+class ToolObservationCollector(BaseCallbackHandler):
+    """
+    Collects "tool(input) -> result" facts during an agent run.
+    """
+
+    def __init__(self):
+        self.observations = []
+        self.pending = None
+
+    def on_agent_action(self, action, **kwargs) -> None:
+        self.pending = f"{action.tool}({action.tool_input})"
+
+    def on_tool_end(self, output, **kwargs) -> None:
+        if self.pending:
+            self.observations.append(f"{self.pending} -> {output}")
+            self.pending = None
+
+    def on_tool_error(self, error, **kwargs) -> None:
+        if self.pending:
+            self.observations.append(f"{self.pending} -> error: {error}")
+            self.pending = None
@@ -0,0 +1,245 @@
+import hashlib
+import re
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+RULE_RE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+
+
+# ---------------------------- PARSING ----------------------------
+
+def parse_sections(text: str) -> list:
+    """
+    Splits Markdown text into sections by headings.
+
+    Inside a section the text is divided into blocks: paragraphs, lists and
+    fenced code blocks. A code block is always kept as a single block.
+
+    Arguments:
+        text (str): Markdown text.
+
+    Returns:
+        list[tuple[list[str], list[str]]]: (heading path, blocks) for each section.
+    """
+    sections = []
+    path = []
+    blocks = []
+    current = []
+    fence = None
+
+    def flush_block():
+        if current and any(line.strip() for line in current):
+            blocks.append("\n".join(current).strip("\n"))
+        current.clear()
+
+    def flush_section():
+        flush_block()
+        if blocks:
+            sections.append((list(path), list(blocks)))
+        blocks.clear()
+
+    for line in text.splitlines():
+        if fence:
+            current.append(line)
+            if line.strip().startswith(fence):
+                fence = None
+                flush_block()
+            continue
+
+        fence_match = FENCE_RE.match(line)
+        if fence_match:
+            flush_block()
+            fence = fence_match.group(1)
+            current.append(line)
+            continue
+
+        heading = HEADING_RE.match(line)
+        if heading:
+            flush_section()
+            level = len(heading.group(1))
+            del path[level - 1:]
+            path.extend([""] * (level - 1 - len(path)))
+            path.append(heading.group(2))
+            blocks.append(line.strip())
+            continue
+
+        if not line.strip() or RULE_RE.match(line):
+            flush_block()
+            continue
+
+        current.append(line)
+
+    flush_section()
+    return sections
+
+
+# --------------------------- SPLITTING ---------------------------
+
+def common_prefix(a: list, b: list) -> list:
+    """
+    Returns the longest common prefix of two heading paths.
+    """
+    prefix = []
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        prefix.append(x)
+    return prefix
+
+
+def chunk_digest(text: str) -> str:
+    """
+    Returns a whitespace-insensitive fingerprint of the chunk text (used for deduplication).
+    """
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def text_size(parts: list) -> int:
+    """
+    Returns the length of the chunk text assembled from blocks.
+    """
+    return sum(len(part) for part in parts) + 2 * max(len(parts) - 1, 0)
+
+
+def split_code_block(block: str, chunk_size: int) -> list:
+    """
+    Splits a fenced code block longer than chunk_size on line boundaries.
+    Every piece is wrapped in the original fences, so it is still a code block.
+    """
+    lines = block.split("\n")
+    opener = lines[0]
+    closer = lines[-1] if len(lines) > 1 and FENCE_RE.match(lines[-1]) else opener.strip()[:3]
+    body = lines[1:-1] if len(lines) > 1 and FENCE_RE.match(lines[-1]) else lines[1:]
+    room = max(chunk_size - len(opener) - len(closer) - 2, 1)
+
+    pieces, current, size = [], [], 0
+    for line in body:
+        # A single line longer than the room left is cut into parts
+        for start in range(0, max(len(line), 1), room):
+            part = line[start:start + room]
+            if current and size + len(part) + 1 > room:
+                pieces.append(current)
+                current, size = [], 0
+            current.append(part)
+            size += len(part) + 1
+    if current:
+        pieces.append(current)
+    return ["\n".join([opener] + piece + [closer]) for piece in pieces]
+
+
+def split_block(block: str, chunk_size: int) -> list:
+    """
+    Returns the block as is if it fits into chunk_size, otherwise its parts:
+    code on line boundaries, text by paragraphs, lines, sentences and words.
+    """
+    if len(block) <= chunk_size:
+        return [block]
+    if FENCE_RE.match(block):
+        return split_code_block(block, chunk_size)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=0,
+        separators=["\n\n", "\n", ". ", " ", ""],
+    )
+    return splitter.split_text(block)
+
+
+def pack_blocks(blocks: list, chunk_size: int) -> list:
+    """
+    Greedily packs consecutive blocks of one section into chunks of up to chunk_size.
+
+    Blocks longer than chunk_size are split first (split_block()): code on
+    line boundaries, text recursively. Continuation chunks repeat the section
+    heading so that they still make sense on their own.
+    """
+    heading = [blocks[0]] if blocks and blocks[0].startswith("#") else []
+    # Room for the repeated heading, so that continuation chunks fit too
+    block_size = max(chunk_size - text_size(heading + [""]), chunk_size // 2)
+    pieces = [[]]
+    for block in (part for block in blocks for part in split_block(block, block_size)):
+        if pieces[-1] and text_size(pieces[-1] + [block]) > chunk_size:
+            pieces.append(list(heading))
+        pieces[-1].append(block)
+    return pieces
+
+
+def split_markdown(
+    documents: list,
+    chunk_size: int = 1000,
+    min_chunk_size: int = 200,
+) -> list:
+    """
+    Splits documents into chunks along Markdown structure.
+
+    - A chunk never crosses a heading and never cuts a fenced code block
+      that fits into chunk_size; longer code blocks are split on line
+      boundaries, longer paragraphs (and plain text) recursively.
+    - Each chunk gets the heading path in metadata["headings"],
+      for example "Network Administrator Wiki > Wi-Fi Settings".
+    - Chunks do not overlap, and chunks with identical text are indexed once,
+      so nothing is embedded twice.
+    - A section shorter than min_chunk_size is merged into the next sibling
+      section (if the result fits into chunk_size) instead of becoming a tiny chunk.
+
+    Arguments:
+        documents (list[Document]): Loaded documents (.md or plain text).
+        chunk_size (int): Target maximum chunk length in characters.
+        min_chunk_size (int): Sections shorter than this are merged with siblings.
+
+    Returns:
+        list[Document]: Chunks with "source" and "headings" metadata.
+    """
+    chunks = []
+    seen = set()
+
+    def emit(doc, path, parts):
+        # A chunk made of headings only carries no information
+        if all(part.startswith("#") for part in parts):
+            return
+        text = "\n\n".join(parts).strip()
+        digest = chunk_digest(text)
+        if digest in seen:
+            return
+        seen.add(digest)
+        metadata = dict(doc.metadata)
+        metadata["headings"] = " > ".join(name for name in path if name)
+        chunks.append(Document(page_content=text, metadata=metadata))
+
+    for doc in documents:
+        pending_path, pending, pending_group = [], [], False
+
+        for path, blocks in parse_sections(doc.page_content):
+            pieces = pack_blocks(blocks, chunk_size)
+            first_path = path
+            merged_siblings = False
+
+            # A short previous section is merged into this one if it is a sibling
+            # (or the parent's intro) and the result still fits into chunk_size
+            if pending:
+                parent = path[:-1]
+                intro = not pending_group and pending_path == parent
+                sibling = pending_path[:-1] == parent or (pending_group and pending_path == parent)
+                if (intro or sibling) and text_size(pending + pieces[0]) <= chunk_size:
+                    pieces[0] = pending + pieces[0]
+                    first_path = path if intro else parent
+                    merged_siblings = not intro
+                else:
+                    emit(doc, pending_path, pending)
+                pending_path, pending = [], []
+
+            if len(pieces) == 1 and text_size(pieces[0]) < min_chunk_size:
+                pending_path, pending = first_path, pieces[0]
+                pending_group = merged_siblings
+                continue
+
+            for i, parts in enumerate(pieces):
+                emit(doc, first_path if i == 0 else path, parts)
+
+        if pending:
+            emit(doc, pending_path, pending)
+
+    return chunks
@@ -0,0 +1,193 @@
+import abc
+import os
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+
+
+# Chat store location, "sqlite:///<path>"; every app process pointing to the same file shares it
+DEFAULT_STORE_URL = "sqlite:///./chat_memory.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    upto_message_id INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS summaries_session ON summaries (session_id, id);
+
+CREATE TABLE IF NOT EXISTS fact_vectors (
+    message_id INTEGER NOT NULL,
+    session_id TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    text TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (session_id, provider, message_id)
+);
+"""
+
+
+# ---------------------------- STORES ----------------------------
+
+class MessageStore(abc.ABC):
+    """
+    Interface of a persistent chat store.
+
+    Both messages and summaries are append-only: nothing is updated in place,
+    so several app processes can write to one store without coordination.
+    A session is resumed from its latest summary plus the messages written
+    after it, never by replaying the whole history.
+    """
+
+    @abc.abstractmethod
+    def append(self, session_id: str, role: str, content: str, tokens: int) -> int:
+        """
+        Saves a message and returns its id (ids grow within a session).
+        """
+
+    @abc.abstractmethod
+    def save_summary(self, session_id: str, summary: str, tokens: int, upto_message_id: int) -> None:
+        """
+        Saves a summary covering all messages of the session up to upto_message_id.
+        """
+
+    @abc.abstractmethod
+    def load(self, session_id: str) -> tuple:
+        """
+        Returns (summary dict or None, list of message dicts after the summary).
+        """
+
+    @abc.abstractmethod
+    def history(self, session_id: str, after_id: int = 0) -> list:
+        """
+        Returns the messages of the session with id > after_id (id, role, content), oldest first.
+        """
+
+    @abc.abstractmethod
+    def save_fact_vectors(self, session_id: str, provider: str, facts: list) -> None:
+        """
+        Saves embedded long-term memory facts: (message id, kind, text, vector bytes).
+        Vectors depend on the embeddings provider, so they are stored per provider.
+        """
+
+    @abc.abstractmethod
+    def load_fact_vectors(self, session_id: str, provider: str) -> list:
+        """
+        Returns the saved facts of the session (message_id, kind, text, vector), oldest first.
+        """
+
+
+class SQLiteMessageStore(MessageStore):
+    """
+    SQLite chat store: one database file shared by all app processes.
+
+    WAL mode lets readers work while another process writes, busy_timeout
+    makes concurrent writers wait for each other instead of failing.
+    Every thread gets its own connection.
+    """
+
+    def __init__(self, path: str = "./chat_memory.db", busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.local = threading.local()
+        with self.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def append(self, session_id: str, role: str, content: str, tokens: int) -> int:
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO messages (session_id, role, content, tokens, created_at) VALUES (?, ?, ?, ?, ?)",
+                (session_id, role, content, tokens, time.time()),
+            )
+        return cursor.lastrowid
+
+    def save_summary(self, session_id: str, summary: str, tokens: int, upto_message_id: int) -> None:
+        with self.connection() as conn:
+            conn.execute(
+                "INSERT INTO summaries (session_id, summary, tokens, upto_message_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (session_id, summary, tokens, upto_message_id, time.time()),
+            )
+
+    def load(self, session_id: str) -> tuple:
+        conn = self.connection()
+        summary = conn.execute(
+            "SELECT summary, tokens, upto_message_id FROM summaries WHERE session_id = ? ORDER BY id DESC LIMIT 1",
+            (session_id,),
+        ).fetchone()
+        upto = summary["upto_message_id"] if summary else 0
+        messages = conn.execute(
+            "SELECT id, role, content, tokens FROM messages WHERE session_id = ? AND id > ? ORDER BY id",
+            (session_id, upto),
+        ).fetchall()
+        return (dict(summary) if summary else None), [dict(message) for message in messages]
+
+    def history(self, session_id: str, after_id: int = 0) -> list:
+        messages = self.connection().execute(
+            "SELECT id, role, content FROM messages WHERE session_id = ? AND id > ? ORDER BY id",
+            (session_id, after_id),
+        ).fetchall()
+        return [dict(message) for message in messages]
+
+    def save_fact_vectors(self, session_id: str, provider: str, facts: list) -> None:
+        with self.connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fact_vectors (message_id, session_id, provider, kind, text, vector) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(message_id, session_id, provider, kind, text, vector) for message_id, kind, text, vector in facts],
+            )
+
+    def load_fact_vectors(self, session_id: str, provider: str) -> list:
+        facts = self.connection().execute(
+            "SELECT message_id, kind, text, vector FROM fact_vectors "
+            "WHERE session_id = ? AND provider = ? ORDER BY message_id",
+            (session_id, provider),
+        ).fetchall()
+        return [dict(fact) for fact in facts]
+
+
+# ---------------------------- FACTORY ----------------------------
+
+@st.cache_resource
+def get_message_store(url: str = None) -> MessageStore:
+    """
+    Returns the chat store by URL, one store object per URL for all sessions
+    (its SQLite connections are per thread).
+
+    Arguments:
+        url (str): "sqlite:///<path>". By default, taken from the CHAT_STORE_URL
+            environment variable, otherwise DEFAULT_STORE_URL.
+
+    Returns:
+        MessageStore: Store object.
+    """
+    url = url or os.getenv("CHAT_STORE_URL", DEFAULT_STORE_URL)
+    if url.startswith("sqlite:///"):
+        return SQLiteMessageStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported chat store: {url}. Use sqlite:///<path>.")
@@ -0,0 +1,167 @@
+import multiprocessing
+import os
+import queue
+import threading
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from functions.md_splitter import chunk_digest, split_markdown
+
+
+# Marks the end of the batch stream
+END = object()
+
+
+# ---------------------------- STAGES ----------------------------
+
+def list_files(docs_path: str) -> list:
+    """
+    Returns all non-hidden files under docs_path (same set of files as DirectoryLoader).
+    """
+    return sorted(
+        str(path) for path in Path(docs_path).rglob("*")
+        if path.is_file() and not path.name.startswith(".")
+    )
+
+
+def read_file(path: str) -> str:
+    """
+    I/O stage: reads a file (runs in a thread pool).
+    """
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def normalize_text(text: str) -> str:
+    """
+    Brings text to one form: no BOM, Unix newlines, NFC Unicode, no trailing spaces.
+    """
+    text = text.lstrip("\ufeff").replace("\r\n", "\n").replace("\r", "\n")
+    text = unicodedata.normalize("NFC", text)
+    return "\n".join(line.rstrip() for line in text.split("\n"))
+
+
+def split_file(path: str, text: str, chunk_size: int) -> list:
+    """
+    CPU stage: normalizes and splits one file (runs in a process pool).
+
+    Returns plain (text, metadata) tuples, which are cheaper to pass
+    between processes than Document objects.
+    """
+    doc = Document(page_content=normalize_text(text), metadata={"source": path})
+    return [
+        (chunk.page_content, chunk.metadata)
+        for chunk in split_markdown([doc], chunk_size=chunk_size)
+    ]
+
+
+# ---------------------------- PIPELINE ----------------------------
+
+def iter_chunk_batches(
+    docs_path: str,
+    chunk_size: int = 1000,
+    batch_size: int = 256,
+    io_workers: int = 16,
+    cpu_workers: int = None,
+    window: int = 512,
+    max_queued_batches: int = 8,
+    progress=None,
+):
+    """
+    Loads and splits documents in parallel and yields chunks in batches.
+
+    Pipeline:
+    - files are read by a thread pool, the next window of files is read
+      while the current one is being split;
+    - files are normalized and split by a process pool (all CPU cores);
+    - chunks are deduplicated and grouped into batches, which are put into
+      a bounded queue consumed by the embedding stage.
+
+    The producer runs in its own thread, so reading, splitting and embedding
+    overlap. The bounded queue stops the producer when embedding falls behind,
+    so memory stays flat even for 100k-file mirrors.
+
+    Arguments:
+        docs_path (str): Directory with documents.
+        chunk_size (int): Maximum chunk length in characters.
+        batch_size (int): Number of chunks per yielded batch.
+        io_workers (int): Threads reading files.
+        cpu_workers (int): Processes splitting files (all cores by default).
+        window (int): Number of files read ahead at a time.
+        max_queued_batches (int): Batches buffered ahead of the embedding stage.
+        progress (callable): progress(stage, done, total) callback, counted in files.
+
+    Yields:
+        list[Document]: Batches of chunks.
+    """
+    files = list_files(docs_path)
+    cpu_workers = cpu_workers or os.cpu_count()
+    batches = queue.Queue(maxsize=max_queued_batches)
+    stop = threading.Event()
+
+    def put(item):
+        # Gives up when the consumer has stopped reading
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def produce():
+        seen = set()
+        batch = []
+        try:
+            # "spawn" avoids forking the multi-threaded Streamlit server process
+            context = multiprocessing.get_context("spawn")
+            with ThreadPoolExecutor(io_workers) as io_pool, \
+                    ProcessPoolExecutor(cpu_workers, mp_context=context) as cpu_pool:
+                windows = [files[i:i + window] for i in range(0, len(files), window)]
+                reads = io_pool.map(read_file, windows[0]) if windows else []
+
+                for i, paths in enumerate(windows):
+                    texts = list(reads)
+                    if i + 1 < len(windows):
+                        reads = io_pool.map(read_file, windows[i + 1])
+
+                    chunked = cpu_pool.map(
+                        split_file, paths, texts, repeat(chunk_size),
+                        chunksize=max(1, len(paths) // (4 * cpu_workers)),
+                    )
+                    for n, chunks in enumerate(chunked, 1):
+                        if stop.is_set():
+                            return
+                        for text, metadata in chunks:
+                            digest = chunk_digest(text)
+                            if digest in seen:
+                                continue
+                            seen.add(digest)
+                            batch.append(Document(page_content=text, metadata=metadata))
+                            if len(batch) >= batch_size:
+                                put(batch)
+                                batch = []
+                        if progress:
+                            progress("indexing", i * window + n, len(files))
+
+            if batch:
+                put(batch)
+            put(END)
+        except Exception as e:
+            put(e)
+
+    producer = threading.Thread(target=produce, name="chunk-producer", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = batches.get()
+            if item is END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
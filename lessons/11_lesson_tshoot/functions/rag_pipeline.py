@@ -0,0 +1,127 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from langchain.chains.conversational_retrieval.prompts import CONDENSE_QUESTION_PROMPT
+from langchain_core.output_parsers import StrOutputParser
+
+from functions.retrieval_cache import normalize_query
+
+
+# Words that point back to earlier turns: "check it again", "what about asw2?"
+REFERENCE_RE = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|their|there|he|she|his|her|"
+    r"same|above|previous|again|once more|else|too)\b",
+    re.IGNORECASE,
+)
+FOLLOW_UP_RE = re.compile(r"^\s*(and|but|so|or|also|then|what about|how about)\b", re.IGNORECASE)
+
+# Number of last (question, answer) pairs used to rephrase a follow-up question
+CONDENSE_TURNS = 4
+
+
+# ---------------------------- HEURISTIC ----------------------------
+
+def is_self_contained(question: str, min_words: int = 4) -> bool:
+    """
+    Cheap check whether a question can be answered without the chat history.
+
+    A question is considered self-contained if it is not too short, does not
+    start like a follow-up ("and ...", "what about ...") and has no words
+    referring to earlier turns ("it", "that", "again", ...).
+    A false "no" only costs one rephrasing call, so the check is conservative.
+
+    Arguments:
+        question (str): User question.
+        min_words (int): Shorter questions are treated as follow-ups.
+
+    Returns:
+        bool: True if the question can be used for retrieval as is.
+    """
+    if len(question.split()) < min_words:
+        return False
+    if FOLLOW_UP_RE.match(question):
+        return False
+    return not REFERENCE_RE.search(question)
+
+
+# ---------------------------- CONDENSE ----------------------------
+
+def format_chat_history(chat_history: list) -> str:
+    """
+    Formats (question, answer) pairs the same way ConversationalRetrievalChain does.
+    """
+    return "\n".join(f"Human: {question}\nAssistant: {answer}" for question, answer in chat_history)
+
+
+def history_hash(chat_history: list) -> str:
+    """
+    Returns a fingerprint of the (question, answer) pairs.
+    """
+    digest = hashlib.sha1()
+    for question, answer in chat_history:
+        digest.update(question.encode("utf-8") + b"\0" + answer.encode("utf-8") + b"\0")
+    return digest.hexdigest()
+
+
+class CondenseCache:
+    """
+    LRU cache of rephrased questions: (model, history hash, normalized question) -> standalone question.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            return None
+
+    def put(self, key: tuple, question: str) -> None:
+        with self.lock:
+            self.entries[key] = question
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+condense_cache = CondenseCache()
+
+
+def standalone_question(llm, question: str, chat_history: list, model_name: str) -> tuple:
+    """
+    Turns the user question into a standalone question for retrieval.
+
+    - No history or a self-contained question: used as is, no LLM call.
+    - Follow-up: rephrased by the LLM from the last CONDENSE_TURNS pairs,
+      the result is cached per model and history hash.
+
+    Arguments:
+        llm: Chat model.
+        question (str): User question.
+        chat_history (list[tuple[str, str]]): Previous (question, answer) pairs.
+        model_name (str): Name of the chat model, part of the cache key.
+
+    Returns:
+        tuple[str, str]: (standalone question, how it was obtained: "as is", "cache" or "llm").
+    """
+    if not chat_history or is_self_contained(question):
+        return question, "as is"
+
+    recent = chat_history[-CONDENSE_TURNS:]
+    key = (model_name, history_hash(recent), normalize_query(question))
+    cached = condense_cache.get(key)
+    if cached:
+        return cached, "cache"
+
+    chain = CONDENSE_QUESTION_PROMPT | llm | StrOutputParser()
+    condensed = chain.invoke({
+        "question": question,
+        "chat_history": format_chat_history(recent),
+    }).strip()
+    condense_cache.put(key, condensed)
+    return condensed, "llm"
@@ -0,0 +1,137 @@
+import math
+import time
+from collections import Counter
+from typing import Callable
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from functions.embeddings_provider import TOKEN_RE
+from tools.deadline import current_deadline
+
+
+# Rank fusion constant: the larger it is, the less the top ranks dominate
+RRF_K = 10
+
+# The re-ranker reads the text, so its rank weighs more than the vector rank
+RERANK_WEIGHT = 2.0
+
+# Metadata flag of results re-ranked only partly within the budget
+PARTIAL_KEY = "rerank_partial"
+
+
+# ---------------------------- RE-RANKER ----------------------------
+
+def lexical_scorer(query: str, docs: list, deadline: float = None) -> tuple:
+    """
+    Prepares a BM25 scorer of the query against the candidate documents.
+
+    IDF is computed over the candidate set only, so the scorer needs no corpus
+    statistics. Words of the heading path count twice: a match in
+    "Port Configuration Template for a Network Printer" is a strong signal.
+    Candidates are tokenized in vector order until the deadline, the
+    statistics cover the prepared ones.
+
+    Arguments:
+        query (str): Search query.
+        docs (list[Document]): Candidate documents.
+        deadline (float): time.perf_counter() value to stop preparing at.
+
+    Returns:
+        tuple[Callable[[int], float], int]: Score function of the i-th candidate
+        and the number of candidates prepared (the first ones).
+    """
+    terms = set(TOKEN_RE.findall(query.lower()))
+    tokenized = []
+    for doc in docs:
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+        headings = doc.metadata.get("headings", "")
+        tokenized.append(TOKEN_RE.findall(f"{doc.page_content} {headings} {headings}".lower()))
+    avg_len = sum(len(tokens) for tokens in tokenized) / max(len(tokenized), 1)
+    df = Counter(term for tokens in tokenized for term in terms & set(tokens))
+    idf = {term: math.log(1 + (len(tokenized) - df[term] + 0.5) / (df[term] + 0.5)) for term in terms}
+
+    def score(doc_index: int) -> float:
+        tokens = tokenized[doc_index]
+        tf = Counter(token for token in tokens if token in terms)
+        norm = 1.2 * (0.25 + 0.75 * len(tokens) / max(avg_len, 1))
+        return sum(idf[term] * tf[term] * 2.2 / (tf[term] + norm) for term in tf)
+
+    return score, len(tokenized)
+
+
+def rerank(query: str, docs: list, budget_ms: float = 20, scorer_factory=lexical_scorer) -> tuple:
+    """
+    Re-ranks candidates by fusing their vector rank with the re-ranker rank.
+
+    The time budget covers preparing the scorer (tokenizing) and scoring:
+    candidates are handled in vector order until it runs out, the ones left
+    unscored keep their vector rank only. The two rankings are combined with
+    weighted reciprocal rank fusion:
+    1 / (RRF_K + vector rank) + RERANK_WEIGHT / (RRF_K + re-ranker rank).
+
+    Arguments:
+        query (str): Search query.
+        docs (list[Document]): Candidates in vector-similarity order.
+        budget_ms (float): Time budget for re-ranking, in milliseconds.
+        scorer_factory (callable): scorer_factory(query, docs, deadline) -> (score(i) function, prepared count).
+
+    Returns:
+        tuple[list[Document], bool]: Candidates in the new order and whether
+        all of them were scored within the budget.
+    """
+    deadline = time.perf_counter() + budget_ms / 1000
+    score, prepared = scorer_factory(query, docs, deadline)
+    scores = {}
+    for i in range(prepared):
+        if time.perf_counter() > deadline:
+            break
+        scores[i] = score(i)
+
+    rerank_order = sorted(scores, key=lambda i: -scores[i])
+    rerank_rank = {i: rank for rank, i in enumerate(rerank_order)}
+    fused = {
+        i: 1 / (RRF_K + i) + RERANK_WEIGHT / (RRF_K + rerank_rank.get(i, len(docs)))
+        for i in range(len(docs))
+    }
+    return [docs[i] for i in sorted(fused, key=lambda i: -fused[i])], len(scores) == len(docs)
+
+
+# ---------------------------- RETRIEVER ----------------------------
+
+class RerankingRetriever(BaseRetriever):
+    """
+    Two-stage retriever: fetches fetch_k candidates from the vectorstore,
+    re-ranks them on the CPU within budget_ms and returns the top k.
+
+    search_kwargs mirrors VectorStoreRetriever: {"k": 2, "fetch_k": 20}.
+    If the budget runs out before all candidates are scored, the returned
+    documents carry metadata[PARTIAL_KEY] = True (not cached by RetrievalCache).
+    """
+
+    vectorstore: VectorStore
+    search_kwargs: dict = {"k": 2, "fetch_k": 20}
+    budget_ms: float = 20
+    scorer_factory: Callable = lexical_scorer
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        k = self.search_kwargs.get("k", 2)
+        fetch_k = self.search_kwargs.get("fetch_k", 20)
+        candidates = self.vectorstore.similarity_search(query, k=fetch_k)
+        # Inside a tool deadline the vector results are the partial answer if re-ranking does not finish
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.report("Documents before re-ranking:\n\n" + "\n\n".join(doc.page_content for doc in candidates[:k]))
+        ranked, complete = rerank(query, candidates, budget_ms=self.budget_ms, scorer_factory=self.scorer_factory)
+        if complete:
+            return ranked[:k]
+        # Cut short by the budget: marked on copies, the docstore documents are shared
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, PARTIAL_KEY: True})
+            for doc in ranked[:k]
+        ]
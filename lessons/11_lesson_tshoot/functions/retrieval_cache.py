@@ -0,0 +1,90 @@
+import re
+import threading
+from collections import OrderedDict
+
+from functions.index_versions import index_versions
+
+
+# ---------------------------- CACHE ----------------------------
+
+def normalize_query(query: str) -> str:
+    """
+    Brings equivalent queries to one form: "  ASW1 IP? " -> "asw1 ip".
+    """
+    query = " ".join(query.lower().split())
+    return re.sub(r"^[\W_]+|[\W_]+$", "", query)
+
+
+class RetrievalCache:
+    """
+    LRU cache of retriever results shared by all sessions.
+
+    The key is (normalized query, retriever type, search kwargs such as k,
+    re-ranker budget, index version): a re-ranking retriever with another
+    budget may return other documents. Every index built by the indexing job
+    gets a new index_version, so after a rebuild old entries are never hit
+    again and simply age out of the LRU.
+    Results the re-ranker cut short by its time budget are not cached.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, retriever, query: str) -> tuple:
+        vectorstore = retriever.vectorstore
+        version = getattr(vectorstore, "index_version", None)
+        if version is None:
+            # A store built outside the indexing job gets a version on first use
+            # (id() is reused by a new store once the old one is garbage collected)
+            version = vectorstore.index_version = next(index_versions)
+        search_kwargs = tuple(sorted(retriever.search_kwargs.items()))
+        budget_ms = getattr(retriever, "budget_ms", None)
+        return normalize_query(query), type(retriever).__name__, search_kwargs, budget_ms, version
+
+    def invoke(self, retriever, query: str) -> list:
+        """
+        Returns cached documents for the query or runs the retriever and caches the result.
+
+        Arguments:
+            retriever: LangChain vectorstore retriever.
+            query (str): Search query.
+
+        Returns:
+            list[Document]: Found documents.
+        """
+        key = self.key(retriever, query)
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        docs = retriever.invoke(query)
+        # Re-ranking cut short by its time budget: served once, not to later identical queries
+        if any(doc.metadata.get("rerank_partial") for doc in docs):
+            return docs
+
+        with self.lock:
+            self.entries[key] = docs
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return docs
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "size": len(self.entries),
+            }
+
+
+retrieval_cache = RetrievalCache()
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+# ---------------------------- CACHE ----------------------------
+
+class SemanticCache:
+    """
+    Cache of answers to previously asked questions, looked up by meaning.
+
+    A question is embedded and compared (cosine similarity) with the
+    questions already answered in the same scope; if the best match is above
+    the threshold, its stored answer and sources are returned without
+    running retrieval and generation.
+
+    The scope is (index version, model name): a rebuilt index or another
+    model never serves answers produced for the old one. Scopes are evicted
+    in LRU order, questions inside a scope are limited by max_entries.
+    """
+
+    def __init__(self, threshold: float = 0.95, max_entries: int = 1000, max_scopes: int = 16):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        self.scopes = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def embed(embeddings, question: str) -> np.ndarray:
+        """
+        Embeds the question with the index embeddings and L2-normalizes the vector.
+        """
+        vector = np.asarray(embeddings.embed_query(question), dtype="float32")
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def lookup(self, vector: np.ndarray, scope: tuple, threshold: float = None):
+        """
+        Finds a stored answer to a question with the same meaning.
+
+        Arguments:
+            vector (np.ndarray): Question vector from embed().
+            scope (tuple): (index version, model name).
+            threshold (float): Minimum cosine similarity (self.threshold by default).
+
+        Returns:
+            dict | None: {"question", "answer", "sources", "similarity"} or None.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        with self.lock:
+            cached = self.scopes.get(scope)
+            if cached and cached["entries"]:
+                self.scopes.move_to_end(scope)
+                entries = cached["entries"]
+                if cached["matrix"] is None:
+                    cached["matrix"] = np.stack([entry["vector"] for entry in entries])
+                similarities = cached["matrix"] @ vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= threshold:
+                    self.hits += 1
+                    entry = entries[best]
+                    return {
+                        "question": entry["question"],
+                        "answer": entry["answer"],
+                        "sources": entry["sources"],
+                        "similarity": float(similarities[best]),
+                    }
+            self.misses += 1
+            return None
+
+    def store(self, vector: np.ndarray, question: str, scope: tuple, answer: str, sources: list) -> None:
+        """
+        Saves the answer and its source documents for the standalone question.
+        """
+        with self.lock:
+            cached = self.scopes.setdefault(scope, {"entries": [], "matrix": None})
+            self.scopes.move_to_end(scope)
+            entries = cached["entries"]
+            entries.append({
+                "question": question,
+                "vector": vector,
+                "answer": answer,
+                "sources": sources,
+            })
+            del entries[:-self.max_entries]
+            cached["matrix"] = None
+            while len(self.scopes) > self.max_scopes:
+                self.scopes.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": sum(len(cached["entries"]) for cached in self.scopes.values()),
+            }
+
+
+semantic_cache = SemanticCache()
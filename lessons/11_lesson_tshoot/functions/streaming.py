@@ -0,0 +1,128 @@
+import json
+import re
+
+import streamlit as st
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+# Structured chat agents answer with {"action": "Final Answer", "action_input": "..."}
+FINAL_ANSWER_RE = re.compile(r'"action"\s*:\s*"Final Answer"\s*,\s*"action_input"\s*:\s*"')
+
+# Long tool observations are cut in the status panel, the agent still gets them in full
+MAX_OBSERVATION_CHARS = 300
+
+
+# ---------------------------- HELPERS ----------------------------
+
+def partial_json_string(text: str) -> str:
+    """
+    Decodes the beginning of a JSON string literal that is still being generated.
+
+    Arguments:
+        text (str): Characters after the opening quote, possibly cut in the middle.
+
+    Returns:
+        str: Decoded text up to the closing quote or up to the last complete character.
+    """
+    escape_start = None
+    for end, char in enumerate(text):
+        if escape_start is not None:
+            # "\u" is followed by 4 hex digits, other escapes by one character
+            if text[escape_start + 1] != "u" or end - escape_start == 5:
+                escape_start = None
+        elif char == "\\":
+            escape_start = end
+        elif char == '"':
+            text = text[:end]
+            break
+    else:
+        # Drop an unfinished escape sequence at the end: "\" or "\u00"
+        if escape_start is not None:
+            text = text[:escape_start]
+    try:
+        return json.loads(f'"{text}"')
+    except ValueError:
+        return ""
+
+
+def final_answer(text: str) -> str:
+    """
+    Extracts the final answer being streamed by a structured chat agent, "" if there is none yet.
+    """
+    match = FINAL_ANSWER_RE.search(text)
+    if not match:
+        return ""
+    return partial_json_string(text[match.end():])
+
+
+# ---------------------------- CALLBACKS ----------------------------
+
+class StreamlitChatHandler(BaseCallbackHandler):
+    """
+    Streams an answer into the current st.chat_message("assistant") while it is generated.
+
+    - LLM tokens are written into a placeholder as they arrive, so the user
+      sees the first words after the first token instead of the full run.
+    - Agent tool calls and their results are shown in a collapsed st.status panel.
+    - With final_answer_only=True (structured chat agents) only the
+      "Final Answer" text is streamed, not the JSON blobs of the tool calls.
+
+    Every LLM call starts a new text, so intermediate thoughts are replaced
+    by the final answer.
+    """
+
+    def __init__(self, final_answer_only: bool = False, show_tools: bool = False):
+        self.final_answer_only = final_answer_only
+        self.status = st.status("Working...", expanded=False) if show_tools else None
+        self.placeholder = st.empty()
+        self.text = ""
+
+    # ------------------------- LLM -------------------------
+
+    def on_llm_start(self, serialized, prompts, **kwargs) -> None:
+        self.text = ""
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        self.text = ""
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self.text += token
+        shown = final_answer(self.text) if self.final_answer_only else self.text
+        if shown:
+            self.placeholder.markdown(shown + "▌")
+
+    # ------------------------- TOOLS -------------------------
+
+    def on_agent_action(self, action, **kwargs) -> None:
+        if self.status is not None:
+            self.status.update(label=f"Calling {action.tool}...")
+            self.status.write(f"🔧 {action.tool}: {action.tool_input}")
+
+    def on_tool_end(self, output, **kwargs) -> None:
+        if self.status is not None:
+            output = str(output)
+            if len(output) > MAX_OBSERVATION_CHARS:
+                output = output[:MAX_OBSERVATION_CHARS] + "..."
+            self.status.write(f"↳ {output}")
+
+    def on_tool_error(self, error, **kwargs) -> None:
+        if self.status is not None:
+            self.status.write(f"⚠️ {error}")
+
+    # ------------------------- RESULT -------------------------
+
+    def finish(self, answer: str) -> None:
+        """
+        Replaces the streamed text with the final answer and closes the status panel.
+        """
+        self.placeholder.write(answer)
+        if self.status is not None:
+            self.status.update(label="Done", state="complete")
+
+    def fail(self, message: str) -> None:
+        """
+        Replaces the partial answer with the error message and marks the status panel as failed.
+        """
+        self.placeholder.write(message)
+        if self.status is not None:
+            self.status.update(label="Failed", state="error")
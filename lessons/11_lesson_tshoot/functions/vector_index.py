@@ -0,0 +1,505 @@
+import os
+import tempfile
+import time
+import weakref
+
+import faiss
+import numpy as np
+
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+
+# Supported FAISS index types:
+# - flat:     exact search, every query scans all vectors
+# - ivf_flat: vectors are split into nlist clusters, only nprobe clusters are scanned
+# - ivf_pq:   like ivf_flat, but vectors are compressed with product quantization
+# - hnsw:     graph-based search, no training required
+# - fp16:     exact scan over float16 vectors (2x smaller)
+# - sq8:      exact scan over int8 scalar-quantized vectors (4x smaller)
+# - pq:       exact scan over product-quantized codes (pq_m bytes per vector)
+INDEX_TYPES = ["flat", "ivf_flat", "ivf_pq", "hnsw", "fp16", "sq8", "pq"]
+
+# Index types that must be trained on a sample before vectors are added
+TRAINED_INDEX_TYPES = ["ivf_flat", "ivf_pq", "sq8", "pq"]
+
+# Index types that store lossy vector codes instead of float32 vectors
+COMPRESSED_INDEX_TYPES = ["ivf_pq", "fp16", "sq8", "pq"]
+
+# Minimum number of training points per IVF cluster (FAISS warns below this)
+MIN_POINTS_PER_CENTROID = 39
+
+
+# ---------------------------- INDEX ----------------------------
+
+def create_index(
+    index_type: str,
+    dim: int,
+    n_vectors: int,
+    nlist: int = 1024,
+    pq_m: int = 64,
+    pq_nbits: int = 8,
+    hnsw_m: int = 32,
+) -> faiss.Index:
+    """
+    Creates an empty FAISS index of the requested type.
+
+    The number of IVF clusters and PQ code size are reduced automatically
+    when the corpus is too small to train them.
+
+    Arguments:
+        index_type (str): One of INDEX_TYPES.
+        dim (int): Vector dimension (1536 for OpenAI text-embedding-ada-002).
+        n_vectors (int): Expected number of vectors (used to clamp nlist).
+        nlist (int): Number of IVF clusters.
+        pq_m (int): Number of PQ sub-quantizers (must divide dim).
+        pq_nbits (int): Bits per PQ sub-quantizer code.
+        hnsw_m (int): Number of neighbors per HNSW graph node.
+
+    Returns:
+        faiss.Index: Untrained (see TRAINED_INDEX_TYPES) or ready-to-use index.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {index_type}. Use one of {INDEX_TYPES}.")
+
+    if index_type == "flat":
+        return faiss.IndexFlatL2(dim)
+
+    if index_type == "hnsw":
+        return faiss.IndexHNSWFlat(dim, hnsw_m)
+
+    if index_type == "fp16":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16)
+
+    if index_type == "sq8":
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+
+    # pq and ivf_pq: dim must be divisible by pq_m, and 2**nbits codes need enough training points
+    if index_type in ("pq", "ivf_pq"):
+        while dim % pq_m:
+            pq_m -= 1
+        while pq_nbits > 1 and 2 ** pq_nbits > n_vectors:
+            pq_nbits -= 1
+
+    if index_type == "pq":
+        return faiss.IndexPQ(dim, pq_m, pq_nbits)
+
+    nlist = max(1, min(nlist, n_vectors // MIN_POINTS_PER_CENTROID))
+    quantizer = faiss.IndexFlatL2(dim)
+
+    if index_type == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist)
+
+    return faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_nbits)
+
+
+def set_search_params(index: faiss.Index, nprobe: int = 16, ef_search: int = 64) -> None:
+    """
+    Sets query-time parameters that trade recall for latency.
+
+    Arguments:
+        index (faiss.Index): Index created by create_index().
+        nprobe (int): Number of IVF clusters scanned per query.
+        ef_search (int): Size of the HNSW candidate list per query.
+    """
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(nprobe, index.nlist)
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+
+
+def train_index(index: faiss.Index, sample: np.ndarray) -> None:
+    """
+    Trains the index on a sample of vectors (no-op for flat and HNSW indexes).
+
+    Arguments:
+        index (faiss.Index): Index created by create_index().
+        sample (np.ndarray): float32 matrix of shape (n, dim).
+    """
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(sample, dtype="float32"))
+
+
+def index_size_bytes(index: faiss.Index) -> int:
+    """
+    Returns the size of the serialized index, i.e. how much RAM it occupies.
+    """
+    return faiss.serialize_index(index).nbytes
+
+
+# --------------------------- RERANK ---------------------------
+
+class RerankedIndex:
+    """
+    Wraps a compressed FAISS index and re-ranks its results exactly.
+
+    The compressed index (fp16, sq8, pq, ivf_pq) stays in RAM, while the
+    original float32 vectors are appended to a file on disk and read back
+    through a memmap only for the top candidates of each query:
+    search() takes k * k_factor candidates from the compressed index
+    and returns the k nearest of them by exact L2 distance.
+
+    Implements the part of the faiss.Index interface used by LangChain's FAISS
+    for search, but it is not a faiss.Index: FAISS.save_local() and
+    faiss.write_index() fail on a vectorstore built with rerank=True.
+    Save such an index by writing self.index (the compressed index) and
+    keeping the vectors file.
+
+    Without a path, the vectors go to a temporary file that lives as long
+    as the index; a file passed in by the caller is never deleted.
+    """
+
+    def __init__(self, index: faiss.Index, k_factor: int = 4, path: str = None):
+        self.index = index
+        self.k_factor = k_factor
+        self.d = index.d
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="vectors-", suffix=".f32")
+            os.close(fd)
+            weakref.finalize(self, os.remove, path)
+        self.path = path
+        self.vectors = None
+
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    @property
+    def is_trained(self) -> bool:
+        return self.index.is_trained
+
+    def train(self, vectors: np.ndarray) -> None:
+        self.index.train(vectors)
+
+    def add(self, vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        with open(self.path, "ab") as f:
+            f.write(vectors.tobytes())
+        self.index.add(vectors)
+        self.vectors = None
+
+    def memmap(self) -> np.ndarray:
+        if self.vectors is None:
+            self.vectors = np.memmap(self.path, dtype="float32", mode="r", shape=(self.ntotal, self.d))
+        return self.vectors
+
+    def reconstruct(self, i: int) -> np.ndarray:
+        return np.array(self.memmap()[i])
+
+    def search(self, queries: np.ndarray, k: int) -> tuple:
+        queries = np.ascontiguousarray(queries, dtype="float32")
+        _, candidates = self.index.search(queries, k * self.k_factor)
+        vectors = self.memmap()
+
+        distances = np.full((len(queries), k), np.inf, dtype="float32")
+        ids = np.full((len(queries), k), -1, dtype="int64")
+        for row, (query, found) in enumerate(zip(queries, candidates)):
+            found = np.sort(found[found >= 0])
+            if not len(found):
+                continue
+            exact = ((vectors[found] - query) ** 2).sum(axis=1)
+            best = np.argsort(exact)[:k]
+            distances[row, :len(best)] = exact[best]
+            ids[row, :len(best)] = found[best]
+        return distances, ids
+
+
+# ------------------------- VECTORSTORE -------------------------
+
+def new_vectorstore(
+    embeddings,
+    index_type: str,
+    sample: np.ndarray,
+    n_vectors: int,
+    nprobe: int = 16,
+    ef_search: int = 64,
+    rerank: bool = False,
+    **index_params,
+) -> FAISS:
+    """
+    Creates an empty FAISS vectorstore with an index trained on the sample.
+
+    Arguments:
+        embeddings: LangChain embeddings object.
+        index_type (str): One of INDEX_TYPES.
+        sample (np.ndarray): Training vectors (at least one, to learn the dimension).
+        n_vectors (int): Expected number of vectors.
+        nprobe (int): IVF clusters scanned per query.
+        ef_search (int): HNSW candidate list size per query.
+        rerank (bool): Re-rank results exactly from float32 vectors on disk
+            (the vectorstore cannot be saved with save_local(), see RerankedIndex).
+        **index_params: Extra arguments for create_index().
+
+    Returns:
+        FAISS: Empty vectorstore.
+    """
+    index = create_index(index_type, sample.shape[1], n_vectors, **index_params)
+    train_index(index, sample)
+    set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+    if rerank:
+        index = RerankedIndex(index)
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+    )
+
+
+def build_vectorstore(
+    splits,
+    embeddings,
+    index_type: str = "flat",
+    train_size: int = 50_000,
+    batch_size: int = 1000,
+    nprobe: int = 16,
+    ef_search: int = 64,
+    seed: int = 42,
+    rerank: bool = False,
+    progress=None,
+    **index_params,
+) -> FAISS:
+    """
+    Builds a LangChain FAISS vectorstore on top of a configurable FAISS index.
+
+    Unlike FAISS.from_documents(), the full float32 matrix is never held in memory:
+    the index is trained on a random sample of chunks, the sample vectors are
+    added to the index, and then the other chunks are embedded and added in batches.
+
+    Arguments:
+        splits (list[Document]): Chunks to index.
+        embeddings: LangChain embeddings object (for example, OpenAIEmbeddings()).
+        index_type (str): One of INDEX_TYPES.
+        train_size (int): Number of chunks used to train IVF and quantized indexes.
+        batch_size (int): Number of chunks embedded and added at a time.
+        nprobe (int): IVF clusters scanned per query.
+        ef_search (int): HNSW candidate list size per query.
+        seed (int): Random seed for sampling training chunks.
+        rerank (bool): Re-rank results exactly from float32 vectors on disk.
+        progress (callable): progress(stage, done, total) callback.
+        **index_params: Extra arguments for create_index() (nlist, pq_m, ...).
+
+    Returns:
+        FAISS: Vectorstore ready for as_retriever().
+    """
+    if not splits:
+        raise ValueError("No documents to index.")
+
+    texts = [doc.page_content for doc in splits]
+    metadatas = [doc.metadata for doc in splits]
+
+    # Untrained index types need only one vector to learn the dimension
+    needs_training = index_type in TRAINED_INDEX_TYPES
+    sample_size = min(train_size, len(texts)) if needs_training else 1
+
+    rng = np.random.default_rng(seed)
+    sample_ids = rng.choice(len(texts), size=sample_size, replace=False)
+    sample = np.array(
+        embeddings.embed_documents([texts[i] for i in sample_ids]), dtype="float32"
+    )
+
+    vectorstore = new_vectorstore(
+        embeddings,
+        index_type,
+        sample,
+        len(texts),
+        nprobe=nprobe,
+        ef_search=ef_search,
+        rerank=rerank,
+        **index_params,
+    )
+    # The training sample is already embedded: it is added as is and not embedded again
+    sampled = set(sample_ids.tolist())
+    for start in range(0, sample_size, batch_size):
+        batch_ids = sample_ids[start:start + batch_size]
+        vectorstore.add_embeddings(
+            text_embeddings=list(zip([texts[i] for i in batch_ids], sample[start:start + batch_size])),
+            metadatas=[metadatas[i] for i in batch_ids],
+        )
+    if progress:
+        progress("embedding", sample_size, len(texts))
+
+    rest = [i for i in range(len(texts)) if i not in sampled]
+    for start in range(0, len(rest), batch_size):
+        batch_ids = rest[start:start + batch_size]
+        batch_texts = [texts[i] for i in batch_ids]
+        batch_vectors = embeddings.embed_documents(batch_texts)
+        vectorstore.add_embeddings(
+            text_embeddings=list(zip(batch_texts, batch_vectors)),
+            metadatas=[metadatas[i] for i in batch_ids],
+        )
+        if progress:
+            progress("embedding", sample_size + min(start + batch_size, len(rest)), len(texts))
+    return vectorstore
+
+
+def build_vectorstore_from_batches(
+    batches,
+    embeddings,
+    index_type: str = "flat",
+    train_size: int = 50_000,
+    nprobe: int = 16,
+    ef_search: int = 64,
+    rerank: bool = False,
+    **index_params,
+) -> FAISS:
+    """
+    Builds a FAISS vectorstore from a stream of chunk batches.
+
+    Each batch is embedded as soon as it arrives, so embedding overlaps with
+    loading and splitting of the following batches. Trained index types learn
+    on the first train_size chunks of the stream; until then, the embedded
+    batches are buffered.
+
+    Arguments:
+        batches (Iterable[list[Document]]): Stream of chunk batches.
+        embeddings: LangChain embeddings object.
+        index_type (str): One of INDEX_TYPES.
+        train_size (int): Number of chunks used to train IVF and quantized indexes.
+        nprobe (int): IVF clusters scanned per query.
+        ef_search (int): HNSW candidate list size per query.
+        rerank (bool): Re-rank results exactly from float32 vectors on disk.
+        **index_params: Extra arguments for create_index() (nlist, pq_m, ...).
+
+    Returns:
+        FAISS: Vectorstore ready for as_retriever().
+    """
+    needs_training = index_type in TRAINED_INDEX_TYPES
+    vectorstore = None
+    buffered = []
+
+    def add(store, batch, vectors):
+        store.add_embeddings(
+            text_embeddings=list(zip([doc.page_content for doc in batch], vectors)),
+            metadatas=[doc.metadata for doc in batch],
+        )
+
+    def create_store():
+        sample = np.concatenate([vectors for _, vectors in buffered])
+        store = new_vectorstore(
+            embeddings,
+            index_type,
+            sample,
+            len(sample),
+            nprobe=nprobe,
+            ef_search=ef_search,
+            rerank=rerank,
+            **index_params,
+        )
+        for batch, vectors in buffered:
+            add(store, batch, vectors)
+        buffered.clear()
+        return store
+
+    for batch in batches:
+        if not batch:
+            continue
+        vectors = np.array(
+            embeddings.embed_documents([doc.page_content for doc in batch]), dtype="float32"
+        )
+        if vectorstore is not None:
+            add(vectorstore, batch, vectors)
+            continue
+        buffered.append((batch, vectors))
+        if not needs_training or sum(len(b) for b, _ in buffered) >= train_size:
+            vectorstore = create_store()
+
+    if vectorstore is None:
+        if not buffered:
+            raise ValueError("No documents to index.")
+        vectorstore = create_store()
+    return vectorstore
+
+
+# --------------------------- REPORT ---------------------------
+
+def recall_latency_report(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    index_types: list = None,
+    nprobe_values: tuple = (1, 4, 16, 64),
+    ef_search_values: tuple = (16, 64, 256),
+    rerank_factor: int = 4,
+    train_size: int = 50_000,
+    **index_params,
+) -> list:
+    """
+    Compares approximate indexes against the exact flat index.
+
+    For every index type and search parameter, measures recall@k
+    (share of the exact top-k neighbors that were found), mean query latency
+    and index size in RAM. Compressed indexes are measured twice:
+    as is and with exact re-ranking of k * rerank_factor candidates.
+
+    Arguments:
+        vectors (np.ndarray): Corpus vectors, float32 matrix (n, dim).
+        queries (np.ndarray): Query vectors, float32 matrix (q, dim).
+        k (int): Number of neighbors per query.
+        index_types (list): Index types to test (all by default).
+        nprobe_values (tuple): nprobe values to test for IVF indexes.
+        ef_search_values (tuple): efSearch values to test for HNSW.
+        rerank_factor (int): Candidates per result for exact re-ranking.
+        train_size (int): Number of vectors used to train indexes.
+        **index_params: Extra arguments for create_index().
+
+    Returns:
+        list[dict]: One row per (index type, parameter) combination.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    n, dim = vectors.shape
+
+    flat = faiss.IndexFlatL2(dim)
+    flat.add(vectors)
+    start = time.perf_counter()
+    _, exact_ids = flat.search(queries, k)
+    flat_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    rows = [{
+        "index": "flat",
+        "param": "-",
+        "recall": 1.0,
+        "latency_ms": round(flat_ms, 3),
+        "size_mb": round(index_size_bytes(flat) / 2**20, 2),
+    }]
+
+    for index_type in index_types or INDEX_TYPES[1:]:
+        index = create_index(index_type, dim, n, **index_params)
+        train_index(index, vectors[:train_size])
+        # Compressed indexes are also measured with exact re-ranking from disk
+        reranked = RerankedIndex(index, k_factor=rerank_factor) if index_type in COMPRESSED_INDEX_TYPES else None
+        (reranked or index).add(vectors)
+        size_mb = round(index_size_bytes(index) / 2**20, 2)
+
+        if isinstance(index, faiss.IndexHNSW):
+            params = [("efSearch", {"ef_search": value}) for value in ef_search_values]
+        elif isinstance(index, faiss.IndexIVF):
+            params = [("nprobe", {"nprobe": value}) for value in nprobe_values]
+        else:
+            params = [("", {})]
+
+        for name, search_params in params:
+            set_search_params(index, **search_params)
+            label = f"{name}={list(search_params.values())[0]}" if search_params else "-"
+            searchers = [(label, index)]
+            if reranked is not None:
+                searchers.append((f"{label} +rerank", reranked))
+
+            for param, searcher in searchers:
+                start = time.perf_counter()
+                _, found_ids = searcher.search(queries, k)
+                latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+                hits = sum(
+                    len(set(found) & set(exact))
+                    for found, exact in zip(found_ids, exact_ids)
+                )
+                rows.append({
+                    "index": index_type,
+                    "param": param,
+                    "recall": round(hits / exact_ids.size, 3),
+                    "latency_ms": round(latency_ms, 3),
+                    "size_mb": size_mb,
+                })
+    return rows
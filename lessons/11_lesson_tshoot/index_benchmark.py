@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+"""
+Recall vs latency and memory of approximate and compressed FAISS indexes
+compared to the exact flat index.
+
+Usage:
+    python index_benchmark.py                  # synthetic vectors, no API calls
+    python index_benchmark.py --docs ./docs    # real chunks embedded via OpenAI
+    python index_benchmark.py --docs ./docs --embeddings hashing   # offline
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from functions.vector_index import recall_latency_report
+
+
+def load_doc_vectors(docs_path: str, provider: str = None) -> np.ndarray:
+    """
+    Embeds the chunks of ./docs the same way the chat scenarios do.
+    """
+    from langchain_community.document_loaders import DirectoryLoader, TextLoader
+
+    from functions.embeddings_provider import get_embeddings
+    from functions.md_splitter import split_markdown
+
+    documents = DirectoryLoader(docs_path, loader_cls=TextLoader).load()
+    splits = split_markdown(documents, chunk_size=500)
+    start = time.perf_counter()
+    vectors = get_embeddings(provider).embed_documents([doc.page_content for doc in splits])
+    elapsed = time.perf_counter() - start
+    print(f"==> embedded {len(splits)} chunks in {elapsed:.2f}s ({len(splits) / elapsed:.0f} chunks/s)")
+    return np.array(vectors, dtype="float32")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", help="Directory with documents to embed")
+    parser.add_argument("--embeddings", help="Embeddings provider: openai or hashing")
+    parser.add_argument("--n", type=int, default=100_000, help="Synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=1536, help="Synthetic vector dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Neighbors per query")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    if args.docs:
+        vectors = load_doc_vectors(args.docs, args.embeddings)
+    else:
+        # Clustered vectors resemble real embeddings better than uniform noise
+        centers = rng.standard_normal((256, args.dim)).astype("float32")
+        labels = rng.integers(0, len(centers), args.n)
+        vectors = centers[labels] + 0.3 * rng.standard_normal((args.n, args.dim)).astype("float32")
+
+    query_ids = rng.choice(len(vectors), size=min(args.queries, len(vectors)), replace=False)
+    queries = vectors[query_ids] + 0.05 * rng.standard_normal((len(query_ids), vectors.shape[1])).astype("float32")
+
+    print(f"==> corpus: {vectors.shape[0]} vectors x {vectors.shape[1]} dims, k={args.k}\n")
+    print(f"{'index':<10} {'param':<22} {'recall':>8} {'latency, ms':>12} {'size, MB':>10}")
+    for row in recall_latency_report(vectors, queries, k=args.k):
+        print(
+            f"{row['index']:<10} {row['param']:<22} {row['recall']:>8} "
+            f"{row['latency_ms']:>12} {row['size_mb']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
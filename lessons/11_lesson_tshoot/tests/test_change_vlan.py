@@ -0,0 +1,73 @@
+import pytest
+
+from tools import transport
+from tools.change_vlan import change_vlan, change_vlans
+from tools.device_state import store
+from tools.show_vlan_port import show_vlan_port
+
+ASW1 = "192.168.1.10"
+
+
+@pytest.fixture
+def asw1():
+    """
+    The asw1 device of the shared store, restored after the test.
+    """
+    device = store.get(ASW1)
+    before = dict(device.snapshot())
+    yield device
+    store.set_vlans(device, before)
+    # The restore bypasses the CLI: cached show output of the device must not survive it
+    transport.pool.bump_config_version(ASW1)
+
+
+def test_change_vlans_applies_all_changes_in_one_commit(asw1):
+    result = change_vlans(ASW1, {"Gi0/1": 40, "Gi0/2": 40})
+
+    assert result.startswith("VLANs on device asw1 (192.168.1.10) changed in one commit:")
+    assert " - Port Gi0/1: VLAN 10 → VLAN 40" in result
+    assert asw1.vlan("Gi0/1") == asw1.vlan("Gi0/2") == 40
+    assert not asw1.config_lock.locked()
+    # The config version bump invalidates the cached show output
+    assert show_vlan_port(ASW1, "Gi0/1") == "Port Gi0/1 on device 192.168.1.10 is configured in VLAN 40."
+
+
+@pytest.mark.parametrize("changes, error", [
+    ({"Gi0/1": 40, "Gi0/99": 40}, " - Port Gi0/99: not found"),
+    ({"Gi0/1": 40, "Gi0/2": 999}, " - Port Gi0/2: VLAN 999 is not configured"),
+])
+def test_change_vlans_changes_nothing_if_any_change_is_invalid(asw1, changes, error):
+    result = change_vlans(ASW1, changes)
+
+    assert result.splitlines() == ["No changes made on device asw1 (192.168.1.10):", error]
+    assert asw1.vlan("Gi0/1") == 10 and asw1.vlan("Gi0/2") == 10
+    assert not asw1.config_lock.locked()
+
+
+def test_change_vlans_while_another_session_configures(asw1):
+    with asw1.config_lock:
+        result = change_vlans(ASW1, {"Gi0/1": 40})
+
+    assert result == "No changes made on device asw1 (192.168.1.10): % Configuration is locked by another session."
+    assert asw1.vlan("Gi0/1") == 10
+
+
+def test_change_vlans_on_read_only_device():
+    result = change_vlans("10.0.0.1", {"Gi0/1": 1})
+
+    assert result == "No changes made on device 10.0.0.1 (10.0.0.1): % Configuration is locked on this device."
+
+
+def test_change_vlans_unknown_device_and_invalid_ip():
+    assert change_vlans("10.9.9.9", {"Gi0/1": 10}) == "Device with IP 10.9.9.9 not found."
+    with pytest.raises(ValueError):
+        change_vlans("asw1", {"Gi0/1": 10})
+
+
+def test_change_vlan(asw1):
+    assert change_vlan(ASW1, "Gi0/3", 50) == (
+        "VLAN on port Gi0/3 of device asw1 (192.168.1.10) successfully changed to VLAN 50."
+    )
+    assert change_vlan(ASW1, "Gi0/3", 77) == "VLAN 77 is not configured on device asw1 (192.168.1.10)."
+    assert change_vlan(ASW1, "Gi9/9", 50) == "Port Gi9/9 not found on device asw1 (192.168.1.10)."
+    assert asw1.vlan("Gi0/3") == 50
@@ -0,0 +1,97 @@
+from tools import transport
+from tools.cli_parsers import TextTemplate, parse_interfaces_status, parse_vlan_brief
+from tools.port_table import PortTable
+from tools.show_cache import ShowCache
+
+INTERFACES_STATUS = """
+Port      Name               Status       Vlan       Duplex  Speed Type
+Gi1/0/1   uplink to core     connected    trunk      a-full a-1000 10/100/1000BaseTX
+Gi1/0/2                      notconnect   10           auto   auto 10/100/1000BaseTX
+Gi1/0/3   printer 2nd floor  connected    30         a-full  a-100 10/100/1000BaseTX
+Te1/1/1                      connected    routed       full    10G SFP-10GBase-SR
+"""
+
+VLAN_BRIEF = """
+VLAN Name                             Status    Ports
+---- -------------------------------- --------- -------------------------------
+1    default                          active    Gi1/0/5, Gi1/0/6
+10   USERS                            active    Gi1/0/2, Gi1/0/7, Gi1/0/8, Gi1/0/9
+                                                Gi1/0/10, Gi1/0/11
+30   PRINTERS                         active    Gi1/0/3
+99   UNUSED                           active
+"""
+
+
+def test_parse_interfaces_status():
+    rows = parse_interfaces_status(INTERFACES_STATUS)
+
+    assert [(row["port"], row["name"], row["status"], row["vlan"]) for row in rows] == [
+        ("Gi1/0/1", "uplink to core", "connected", "trunk"),
+        ("Gi1/0/2", "", "notconnect", 10),
+        ("Gi1/0/3", "printer 2nd floor", "connected", 30),
+        ("Te1/1/1", "", "connected", "routed"),
+    ]
+    assert rows[0]["speed"] == "a-1000" and rows[3]["type"] == "SFP-10GBase-SR"
+
+
+def test_parse_vlan_brief_joins_continuation_lines():
+    rows = parse_vlan_brief(VLAN_BRIEF)
+
+    assert [(row["vlan"], row["name"]) for row in rows] == [(1, "default"), (10, "USERS"), (30, "PRINTERS"), (99, "UNUSED")]
+    assert rows[1]["ports"] == ["Gi1/0/2", "Gi1/0/7", "Gi1/0/8", "Gi1/0/9", "Gi1/0/10", "Gi1/0/11"]
+    assert rows[3]["ports"] == []
+
+
+def test_template_filldown_and_required():
+    template = TextTemplate(r"""
+Value Filldown DEVICE (\S+)
+Value Required PORT (\S+)
+
+Start
+  ^device ${DEVICE}
+  ^port ${PORT} -> Record
+""")
+
+    rows = template.parse("device asw1\nport Gi0/1\nport Gi0/2\ndevice asw2\nport Gi0/1\n")
+
+    assert rows == [
+        {"DEVICE": "asw1", "PORT": "Gi0/1"},
+        {"DEVICE": "asw1", "PORT": "Gi0/2"},
+        {"DEVICE": "asw2", "PORT": "Gi0/1"},
+    ]
+
+
+def test_fake_switch_output_round_trips():
+    hostname, (status, brief) = transport.run_commands("192.168.1.11", ["show interfaces status", "show vlan brief"])
+
+    ports = parse_interfaces_status(status)
+    vlans = parse_vlan_brief(brief)
+    assert hostname == "asw2" and len(ports) == 24
+    assert {row["vlan"] for row in ports} == {1, 40}
+    # VLAN 1 is not configured on asw2: its ports are not listed in any VLAN
+    assert [row["vlan"] for row in vlans] == [10, 20, 30, 40, 50]
+    assert {row["vlan"]: len(row["ports"]) for row in vlans}[40] == 12
+
+
+def test_show_cache_is_keyed_by_config_version():
+    cache = ShowCache(ttl=60)
+    ip = "192.168.1.12"
+
+    hostname, rows = cache.show(ip, "show interfaces status")
+    assert cache.show(ip, "show interfaces status")[1] is rows
+    table = cache.view(ip, "show interfaces status", PortTable)
+    assert cache.view(ip, "show interfaces status", PortTable) is table
+    transport.pool.bump_config_version(ip)
+    assert cache.show(ip, "show interfaces status")[1] is not rows
+
+    assert hostname == "asw3"
+    assert cache.stats() == {"entries": 1, "hits": 3, "misses": 2}
+
+
+def test_show_cache_entries_expire():
+    cache = ShowCache(ttl=0)
+
+    cache.show("192.168.1.12", "show vlan brief")
+    cache.show("192.168.1.12", "show vlan brief")
+
+    assert cache.stats()["misses"] == 2
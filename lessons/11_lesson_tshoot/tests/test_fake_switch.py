@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from tools.device_state import SWITCHES, VLAN_STATE, DeviceStateStore
+from tools.fake_switch import FakeSwitchServer
+from tools.transport import TelnetConnection, UnknownDeviceError, changes_config
+
+ASW1 = "192.168.1.10"
+
+
+@pytest.fixture
+def server():
+    """
+    Fake switch server on a free port with its own device state.
+    """
+    server = FakeSwitchServer(store=DeviceStateStore(VLAN_STATE, SWITCHES), port=0)
+    server.start_in_thread()
+    return server
+
+
+def connect(server, ip: str = ASW1) -> TelnetConnection:
+    return TelnetConnection(ip, address=f"127.0.0.1:{server.port}", timeout=5)
+
+
+def test_show_and_configure_over_tcp(server):
+    conn = connect(server)
+    try:
+        assert conn.hostname == "asw1"
+        status, = conn.run(["show interfaces status"])
+        assert "Gi0/1 " in status
+        outputs = conn.run(["configure terminal", "interface Gi0/1", "switchport access vlan 40", "exit", "end"])
+        assert not any(output.startswith("%") for output in outputs)
+    finally:
+        conn.close()
+
+    assert server.store.get(ASW1).vlan("Gi0/1") == 40
+
+
+def test_configuration_is_exclusive(server):
+    first, second = connect(server), connect(server)
+    try:
+        assert not first.run(["configure terminal"])[0].startswith("%")
+        assert second.run(["configure terminal"]) == ["% Configuration is locked by another session."]
+        # Exec commands are still available to the other session
+        assert "Gi0/1" in second.run(["show vlan brief"])[0]
+    finally:
+        first.close()
+        second.close()
+
+
+def test_disconnect_in_config_mode_discards_changes_and_releases_lock(server):
+    conn = connect(server)
+    conn.run(["configure terminal", "interface Gi0/1", "switchport access vlan 40", "exit"])
+    conn.close()
+
+    # The server notices the disconnect asynchronously
+    device = server.store.get(ASW1)
+    stop = time.monotonic() + 5
+    while device.config_lock.locked() and time.monotonic() < stop:
+        time.sleep(0.01)
+
+    other = connect(server)
+    try:
+        assert not other.run(["configure terminal"])[0].startswith("%")
+        other.run(["end"])
+    finally:
+        other.close()
+    assert device.vlan("Gi0/1") == 10
+
+
+def test_unknown_device(server):
+    with pytest.raises(UnknownDeviceError):
+        connect(server, "10.9.9.9")
+
+
+@pytest.mark.parametrize("commands, expected", [
+    (["show vlan brief"], False),
+    (["configure terminal", "do show vlan brief", "end"], False),
+    (["configure terminal", "interface Gi0/1", "exit", "end"], True),
+])
+def test_changes_config(commands, expected):
+    assert changes_config(commands) is expected
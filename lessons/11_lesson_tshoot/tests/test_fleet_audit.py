@@ -0,0 +1,51 @@
+import pytest
+
+from tools.fleet_audit import fleet_query
+
+
+def test_ports_in_vlan_across_the_fleet():
+    result = fleet_query(vlan=99)
+
+    assert result["devices"] == 9
+    assert result["unreachable"] == ["wlc1"]
+    assert result["matches"] == 12
+    assert result["groups"] == {
+        "dsw1 (192.168.2.1)": [["Gi1/0/1-2", 99]],
+        "core1 (192.168.3.1)": [["Ten0/2-3", 99], ["Ten0/5-8", 99]],
+        "rtr-edge (10.0.0.1)": [["Gi0/1", 99], ["Gi0/3", 99], ["Gi0/5", 99], ["Gi0/7", 99]],
+    }
+    assert not result["truncated"]
+
+
+def test_ports_outside_allowed_vlans_on_selected_devices():
+    result = fleet_query(exclude_vlans=[10, 20], devices=["asw1", "dsw2", "nosuch"])
+
+    assert result["devices"] == 2
+    assert result["unknown"] == ["nosuch"]
+    assert result["groups"] == {
+        "asw1 (192.168.1.10)": [["Gi0/17-24", 30]],
+        "dsw2 (192.168.2.2)": [["Gi1/0/13-24", 30]],
+    }
+
+
+def test_unconfigured_vlans_grouped_by_vlan():
+    result = fleet_query(unconfigured_only=True, group_by="vlan")
+
+    assert result["groups"] == {
+        1: {"ports": 14, "devices": 2},
+        60: {"ports": 12, "devices": 1},
+        99: {"ports": 8, "devices": 2},
+    }
+
+
+def test_device_groups_are_limited():
+    result = fleet_query(vlan=99, limit=1)
+
+    assert list(result["groups"]) == ["dsw1 (192.168.2.1)"]
+    assert result["matches"] == 12
+    assert result["truncated"]
+
+
+def test_invalid_group_by():
+    with pytest.raises(ValueError):
+        fleet_query(group_by="port")
@@ -0,0 +1,51 @@
+import pytest
+
+from functions.intent_router import match_intent, normalize_port, route_intent
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("ping 10.0.0.1", ("ping", {"target": "10.0.0.1"})),
+    ("Is asw1 reachable?", ("ping", {"target": "asw1"})),
+    ("show vlans on asw1", ("show_vlan_ports_all", {"target": "asw1"})),
+    ("What is the VLAN of port Gi 0/5 on asw2?", ("show_vlan_port", {"port": "gi 0/5", "target": "asw2"})),
+    ("ip of core1", ("cmdb", {"target": "core1"})),
+    ("why is asw1 slow and what should I check", None),
+])
+def test_match_intent(text, expected):
+    assert match_intent(text) == expected
+
+
+def test_normalize_port():
+    assert normalize_port("gi 0/5") == "Gi0/5"
+    assert normalize_port("ten0/1") == "Ten0/1"
+
+
+def test_cmdb_intent():
+    assert route_intent("What is the IP address of core1?") == ("cmdb", "IP address of core1: 192.168.3.1")
+
+
+def test_show_vlan_port_intent_by_name_and_ip():
+    expected = "Port Gi0/5 on device 192.168.1.11 is configured in VLAN 40."
+
+    assert route_intent("vlan of port gi0/5 on asw2") == ("show_vlan_port", expected)
+    assert route_intent("vlan of port gi0/5 on 192.168.1.11") == ("show_vlan_port", expected)
+
+
+def test_show_vlan_ports_all_intent():
+    intent, answer = route_intent("show all vlans on asw1")
+
+    assert intent == "show_vlan_ports_all"
+    assert answer.splitlines()[1:] == [
+        " - Ports Gi0/1-8 → VLAN 10",
+        " - Ports Gi0/9-16 → VLAN 20",
+        " - Ports Gi0/17-24 → VLAN 30",
+    ]
+
+
+@pytest.mark.parametrize("text", [
+    "vlan of port gi0/99 on asw1",  # unknown port
+    "show vlans on wlc1",           # in the CMDB, but no such device
+    "ip of nosuchswitch",           # not in the CMDB
+])
+def test_uncertain_requests_go_to_the_agent(text):
+    assert route_intent(text) is None
@@ -0,0 +1,67 @@
+from langchain_core.documents import Document
+
+from functions.md_splitter import parse_sections, split_markdown
+
+
+def doc(text: str) -> Document:
+    return Document(page_content=text, metadata={"source": "wiki.md"})
+
+
+def test_parse_sections_keeps_heading_path_and_code_block():
+    text = "# Wiki\n\nIntro.\n\n## VPN\n\n```\nline 1\n\nline 2\n```\n\nAfter code."
+    sections = parse_sections(text)
+
+    assert [path for path, _ in sections] == [["Wiki"], ["Wiki", "VPN"]]
+    assert sections[1][1] == ["## VPN", "```\nline 1\n\nline 2\n```", "After code."]
+
+
+def test_chunks_do_not_cross_headings():
+    text = "# Wiki\n\n## Wi-Fi\n\n" + "Wi-Fi text. " * 30 + "\n\n## VPN\n\n" + "VPN text. " * 30
+    chunks = split_markdown([doc(text)], chunk_size=1000, min_chunk_size=0)
+
+    assert [chunk.metadata["headings"] for chunk in chunks] == ["Wiki > Wi-Fi", "Wiki > VPN"]
+    assert "VPN" not in chunks[0].page_content
+    assert all(chunk.metadata["source"] == "wiki.md" for chunk in chunks)
+
+
+def test_code_block_that_fits_is_not_cut():
+    code = "```\n" + "\n".join(f"interface Gi0/{i}" for i in range(1, 20)) + "\n```"
+    text = "# Config\n\n" + "Some text. " * 20 + "\n\n" + code
+    chunks = split_markdown([doc(text)], chunk_size=400, min_chunk_size=0)
+
+    assert sum(code in chunk.page_content for chunk in chunks) == 1
+
+
+def test_long_code_block_is_split_into_fenced_pieces():
+    code = "```bash\n" + "\n".join(f"echo line {i}" for i in range(200)) + "\n```"
+    chunks = split_markdown([doc("# Script\n\n" + code)], chunk_size=300, min_chunk_size=0)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk.page_content) <= 300
+        assert chunk.page_content.startswith("# Script\n\n```bash\n")
+        assert chunk.page_content.endswith("\n```")
+
+
+def test_chunks_fit_chunk_size():
+    text = "# Long\n\n" + "\n\n".join("Sentence number %d is here. " % i * 10 for i in range(30))
+    chunks = split_markdown([doc(text)], chunk_size=500)
+
+    assert len(chunks) > 1
+    assert all(len(chunk.page_content) <= 500 for chunk in chunks)
+
+
+def test_short_sibling_sections_are_merged():
+    text = "# Wiki\n\n## DNS\n\nUse 10.0.0.53.\n\n## NTP\n\nUse 10.0.0.123."
+    chunks = split_markdown([doc(text)], chunk_size=1000, min_chunk_size=200)
+
+    assert len(chunks) == 1
+    assert "10.0.0.53" in chunks[0].page_content and "10.0.0.123" in chunks[0].page_content
+    assert chunks[0].metadata["headings"] == "Wiki"
+
+
+def test_identical_chunks_are_indexed_once():
+    section = "## Contacts\n\n" + "Call the NOC at 555-0100. " * 20
+    chunks = split_markdown([doc(section), doc(section.replace(". ", ".  "))], chunk_size=1000)
+
+    assert len(chunks) == 1
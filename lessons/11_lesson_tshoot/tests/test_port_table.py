@@ -0,0 +1,68 @@
+import json
+
+from tools.port_table import PortTable, port_key
+from tools.show_vlan_ports_all import show_vlan_ports_all
+
+
+def rows(ports: dict) -> list:
+    return [{"port": port, "vlan": vlan} for port, vlan in ports.items()]
+
+
+def test_port_key_natural_order():
+    ports = ["Gi0/10", "Gi0/2", "Gi1/0/1", "Gi0/1.100", "Gi0/1", "Po10", "Te1/1/1", "mgmt"]
+
+    assert sorted(ports, key=port_key) == ["Gi0/1", "Gi0/1.100", "Gi0/2", "Gi0/10", "Gi1/0/1", "Po10", "Te1/1/1", "mgmt"]
+    assert port_key("Gi0/2") == ("Gi", 0, 0, 2, -1)
+    assert port_key("Gi1/0/24") == ("Gi", 1, 0, 24, -1)
+
+
+def test_table_is_sorted_and_indexed():
+    table = PortTable("asw1", rows({"Gi0/10": 20, "Gi0/2": 10, "Gi0/1": 10}))
+
+    assert table.ports == ("Gi0/1", "Gi0/2", "Gi0/10")
+    assert table.vlan("Gi0/10") == 20
+    assert table.vlan("Gi0/99") is None
+
+
+def test_runs_compress_consecutive_ports_in_one_vlan():
+    ports = {f"Gi0/{i}": 10 if i <= 8 else 20 for i in range(1, 12)}
+    ports.update({"Gi0/12": 10, "Gi0/14": 10, "Gi1/0/1": 10, "Gi1/0/2": 10})
+    table = PortTable("asw1", rows(ports))
+
+    assert table.runs() == [
+        ("Gi0/1-8", 10), ("Gi0/9-11", 20), ("Gi0/12", 10), ("Gi0/14", 10), ("Gi1/0/1-2", 10),
+    ]
+    assert table.runs() is table.runs()
+
+
+def test_runs_do_not_cross_vlans_subinterfaces_or_trunks():
+    table = PortTable("rtr", rows({"Gi0/1": "trunk", "Gi0/2": "trunk", "Gi0/3": 10, "Gi0/3.100": 10, "Gi0/4": 10}))
+
+    assert table.runs() == [("Gi0/1-2", "trunk"), ("Gi0/3", 10), ("Gi0/3.100", 10), ("Gi0/4", 10)]
+
+
+def test_select_filters_in_table_order():
+    table = PortTable("asw1", rows({f"Gi0/{i}": 10 if i % 2 else 20 for i in range(1, 9)}))
+
+    assert [table.ports[i] for i in table.select(vlan=20)] == ["Gi0/2", "Gi0/4", "Gi0/6", "Gi0/8"]
+    assert [table.ports[i] for i in table.select(ports=["Gi0/5", "Gi0/1", "Gi0/99"])] == ["Gi0/1", "Gi0/5"]
+    assert table.select(vlan=20, ports=["Gi0/1", "Gi0/2"]) == [1]
+    assert table.runs(table.select(vlan=10, ports=["Gi0/1", "Gi0/3"])) == [("Gi0/1", 10), ("Gi0/3", 10)]
+
+
+def test_show_vlan_ports_all_json_columns():
+    table = json.loads(show_vlan_ports_all("192.168.1.10", output="json"))
+
+    assert table == {
+        "device": "asw1", "ip": "192.168.1.10", "port": ["Gi0/1-8", "Gi0/9-16", "Gi0/17-24"], "vlan": [10, 20, 30],
+    }
+    assert json.loads(show_vlan_ports_all("192.168.1.10", vlan=20, output="json"))["port"] == ["Gi0/9-16"]
+
+
+def test_show_vlan_ports_all_text():
+    assert show_vlan_ports_all("192.168.3.1", ports=["Ten0/1", "Ten0/2", "Ten0/3"]) == (
+        "VLAN table of device 192.168.3.1:\n"
+        " - Port Ten0/1 → VLAN 1\n"
+        " - Ports Ten0/2-3 → VLAN 99"
+    )
+    assert show_vlan_ports_all("192.168.3.1", vlan=42) == "No matching ports on device 192.168.3.1."
@@ -0,0 +1,67 @@
+import pytest
+from langchain_core.language_models import FakeListChatModel
+
+from functions import rag_pipeline
+from functions.rag_pipeline import CondenseCache, is_self_contained, standalone_question
+
+HISTORY = [("What is the IP of asw1?", "192.168.1.10")]
+
+
+@pytest.fixture(autouse=True)
+def empty_condense_cache(monkeypatch):
+    monkeypatch.setattr(rag_pipeline, "condense_cache", CondenseCache())
+
+
+@pytest.mark.parametrize("question", [
+    "What is the IP address of asw1?",
+    "Which VLAN is used for printers?",
+])
+def test_self_contained_questions(question):
+    assert is_self_contained(question)
+
+
+@pytest.mark.parametrize("question", [
+    "and asw2?",
+    "What about the distribution switch?",
+    "Check it again please",
+    "Which VLAN does that port use?",
+])
+def test_follow_up_questions(question):
+    assert not is_self_contained(question)
+
+
+def test_self_contained_question_is_used_as_is():
+    llm = FakeListChatModel(responses=[])
+
+    assert standalone_question(llm, "What is the IP of asw2?", HISTORY, "m") == ("What is the IP of asw2?", "as is")
+
+
+def test_follow_up_without_history_is_used_as_is():
+    assert standalone_question(FakeListChatModel(responses=[]), "and asw2?", [], "m") == ("and asw2?", "as is")
+
+
+def test_follow_up_is_condensed_once_per_history():
+    llm = FakeListChatModel(responses=[" What is the IP of asw2? ", "unused"])
+
+    assert standalone_question(llm, "and asw2?", HISTORY, "m") == ("What is the IP of asw2?", "llm")
+    assert standalone_question(llm, "And ASW2", HISTORY, "m") == ("What is the IP of asw2?", "cache")
+    assert llm.i == 1
+
+
+def test_condense_cache_key_includes_model_and_history():
+    llm = FakeListChatModel(responses=["first", "second", "third"])
+
+    standalone_question(llm, "and asw2?", HISTORY, "m")
+    assert standalone_question(llm, "and asw2?", HISTORY, "other") == ("second", "llm")
+    assert standalone_question(llm, "and asw2?", HISTORY + [("and asw3?", "192.168.1.12")], "m") == ("third", "llm")
+
+
+def test_condense_cache_evicts_least_recently_used():
+    cache = CondenseCache(maxsize=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.get("a")
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
@@ -0,0 +1,85 @@
+import time
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from functions.reranker import PARTIAL_KEY, RerankingRetriever, lexical_scorer, rerank
+from functions.retrieval_cache import RetrievalCache
+
+DOCS = [
+    Document(page_content="Guest Wi-Fi password rotates monthly.", metadata={"headings": "Wi-Fi"}),
+    Document(page_content="Printers use VLAN 30.", metadata={"headings": "Printers"}),
+    Document(page_content="Port template for a network printer: switchport access vlan 30.",
+             metadata={"headings": "Port Configuration Template for a Network Printer"}),
+]
+
+
+class ListStore(VectorStore):
+    """
+    Vectorstore stand-in: returns its documents in list order.
+    """
+
+    def __init__(self, docs: list):
+        self.docs = docs
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> list:
+        return self.docs[:k]
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError
+
+
+def slow_scorer(query: str, docs: list, deadline: float) -> tuple:
+    # Preparation alone uses up the budget
+    time.sleep(max(deadline - time.perf_counter(), 0) + 0.001)
+    return lexical_scorer(query, docs)
+
+
+def test_lexical_scorer_prefers_matching_headings():
+    score, prepared = lexical_scorer("printer port template", DOCS)
+
+    assert prepared == 3
+    assert max(range(3), key=score) == 2
+    assert score(0) == 0
+
+
+def test_rerank_moves_the_best_match_up():
+    ranked, complete = rerank("printer port template", DOCS, budget_ms=1000)
+
+    assert complete
+    assert ranked[0] is DOCS[2]
+
+
+def test_rerank_out_of_budget_keeps_vector_order():
+    ranked, complete = rerank("printer port template", DOCS, budget_ms=1, scorer_factory=slow_scorer)
+
+    assert not complete
+    assert ranked == DOCS
+
+
+def test_partial_results_are_marked_on_copies_and_not_cached():
+    retriever = RerankingRetriever(
+        vectorstore=ListStore(DOCS), search_kwargs={"k": 2, "fetch_k": 3}, budget_ms=1, scorer_factory=slow_scorer,
+    )
+    cache = RetrievalCache()
+
+    docs = cache.invoke(retriever, "printer port template")
+
+    assert all(doc.metadata[PARTIAL_KEY] for doc in docs)
+    assert all(PARTIAL_KEY not in doc.metadata for doc in DOCS)
+    assert cache.stats()["size"] == 0
+
+
+def test_complete_results_are_cached():
+    retriever = RerankingRetriever(vectorstore=ListStore(DOCS), search_kwargs={"k": 2, "fetch_k": 3}, budget_ms=1000)
+    cache = RetrievalCache()
+
+    docs = cache.invoke(retriever, "printer port template")
+
+    assert docs[0] is DOCS[2]
+    assert cache.invoke(retriever, "Printer port template?") is docs
+    assert cache.stats()["size"] == 1
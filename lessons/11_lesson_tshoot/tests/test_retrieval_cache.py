@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+from langchain_core.documents import Document
+
+from functions.retrieval_cache import RetrievalCache, normalize_query
+
+
+class CountingRetriever:
+    """
+    Retriever stand-in: returns one document per query and counts the calls.
+    """
+
+    def __init__(self, vectorstore=None, k: int = 2, metadata: dict = None):
+        self.vectorstore = vectorstore or SimpleNamespace()
+        self.search_kwargs = {"k": k}
+        self.metadata = metadata or {}
+        self.calls = 0
+
+    def invoke(self, query: str) -> list:
+        self.calls += 1
+        return [Document(page_content=f"result for {query}", metadata=dict(self.metadata))]
+
+
+def test_normalize_query():
+    assert normalize_query("  ASW1   IP? ") == "asw1 ip"
+    assert normalize_query("what is the IP of asw1") == "what is the ip of asw1"
+
+
+def test_equivalent_queries_hit_the_cache():
+    cache = RetrievalCache()
+    retriever = CountingRetriever()
+
+    first = cache.invoke(retriever, "ASW1 ip?")
+    second = cache.invoke(retriever, "  asw1 IP ")
+
+    assert second is first
+    assert retriever.calls == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "size": 1}
+
+
+def test_key_includes_search_kwargs_and_index_version():
+    cache = RetrievalCache()
+    store = SimpleNamespace()
+    cache.invoke(CountingRetriever(store, k=2), "vpn")
+    cache.invoke(CountingRetriever(store, k=4), "vpn")
+
+    rebuilt = CountingRetriever(SimpleNamespace(), k=2)
+    cache.invoke(rebuilt, "vpn")
+
+    assert cache.stats()["misses"] == 3
+    assert rebuilt.calls == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RetrievalCache(maxsize=2)
+    retriever = CountingRetriever()
+    cache.invoke(retriever, "a")
+    cache.invoke(retriever, "b")
+    cache.invoke(retriever, "a")
+    cache.invoke(retriever, "c")
+
+    cache.invoke(retriever, "a")
+    assert retriever.calls == 3
+    cache.invoke(retriever, "b")
+    assert retriever.calls == 4
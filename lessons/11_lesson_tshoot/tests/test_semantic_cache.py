@@ -0,0 +1,62 @@
+import numpy as np
+
+from functions.semantic_cache import SemanticCache
+
+
+class KeywordEmbeddings:
+    """
+    Embeddings stand-in: one dimension per keyword.
+    """
+
+    KEYWORDS = ["vpn", "wi-fi", "printer", "password"]
+
+    def embed_query(self, text: str) -> list:
+        return [float(word in text.lower()) for word in self.KEYWORDS]
+
+
+SCOPE = (1, "gpt-4o-mini")
+
+
+def test_same_meaning_hits_within_scope():
+    cache = SemanticCache(threshold=0.95)
+    embeddings = KeywordEmbeddings()
+    cache.store(cache.embed(embeddings, "VPN password?"), "VPN password?", SCOPE, "See the VPN page.", ["vpn.md"])
+
+    hit = cache.lookup(cache.embed(embeddings, "what is the password for the vpn"), SCOPE)
+
+    assert hit["answer"] == "See the VPN page." and hit["sources"] == ["vpn.md"]
+    assert hit["similarity"] > 0.99
+    assert cache.lookup(cache.embed(embeddings, "Wi-Fi password?"), SCOPE) is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_other_index_version_or_model_misses():
+    cache = SemanticCache()
+    vector = cache.embed(KeywordEmbeddings(), "VPN password?")
+    cache.store(vector, "VPN password?", SCOPE, "answer", [])
+
+    assert cache.lookup(vector, (2, "gpt-4o-mini")) is None
+    assert cache.lookup(vector, (1, "gpt-4o")) is None
+
+
+def test_embed_normalizes_and_tolerates_zero_vectors():
+    cache = SemanticCache()
+
+    assert np.isclose(np.linalg.norm(cache.embed(KeywordEmbeddings(), "vpn printer")), 1.0)
+    assert not cache.embed(KeywordEmbeddings(), "hello").any()
+
+
+def test_entries_and_scopes_are_limited():
+    cache = SemanticCache(max_entries=2, max_scopes=2)
+    embeddings = KeywordEmbeddings()
+    for question in ["vpn", "wi-fi", "printer"]:
+        cache.store(cache.embed(embeddings, question), question, SCOPE, question, [])
+
+    assert cache.lookup(cache.embed(embeddings, "vpn"), SCOPE) is None
+    assert cache.lookup(cache.embed(embeddings, "printer"), SCOPE)["answer"] == "printer"
+
+    vector = cache.embed(embeddings, "vpn")
+    cache.store(vector, "vpn", (2, "m"), "v2", [])
+    cache.store(vector, "vpn", (3, "m"), "v3", [])
+    assert cache.lookup(cache.embed(embeddings, "printer"), SCOPE) is None
+    assert cache.lookup(vector, (3, "m"))["answer"] == "v3"
@@ -1,47 +1,72 @@
 import ipaddress
+from contextlib import contextmanager
 
-SWITCHES = {
-    "192.168.1.10": {
-        "name": "asw1",
-        "ports": ["Gi0/" + str(i) for i in range(1, 25)],
-        "vlans": [10, 20, 30, 40, 50]
-    },
-    "192.168.1.11": {
-        "name": "asw2",
-        "ports": ["Gi0/" + str(i) for i in range(1, 25)],
-        "vlans": [10, 20, 30, 40, 50]
-    },
-    "192.168.1.12": {
-        "name": "asw3",
-        "ports": ["Gi0/" + str(i) for i in range(1, 25)],
-        "vlans": [10, 20, 30, 40, 50]
-    },
-    "192.168.2.1": {
-        "name": "dsw1",
-        "ports": ["Gi1/0/" + str(i) for i in range(1, 25)],
-        "vlans": [10, 20, 30, 100, 200]
-    },
-    "192.168.2.2": {
-        "name": "dsw2",
-        "ports": ["Gi1/0/" + str(i) for i in range(1, 25)],
-        "vlans": [10, 20, 30, 100, 200]
-    },
-    "192.168.3.1": {
-        "name": "core1",
-        "ports": ["Ten0/" + str(i) for i in range(1, 9)],
-        "vlans": [10, 20, 30, 100, 200, 300]
-    }
-}
-
-
-# Simulation of VLAN configuration on a device port
+from tools.cli_parsers import parse_interfaces_status, parse_vlan_brief
+from tools.deadline import current_deadline
+from tools.transport import TransportError, device_session
+
+
+CONFIG_LOCKED = "% Configuration is locked"
+
+
+class VlanConfigSession:
+    """
+    Configuration session on a switch in which validation and the change are one step.
+
+    "configure terminal" takes the configuration lock of the device, then the
+    port VLANs and configured VLANs are read under the lock ("do show", not
+    from the show cache), so the state the changes are validated against is
+    the state they are applied to. Changes sent with apply() are committed
+    by "end" when vlan_config_session() exits normally.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.hostname = session.hostname
+        configure, status, vlan_brief = session.run(
+            ["configure terminal", "do show interfaces status", "do show vlan brief"]
+        )
+        # Device lock message if the device does not accept configuration (read-only or locked by another session)
+        self.locked = configure if configure.startswith(CONFIG_LOCKED) else None
+        self.ports = {row["port"]: row["vlan"] for row in parse_interfaces_status(status)}
+        self.vlans = {row["vlan"] for row in parse_vlan_brief(vlan_brief)}
+
+    def apply(self, changes: dict) -> list:
+        """
+        Sends "switchport access vlan" for every port. Returns the device error messages (empty on success).
+        """
+        commands = []
+        for port, vlan in changes.items():
+            commands += [f"interface {port}", f"switchport access vlan {vlan}", "exit"]
+        outputs = self.session.run(commands)
+        return [output for output in outputs if output.startswith("%")]
+
+
+@contextmanager
+def vlan_config_session(ip: str):
+    """
+    Yields a VlanConfigSession of the switch and sends "end" when the block exits normally.
+
+    Exceptions:
+        TransportError: If the device is not available.
+    """
+    with device_session(ip) as session:
+        config = VlanConfigSession(session)
+        yield config
+        if config.locked is None:
+            # The config version bump makes show_vlan_port and show_vlan_ports_all see the change right away
+            session.run(["end"])
+
+
+# VLAN configuration of a device port over the CLI
 def change_vlan(ip: str, port: str, vlan: int) -> str:
     """
-    Simulates changing the VLAN on a specified port of a network switch.
+    Changes the VLAN on a specified port of a network switch.
 
     Checks the validity of the IP address, existence of the device in the database,
-    presence of the port, and support for the specified VLAN.
-    Returns the result as a text message.
+    presence of the port, and support for the specified VLAN, then configures
+    the port over the device CLI, in the same configuration session as the
+    checks (see VlanConfigSession). Returns the result as a text message.
 
     Arguments:
         ip (str): IPv4 address of the switch.
@@ -59,15 +84,85 @@ def change_vlan(ip: str, port: str, vlan: int) -> str:
     except ValueError:
         raise ValueError("change_vlan() accepts only a valid IPv4 address.")
 
-    if ip not in SWITCHES:
+    try:
+        with vlan_config_session(ip) as config:
+            hostname = config.hostname
+            if config.locked:
+                return f"VLAN on port {port} of device {hostname} ({ip}) not changed: {config.locked}"
+            if port not in config.ports:
+                return f"Port {port} not found on device {hostname} ({ip})."
+            if vlan not in config.vlans:
+                return f"VLAN {vlan} is not configured on device {hostname} ({ip})."
+            errors = config.apply({port: vlan})
+    except TransportError:
         return f"Device with IP {ip} not found."
+    if errors:
+        return f"VLAN on port {port} of device {hostname} ({ip}) not changed: {errors[0]}"
 
-    switch = SWITCHES[ip]
+    return f"VLAN on port {port} of device {hostname} ({ip}) successfully changed to VLAN {vlan}."
 
-    if port not in switch["ports"]:
-        return f"Port {port} not found on device {switch['name']} ({ip})."
 
-    if vlan not in switch["vlans"]:
-        return f"VLAN {vlan} is not configured on device {switch['name']} ({ip})."
+# Bulk VLAN change on one device over the CLI
+def change_vlans(ip: str, changes: dict) -> str:
+    """
+    Changes VLANs on several ports of a switch in one commit.
+
+    Validation and the change happen in one configuration session that holds
+    the configuration lock of the device (see VlanConfigSession): if any port
+    or VLAN is invalid, nothing is changed; otherwise all changes are sent
+    to the device CLI and committed in one step, so they are never applied
+    to a state that moved after validation.
+
+    Arguments:
+        ip (str): IPv4 address of the switch.
+        changes (dict[str, int]): Port name -> VLAN, for example {"Gi0/1": 40, "Gi0/2": 40}.
+
+    Returns:
+        str: Per-port results or error messages.
+
+    Exceptions:
+        ValueError: If the IP address format is invalid.
+    """
+    try:
+        ipaddress.IPv4Address(ip)
+    except ValueError:
+        raise ValueError("change_vlans() accepts only a valid IPv4 address.")
+
+    if not changes:
+        return "No ports to change."
+
+    try:
+        with vlan_config_session(ip) as config:
+            hostname, ports = config.hostname, config.ports
+            if config.locked:
+                return f"No changes made on device {hostname} ({ip}): {config.locked}"
+
+            errors = []
+            for port, vlan in changes.items():
+                if port not in ports:
+                    errors.append(f" - Port {port}: not found")
+                elif vlan not in config.vlans:
+                    errors.append(f" - Port {port}: VLAN {vlan} is not configured")
+            if errors:
+                return "\n".join([f"No changes made on device {hostname} ({ip}):"] + errors)
+
+            # Within a tool deadline: no configuration is started after it has passed
+            deadline = current_deadline()
+            if deadline is not None:
+                if deadline.expired():
+                    return f"No changes made on device {hostname} ({ip}): the tool deadline passed during validation."
+                deadline.report(
+                    f"Changes for {len(changes)} ports on device {hostname} ({ip}) were validated "
+                    "and sent to the device; the result is unknown, check with show_vlan_ports_all."
+                )
+
+            device_errors = config.apply(changes)
+    except TransportError:
+        return f"Device with IP {ip} not found."
+    if device_errors:
+        return "\n".join([f"Device {hostname} ({ip}) rejected the changes:"] + [f" - {e}" for e in device_errors])
 
-    return f"VLAN on port {port} of device {switch['name']} ({ip}) successfully changed to VLAN {vlan}."
\ No newline at end of file
+    result = [f"VLANs on device {hostname} ({ip}) changed in one commit:"]
+    for port, vlan in changes.items():
+        result.append(f" - Port {port}: VLAN {ports[port]} → VLAN {vlan}")
+    return "\n".join(result)
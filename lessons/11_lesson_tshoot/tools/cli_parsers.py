@@ -0,0 +1,183 @@
+"""
+Parsers for device CLI output.
+
+Templates use the TextFSM syntax (a subset: one Start state, Value options
+Required/Filldown/List, actions Record/Continue), so they can be replaced
+with ntc-templates or loaded with the textfsm package for real devices.
+Every parser returns a list of rows: {column: value}.
+"""
+
+import re
+
+
+# ---------------------------- TEMPLATE ENGINE ----------------------------
+
+class TextTemplate:
+    """
+    Minimal TextFSM-style template.
+
+        Value [Options] NAME (regex)
+        ...
+
+        Start
+          ^rule with ${NAME} -> Continue.Record
+    """
+
+    def __init__(self, template: str):
+        self.values = {}
+        self.options = {}
+        self.rules = []
+        state = None
+        for line in template.strip("\n").splitlines():
+            stripped = line.strip()
+            if not stripped or stripped.startswith("#"):
+                continue
+            if state is None and stripped.startswith("Value "):
+                # Value [Option[,Option]] NAME (regex)
+                head, _, regex = stripped[len("Value "):].partition("(")
+                head = head.split()
+                if not regex or len(head) not in (1, 2):
+                    raise ValueError(f"Invalid value definition: {line}")
+                name = head[-1]
+                self.values[name] = "(" + regex
+                self.options[name] = set(head[0].split(",")) if len(head) == 2 else set()
+            elif stripped == "Start":
+                state = "Start"
+            elif state == "Start" and stripped.startswith("^"):
+                rule, _, action = stripped.partition(" -> ")
+                self.rules.append((self.compile(rule), action.strip().split(".")))
+            else:
+                raise ValueError(f"Unsupported template line: {line}")
+
+    def compile(self, rule: str):
+        def value(match):
+            name = match.group(1)
+            return f"(?P<{name}>{self.values[name][1:-1]})"
+
+        return re.compile(re.sub(r"\$\{(\w+)\}", value, rule.replace("$$", "$")))
+
+    def empty_row(self, previous: dict = None) -> dict:
+        row = {}
+        for name, options in self.options.items():
+            if previous is not None and "Filldown" in options:
+                row[name] = previous[name]
+            else:
+                row[name] = [] if "List" in options else ""
+        return row
+
+    def parse(self, text: str) -> list:
+        """
+        Returns the records of the text: [{NAME: value}, ...].
+        """
+        records = []
+        row = self.empty_row()
+
+        def record():
+            nonlocal row
+            required = all(row[name] for name, options in self.options.items() if "Required" in options)
+            if required and any(row.values()):
+                records.append(row)
+            row = self.empty_row(row)
+
+        for line in text.splitlines():
+            for regex, action in self.rules:
+                match = regex.match(line)
+                if match is None:
+                    continue
+                for name, value in match.groupdict().items():
+                    if value is None:
+                        continue
+                    if "List" in self.options[name]:
+                        row[name].append(value)
+                    else:
+                        row[name] = value
+                if "Record" in action:
+                    record()
+                if "Continue" not in action:
+                    break
+        record()
+        return records
+
+
+# ---------------------------- TEMPLATES ----------------------------
+
+# Port      Name               Status       Vlan       Duplex  Speed  Type
+# Gi0/1     uplink             connected    10         a-full  a-1000 10/100/1000BaseTX
+INTERFACES_STATUS = TextTemplate(r"""
+Value Required PORT (\S+)
+Value NAME (.*?)
+Value STATUS (connected|notconnect|disabled|err-disabled|inactive|monitoring|suspended|sfpAbsent|xcvrAbsent)
+Value VLAN (\S+)
+Value DUPLEX (\S+)
+Value SPEED (\S+)
+Value TYPE (.*?)
+
+Start
+  ^Port\s+Name\s+Status
+  ^${PORT}\s+${NAME}\s*${STATUS}\s+${VLAN}\s+${DUPLEX}\s+${SPEED}\s*${TYPE}\s*$$ -> Record
+""")
+
+# VLAN Name                             Status    Ports
+# ---- -------------------------------- --------- -------------------------------
+# 10   VLAN0010                         active    Gi0/1, Gi0/2, Gi0/3, Gi0/4
+#                                                 Gi0/5, Gi0/6
+VLAN_BRIEF = TextTemplate(r"""
+Value Required VLAN (\d+)
+Value NAME (\S+)
+Value STATUS (\S+)
+Value List PORTS (\S.*?)
+
+Start
+  ^VLAN\s+Name\s+Status
+  ^-+\s
+  ^\d+\s -> Continue.Record
+  ^${VLAN}\s+${NAME}\s+${STATUS}\s*$$
+  ^${VLAN}\s+${NAME}\s+${STATUS}\s+${PORTS},?\s*$$
+  ^\s+${PORTS},?\s*$$
+""")
+
+
+# ---------------------------- PARSERS ----------------------------
+
+def vlan_value(vlan: str):
+    """
+    VLAN column as int for access ports, as is for "trunk" or "routed".
+    """
+    return int(vlan) if vlan.isdigit() else vlan
+
+
+def parse_interfaces_status(output: str) -> list:
+    """
+    Parses "show interfaces status".
+
+    Returns:
+        list[dict]: Rows {"port", "name", "status", "vlan", "duplex", "speed", "type"} in device order.
+    """
+    return [
+        {key.lower(): vlan_value(value) if key == "VLAN" else value for key, value in row.items()}
+        for row in INTERFACES_STATUS.parse(output)
+    ]
+
+
+def parse_vlan_brief(output: str) -> list:
+    """
+    Parses "show vlan brief".
+
+    Returns:
+        list[dict]: Rows {"vlan", "name", "status", "ports"} with the member ports as a list.
+    """
+    return [
+        {
+            "vlan": int(row["VLAN"]),
+            "name": row["NAME"],
+            "status": row["STATUS"],
+            "ports": [port.strip() for chunk in row["PORTS"] for port in chunk.split(",") if port.strip()],
+        }
+        for row in VLAN_BRIEF.parse(output)
+    ]
+
+
+PARSERS = {
+    "show interfaces status": parse_interfaces_status,
+    "show vlan brief": parse_vlan_brief,
+}
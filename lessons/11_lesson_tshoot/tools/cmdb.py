@@ -1,5 +1,11 @@
 # CMDB Example
 
+import csv
+import json
+import os
+import threading
+from collections import Counter, defaultdict
+
 device_inventory = {
     "asw1": "192.168.1.10",      # Access Switch 1
     "asw2": "192.168.1.11",      # Access Switch 2
@@ -14,18 +20,164 @@ device_inventory = {
 }
 
 
-def cmdb(name: str) -> str:
+def trigrams(name: str) -> set:
+    """
+    Returns the character trigrams of a padded lowercase name: "asw1" -> {"  a", " as", "asw", "sw1", "w1 "}.
+    """
+    padded = f"  {name.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CmdbIndex:
+    """
+    In-memory CMDB index.
+
+    - exact and case-insensitive hostname lookup: dict, O(1);
+    - reverse IP -> hostnames lookup: dict, O(1);
+    - fuzzy hostname search: inverted trigram index, only names sharing
+      trigrams with the query are scored.
+
+    Fuzzy matches are suggestions only: "asw1" and "asw2" are close,
+    so a misspelled name is never silently resolved to another device.
+    """
+
+    def __init__(self, devices: dict = None):
+        self.by_name = {}
+        self.by_lower = {}
+        self.by_ip = defaultdict(list)
+        self.by_trigram = defaultdict(set)
+        self.trigram_count = {}
+        self.lock = threading.Lock()
+        if devices:
+            self.add_many(devices.items())
+
+    def add_many(self, devices) -> int:
+        """
+        Adds (name, ip) pairs, a name that already exists gets the new IP.
+        Returns the number of pairs added.
+        """
+        count = 0
+        with self.lock:
+            for name, ip in devices:
+                name, ip = name.strip(), ip.strip()
+                old_ip = self.by_name.get(name)
+                if old_ip is not None:
+                    self.by_ip[old_ip].remove(name)
+                self.by_name[name] = ip
+                self.by_lower[name.lower()] = name
+                self.by_ip[ip].append(name)
+                name_trigrams = trigrams(name)
+                self.trigram_count[name] = len(name_trigrams)
+                for trigram in name_trigrams:
+                    self.by_trigram[trigram].add(name)
+                count += 1
+        return count
+
+    def lookup(self, name: str):
+        """
+        Returns the IP of the device by exact or case-insensitive name, None if not found.
+        """
+        name = name.strip()
+        ip = self.by_name.get(name)
+        if ip is None:
+            exact = self.by_lower.get(name.lower())
+            ip = self.by_name.get(exact) if exact else None
+        return ip
+
+    def bulk_lookup(self, names: list) -> dict:
+        """
+        Returns {name: ip or None} for all names.
+        """
+        return {name: self.lookup(name) for name in names}
+
+    def reverse_lookup(self, ip: str) -> list:
+        """
+        Returns the names of devices with the IP address.
+        """
+        return list(self.by_ip.get(ip.strip(), []))
+
+    def suggest(self, name: str, limit: int = 3, min_similarity: float = 0.3) -> list:
+        """
+        Returns up to limit names similar to the given one (trigram Jaccard similarity), best first.
+        """
+        query = trigrams(name)
+        shared = Counter()
+        for trigram in query:
+            shared.update(self.by_trigram.get(trigram, ()))
+        scored = []
+        for candidate, common in shared.items():
+            similarity = common / (len(query) + self.trigram_count[candidate] - common)
+            if similarity >= min_similarity:
+                scored.append((similarity, candidate))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [candidate for _, candidate in scored[:limit]]
+
+    def load_csv(self, path: str, name_field: str = "name", ip_field: str = "ip") -> int:
+        """
+        Imports devices from a CSV file with a header row. Returns the number imported.
+        """
+        with open(path, newline="", encoding="utf-8") as file:
+            rows = csv.DictReader(file)
+            return self.add_many((row[name_field], row[ip_field]) for row in rows if row.get(name_field))
+
+    def load_json(self, path: str, name_field: str = "name", ip_field: str = "ip") -> int:
+        """
+        Imports devices from a JSON file: {"name": "ip", ...} or [{"name": ..., "ip": ...}, ...].
+        Returns the number imported.
+        """
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+        if isinstance(data, dict):
+            return self.add_many(data.items())
+        return self.add_many((item[name_field], item[ip_field]) for item in data)
+
+    def load(self, path: str) -> int:
+        """
+        Imports devices from a .csv or .json file.
+        """
+        if path.lower().endswith(".csv"):
+            return self.load_csv(path)
+        return self.load_json(path)
+
+
+index = CmdbIndex(device_inventory)
+
+# Large inventories are imported from a file: CMDB_PATH=./inventory.csv
+if os.getenv("CMDB_PATH"):
+    index.load(os.getenv("CMDB_PATH"))
+
+
+def cmdb(name: str):
     """
     Searches for a device’s IP address by its name in the CMDB database.
+    The name is matched exactly, then case-insensitively.
 
     Arguments:
-        name (str): Device name (for example, “asw1”)..
+        name (str): Device name (for example, “asw1”).
 
     Returns:
-        str: The device’s IP address if found, otherwise an error message.
+        str | None: The device’s IP address if found, otherwise None
+        (similar names are available via cmdb_suggest()).
     """
-    ip = device_inventory.get(name)
-    if ip:
-        return ip
-    else:
-        return f"Device with name {name} not found."
\ No newline at end of file
+    return index.lookup(name)
+
+
+def cmdb_bulk(names: list) -> dict:
+    """
+    Looks up many device names at once: {name: ip or None}.
+    """
+    return index.bulk_lookup(names)
+
+
+def cmdb_reverse(ip: str) -> list:
+    """
+    Returns the names of devices with the given IP address.
+    """
+    return index.reverse_lookup(ip)
+
+
+def cmdb_suggest(name: str, limit: int = 3) -> list:
+    """
+    Returns device names similar to the given one, best first.
+    """
+    return index.suggest(name, limit=limit)
@@ -0,0 +1,165 @@
+"""
+Per-tool deadlines with cooperative cancellation.
+
+max_execution_time of the agent only bounds the whole run: one hung tool
+call could use up all of it. with_timeout() gives every tool call its own
+deadline:
+
+- the tool runs in a worker thread (sync tools) or under asyncio.wait_for
+  (async tools); when the deadline passes, the agent gets a "timed out"
+  observation with the partial results and continues;
+- the deadline starts when the call starts running, not when it is queued:
+  a call that waits for a free worker longer than its own budget is not
+  started at all (workers: TOOL_WORKERS, shared by all sessions, a
+  saturated pool is logged);
+- the Deadline of the call is available to the tool code through
+  current_deadline(), so long-running tools check it, stop early and
+  return what they have (cooperative cancellation: Python threads
+  cannot be killed, a tool that never checks runs on in the background
+  until its own I/O timeouts fire).
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Share of the budget a cooperative tool keeps for building its answer
+SOFT_DEADLINE_SHARE = 0.8
+
+# Timed-out sync tools keep their worker until they return, so the pool is sized generously
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "32"))
+
+tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="tool")
+tool_workers_lock = threading.Lock()
+tool_workers_busy = 0
+
+deadline_var = contextvars.ContextVar("tool_deadline", default=None)
+
+
+class Deadline:
+    """
+    Time limit of one tool call, a cancel flag and the partial results reported so far.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.start = time.monotonic()
+        self.cancelled = threading.Event()
+        self.partial = []
+
+    def restart(self) -> None:
+        """
+        Starts counting from now: called when a queued call starts running.
+        """
+        self.start = time.monotonic()
+
+    def remaining(self) -> float:
+        return max(0.0, self.start + self.seconds - time.monotonic())
+
+    def soft_remaining(self) -> float:
+        """
+        Time left before a cooperative tool should stop and return its partial result.
+        """
+        return max(0.0, self.start + self.seconds * SOFT_DEADLINE_SHARE - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.cancelled.is_set() or self.remaining() == 0
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def report(self, result: str) -> None:
+        """
+        Records a partial result, returned to the agent if the tool times out.
+        """
+        self.partial.append(result)
+
+
+def current_deadline():
+    """
+    Returns the Deadline of the running tool call or None outside with_timeout().
+    """
+    return deadline_var.get()
+
+
+def timeout_message(name: str, deadline: Deadline) -> str:
+    message = (
+        f"{name} timed out after {deadline.seconds:g} s and was asked to stop"
+        " (a change already sent to a device may still complete)."
+    )
+    if deadline.partial:
+        return message + " Partial results:\n" + "\n".join(deadline.partial)
+    return message + " No results. Try another tool or fewer targets."
+
+
+def with_timeout(seconds: float):
+    """
+    Decorator: runs the tool with a deadline of its own. Put it under @tool.
+
+    On timeout the tool returns a message with the partial results instead
+    of its normal output, so the agent can report them or try something else.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                deadline = Deadline(seconds)
+                token = deadline_var.set(deadline)
+                try:
+                    return await asyncio.wait_for(func(*args, **kwargs), timeout=seconds)
+                except asyncio.TimeoutError:
+                    # wait_for() has cancelled the coroutine at its current await
+                    deadline.cancel()
+                    print(f"==> tool {func.__name__} timed out after {seconds:g} s")
+                    return timeout_message(func.__name__, deadline)
+                finally:
+                    deadline_var.reset(token)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            global tool_workers_busy
+            deadline = Deadline(seconds)
+            context = contextvars.copy_context()
+            context.run(deadline_var.set, deadline)
+            started = threading.Event()
+
+            def run():
+                global tool_workers_busy
+                deadline.restart()
+                started.set()
+                try:
+                    return context.run(func, *args, **kwargs)
+                finally:
+                    with tool_workers_lock:
+                        tool_workers_busy -= 1
+
+            with tool_workers_lock:
+                tool_workers_busy += 1
+                busy = tool_workers_busy
+            if busy > TOOL_WORKERS:
+                print(f"==> tool workers saturated: {busy} calls for {TOOL_WORKERS} workers, {func.__name__} queued")
+            future = tool_executor.submit(run)
+
+            if not started.wait(timeout=seconds) and future.cancel():
+                with tool_workers_lock:
+                    tool_workers_busy -= 1
+                print(f"==> tool {func.__name__} not started in {seconds:g} s: all {TOOL_WORKERS} workers busy")
+                return (
+                    f"{func.__name__} was not started: all tool workers are busy with earlier calls. "
+                    "Try again later or answer with what you have."
+                )
+            try:
+                started.wait()
+                return future.result(timeout=deadline.remaining())
+            except FutureTimeoutError:
+                deadline.cancel()
+                print(f"==> tool {func.__name__} timed out after {seconds:g} s")
+                return timeout_message(func.__name__, deadline)
+        return wrapper
+
+    return decorator
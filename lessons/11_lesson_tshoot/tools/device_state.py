@@ -0,0 +1,131 @@
+import threading
+from array import array
+
+# Simulation of VLAN state on switch ports
+VLAN_STATE = {
+    "192.168.1.10": {
+        f"Gi0/{i}": 10 if i <= 8 else 20 if i <= 16 else 30
+        for i in range(1, 25)
+    },
+    "192.168.1.11": {
+        f"Gi0/{i}": 1 if i % 2 == 0 else 40
+        for i in range(1, 25)
+    },
+    "192.168.1.12": {
+        f"Gi0/{i}": 50 if i <= 12 else 60
+        for i in range(1, 25)
+    },
+    "192.168.2.1": {
+        f"Gi1/0/{i}": 99 if i in [1, 2] else 10
+        for i in range(1, 25)
+    },
+    "192.168.2.2": {
+        f"Gi1/0/{i}": 20 if i <= 12 else 30
+        for i in range(1, 25)
+    },
+    "192.168.3.1": {
+        f"Ten0/{i}": 1 if i in [1, 4] else 99
+        for i in range(1, 9)
+    },
+    "192.168.254.1": {
+        f"Gi0/{i}": 1 if i <= 4 else 100
+        for i in range(0, 8)
+    },
+    "192.168.100.1": {
+        f"Gi0/{i}": 100 if i <= 4 else 1
+        for i in range(0, 8)
+    },
+    "10.0.0.1": {
+        f"Gi0/{i}": 1 if i % 2 == 0 else 99
+        for i in range(0, 8)
+    },
+    "10.0.0.2": {
+        f"Gi0/{i}": 100
+        for i in range(0, 8)
+    },
+}
+
+# Switches managed by change_vlan: name and VLANs configured on the device
+SWITCHES = {
+    "192.168.1.10": {"name": "asw1", "vlans": [10, 20, 30, 40, 50]},
+    "192.168.1.11": {"name": "asw2", "vlans": [10, 20, 30, 40, 50]},
+    "192.168.1.12": {"name": "asw3", "vlans": [10, 20, 30, 40, 50]},
+    "192.168.2.1": {"name": "dsw1", "vlans": [10, 20, 30, 100, 200]},
+    "192.168.2.2": {"name": "dsw2", "vlans": [10, 20, 30, 100, 200]},
+    "192.168.3.1": {"name": "core1", "vlans": [10, 20, 30, 100, 200, 300]},
+}
+
+
+# ---------------------------- STATE ----------------------------
+
+class DeviceState:
+    """
+    Port -> VLAN state of one device.
+
+    Port names are stored once in a tuple, VLANs in a parallel array of
+    unsigned shorts, and a dict maps a port name to its position.
+    Writes take the device lock.
+    """
+
+    def __init__(self, ip: str, ports: dict, name: str = None, vlans: list = None):
+        self.ip = ip
+        self.name = name
+        self.ports = tuple(ports)
+        self.port_index = {port: i for i, port in enumerate(self.ports)}
+        self.port_vlans = array("H", ports.values())
+        # None: the device is read-only for change_vlan
+        self.allowed_vlans = frozenset(vlans) if vlans is not None else None
+        self.lock = threading.Lock()
+        # Held by the CLI session in configuration mode (exclusive configuration)
+        self.config_lock = threading.Lock()
+
+    def vlan(self, port: str):
+        """
+        Returns the VLAN of the port or None if there is no such port.
+        """
+        i = self.port_index.get(port)
+        return None if i is None else self.port_vlans[i]
+
+    def snapshot(self) -> list:
+        """
+        Returns [(port, vlan), ...] consistent with each other.
+        """
+        with self.lock:
+            return list(zip(self.ports, self.port_vlans))
+
+
+class DeviceStateStore:
+    """
+    Single source of device state for the show and change tools.
+
+    The show tools see changes through the transport: cached show output is
+    keyed by the config version of the device in the connection pool
+    (tools/show_cache.py), not by this store.
+    """
+
+    def __init__(self, vlan_state: dict, switches: dict):
+        self.devices = {
+            ip: DeviceState(ip, ports, **switches.get(ip, {}))
+            for ip, ports in vlan_state.items()
+        }
+
+    def get(self, ip: str):
+        return self.devices.get(ip)
+
+    def set_vlans(self, device: DeviceState, changes: dict) -> dict:
+        """
+        Applies {port: vlan} changes to the device atomically. Ports and VLANs must be validated.
+
+        Returns:
+            dict: The previous {port: vlan}.
+        """
+        previous = {}
+        with device.lock:
+            for port, vlan in changes.items():
+                i = device.port_index[port]
+                previous[port] = device.port_vlans[i]
+                device.port_vlans[i] = vlan
+            return previous
+
+
+store = DeviceStateStore(VLAN_STATE, SWITCHES)
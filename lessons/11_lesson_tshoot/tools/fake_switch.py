@@ -0,0 +1,227 @@
+"""
+Fake switch CLI for tests and benchmarks.
+
+CliSession emulates the few IOS commands the tools use on top of the
+shared device state (tools/device_state.py):
+
+    terminal length 0
+    show interfaces status
+    show vlan brief
+    configure terminal / interface <port> / switchport access vlan <n> / exit / end
+    do show ... (show commands in configuration mode)
+
+Configuration mode is exclusive: "configure terminal" takes the configuration
+lock of the device, so a session can read the state with "do show" and
+change it knowing that no other session changes it meanwhile. Interface
+changes are collected during the configuration session and committed to
+the device state in one step on "end"; a session closed in configuration
+mode discards them.
+
+FakeSwitchServer serves the same CLI over TCP (telnet-like line protocol)
+with asyncio. The first line sent by the client selects the device by IP,
+like a terminal server:
+
+    python -m tools.fake_switch --port 2323
+
+There is no SSH endpoint: the ssh transport (netmiko) is not tested against this server.
+"""
+
+import argparse
+import asyncio
+import threading
+
+from tools.device_state import DeviceStateStore, store as default_store
+
+INVALID_INPUT = "% Invalid input detected at '^' marker."
+
+
+# ---------------------------- CLI ----------------------------
+
+class CliSession:
+    """
+    One CLI session on one device: exec, config and interface modes.
+    """
+
+    def __init__(self, device, store: DeviceStateStore):
+        self.device = device
+        self.store = store
+        self.hostname = device.name or device.ip
+        self.mode = "exec"
+        self.interface = None
+        self.pending = {}
+
+    @property
+    def prompt(self) -> str:
+        suffix = {"exec": "#", "config": "(config)#", "interface": "(config-if)#"}[self.mode]
+        return self.hostname + suffix
+
+    def execute(self, command: str) -> str:
+        """
+        Runs one command line and returns its output.
+        """
+        command = " ".join(command.split())
+        if not command or command == "terminal length 0":
+            return ""
+        if self.mode == "exec":
+            return self.execute_exec(command)
+        return self.execute_config(command)
+
+    def execute_exec(self, command: str) -> str:
+        if command == "show interfaces status":
+            return self.interfaces_status()
+        if command == "show vlan brief":
+            return self.vlan_brief()
+        if command in ("configure terminal", "conf t"):
+            if self.device.allowed_vlans is None:
+                return "% Configuration is locked on this device."
+            if not self.device.config_lock.acquire(blocking=False):
+                return "% Configuration is locked by another session."
+            self.mode = "config"
+            return "Enter configuration commands, one per line.  End with CNTL/Z."
+        return INVALID_INPUT
+
+    def execute_config(self, command: str) -> str:
+        if command == "end":
+            self.leave_config(commit=True)
+            return ""
+        if command == "exit":
+            if self.mode == "interface":
+                self.mode, self.interface = "config", None
+            else:
+                self.leave_config(commit=True)
+            return ""
+        if command.startswith("do show "):
+            return self.execute_exec(command[len("do "):])
+        if command.startswith("interface "):
+            port = command[len("interface "):]
+            if port not in self.device.port_index:
+                return INVALID_INPUT
+            self.mode, self.interface = "interface", port
+            return ""
+        if self.mode == "interface" and command.startswith("switchport access vlan "):
+            vlan = command.rsplit(" ", 1)[1]
+            if not vlan.isdigit() or int(vlan) not in self.device.allowed_vlans:
+                return f"% VLAN {vlan} is not configured on this device."
+            self.pending[self.interface] = int(vlan)
+            return ""
+        return INVALID_INPUT
+
+    def leave_config(self, commit: bool) -> None:
+        """
+        Returns to exec mode, commits (or discards) the pending changes and releases the configuration lock.
+        """
+        if commit and self.pending:
+            self.store.set_vlans(self.device, self.pending)
+        self.pending = {}
+        self.mode, self.interface = "exec", None
+        self.device.config_lock.release()
+
+    def close(self) -> None:
+        """
+        Ends the session: uncommitted changes are discarded.
+        """
+        if self.mode != "exec":
+            self.leave_config(commit=False)
+
+    def interfaces_status(self) -> str:
+        ports = self.device.snapshot()
+        lines = [f"{'Port':<10}{'Name':<19}{'Status':<13}{'Vlan':<11}{'Duplex':<8}{'Speed':<7}Type"]
+        for port, vlan in ports:
+            lines.append(f"{port:<10}{'':<19}{'connected':<13}{vlan:<11}{'a-full':<8}{'a-1000':<7}10/100/1000BaseTX")
+        return "\n".join(lines)
+
+    def vlan_brief(self) -> str:
+        ports = self.device.snapshot()
+        members = {}
+        for port, vlan in ports:
+            members.setdefault(vlan, []).append(port)
+        # Read-only devices: only the VLANs in use are known
+        vlans = sorted(self.device.allowed_vlans if self.device.allowed_vlans is not None else members)
+        lines = [
+            f"{'VLAN':<5}{'Name':<33}{'Status':<10}Ports",
+            f"{'-' * 4} {'-' * 32} {'-' * 9} {'-' * 30}",
+        ]
+        for vlan in vlans:
+            lines.append(f"{vlan:<5}{f'VLAN{vlan:04d}':<33}{'active':<10}{', '.join(members.get(vlan, []))}")
+        return "\n".join(lines)
+
+
+# ---------------------------- SERVER ----------------------------
+
+class FakeSwitchServer:
+    """
+    Asyncio TCP server with the fake CLI of every device in the store.
+    """
+
+    def __init__(self, store: DeviceStateStore = default_store, host: str = "127.0.0.1", port: int = 2323):
+        self.store = store
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            writer.write(b"Device: ")
+            await writer.drain()
+            ip = (await reader.readline()).decode().strip()
+            device = self.store.get(ip)
+            if device is None:
+                writer.write(f"% Unknown device {ip}\r\n".encode())
+                return
+            session = CliSession(device, self.store)
+            try:
+                writer.write(f"\r\n{session.prompt}".encode())
+                await writer.drain()
+                while line := await reader.readline():
+                    command = line.decode().strip()
+                    if session.mode == "exec" and command in ("exit", "quit", "logout"):
+                        break
+                    output = session.execute(command)
+                    writer.write((output.replace("\n", "\r\n") + "\r\n" + session.prompt).encode())
+                    await writer.drain()
+            finally:
+                # A client that disconnects in configuration mode must not keep the lock
+                session.close()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        print(f"==> fake switches on {self.host}:{self.port}: {', '.join(self.store.devices)}")
+        async with self.server:
+            await self.server.serve_forever()
+
+    def start_in_thread(self) -> threading.Thread:
+        """
+        Runs the server in a daemon thread (port=0 picks a free port). Returns when it is listening.
+        """
+        started = threading.Event()
+
+        def run() -> None:
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_until_complete(self.server.serve_forever())
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        started.wait()
+        return thread
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake switch CLI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2323)
+    args = parser.parse_args()
+    asyncio.run(FakeSwitchServer(host=args.host, port=args.port).serve_forever())
+
+
+if __name__ == "__main__":
+    main()
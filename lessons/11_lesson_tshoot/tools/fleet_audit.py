@@ -0,0 +1,206 @@
+"""
+Fleet-wide VLAN audit: port/VLAN state of all CMDB devices in one table.
+
+    "which ports across the fleet are in VLAN 99"     fleet_query(vlan=99)
+    "which access ports are not in an allowed VLAN"   fleet_query(exclude_vlans=[10, 20, 30])
+    "which ports use a VLAN missing on the device"    fleet_query(unconfigured_only=True)
+
+Devices are read concurrently through the show cache, so a repeated audit
+only queries the devices whose configuration changed. The result is a
+columnar table (one list per column, device names stored once) that the
+filters and the group-by run over.
+"""
+
+import os
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from tools.cmdb import index
+from tools.deadline import current_deadline
+from tools.port_table import PortTable
+from tools.show_cache import show_cache
+from tools.transport import TransportError
+
+FLEET_WORKERS = int(os.getenv("FLEET_WORKERS", "32"))
+
+
+def configured_vlans(hostname: str, rows: list) -> frozenset:
+    """
+    VLANs that exist on the device, from parsed "show vlan brief".
+    """
+    return frozenset(row["vlan"] for row in rows)
+
+
+# ---------------------------- GATHER ----------------------------
+
+def gather_device(ip: str):
+    """
+    Returns (PortTable, configured VLANs) of the device, None if it cannot be read.
+    """
+    try:
+        table = show_cache.view(ip, "show interfaces status", PortTable)
+        vlans = show_cache.view(ip, "show vlan brief", configured_vlans)
+    except TransportError:
+        return None
+    return table, vlans
+
+
+class FleetTable:
+    """
+    Columnar port table of many devices.
+
+    Columns: device (position in self.devices), row (position in the device
+    PortTable), vlan, configured (VLAN exists on the device).
+    """
+
+    def __init__(self, devices: list):
+        # devices: [(name, ip, PortTable, configured VLANs)]
+        self.devices = devices
+        self.device = array("I")
+        self.row = array("I")
+        self.vlan = []
+        self.configured = []
+        for d, (_, _, table, vlans) in enumerate(devices):
+            count = len(table.ports)
+            self.device.extend([d] * count)
+            self.row.extend(range(count))
+            self.vlan.extend(table.vlans)
+            self.configured.extend(vlan in vlans for vlan in table.vlans)
+
+    def __len__(self) -> int:
+        return len(self.vlan)
+
+    def select(self, vlan: int = None, exclude_vlans: list = None, unconfigured_only: bool = False) -> list:
+        """
+        Returns the positions of the rows matching all filters. Only access ports (numeric VLAN) are audited.
+        """
+        excluded = set(exclude_vlans) if exclude_vlans else None
+        positions = []
+        for i, port_vlan in enumerate(self.vlan):
+            if not isinstance(port_vlan, int):
+                continue
+            if vlan is not None and port_vlan != vlan:
+                continue
+            if excluded is not None and port_vlan in excluded:
+                continue
+            if unconfigured_only and self.configured[i]:
+                continue
+            positions.append(i)
+        return positions
+
+    def group_by_device(self, positions: list, limit: int) -> dict:
+        """
+        {"asw1 (192.168.1.10)": [["Gi0/1-8", 10], ...]} with port ranges, at most limit devices.
+        """
+        rows = {}
+        for i in positions:
+            rows.setdefault(self.device[i], []).append(self.row[i])
+        groups = {}
+        for d, device_rows in list(rows.items())[:limit]:
+            name, ip, table, _ = self.devices[d]
+            groups[f"{name} ({ip})"] = [list(run) for run in table.runs(device_rows)]
+        return groups
+
+    def group_by_vlan(self, positions: list) -> dict:
+        """
+        {vlan: {"ports": n, "devices": n}}, VLANs in ascending order.
+        """
+        ports, devices = {}, {}
+        for i in positions:
+            vlan = self.vlan[i]
+            ports[vlan] = ports.get(vlan, 0) + 1
+            devices.setdefault(vlan, set()).add(self.device[i])
+        return {vlan: {"ports": ports[vlan], "devices": len(devices[vlan])} for vlan in sorted(ports)}
+
+
+def gather_fleet(names: list = None) -> tuple:
+    """
+    Reads all CMDB devices (or the given names) concurrently.
+    Within a tool deadline, devices not read before the soft deadline are skipped.
+
+    Returns:
+        tuple[FleetTable, list[str], list[str], list[str]]: The table, the names
+        not found in the CMDB, the devices that could not be read and the devices
+        skipped on the deadline.
+    """
+    if names:
+        targets = [(name, index.lookup(name)) for name in names]
+    else:
+        # One entry per IP: aliases in the CMDB point to the same device
+        targets = {}
+        for name, ip in index.by_name.items():
+            targets.setdefault(ip, name)
+        targets = [(name, ip) for ip, name in targets.items()]
+
+    unknown = [name for name, ip in targets if ip is None]
+    unreachable = []
+    targets = [(name, ip) for name, ip in targets if ip is not None]
+    deadline = current_deadline()
+    executor = ThreadPoolExecutor(max_workers=FLEET_WORKERS)
+    futures = [executor.submit(gather_device, ip) for _, ip in targets]
+    done, _ = wait(futures, timeout=deadline.soft_remaining() if deadline else None)
+    executor.shutdown(wait=False, cancel_futures=True)
+    if deadline is not None and len(done) < len(futures):
+        deadline.report(f"Fleet audit: {len(done)} of {len(futures)} devices read before the deadline.")
+
+    devices, skipped = [], []
+    for (name, ip), future in zip(targets, futures):
+        if future not in done:
+            skipped.append(name)
+        elif future.result() is None:
+            unreachable.append(name)
+        else:
+            devices.append((name, ip, *future.result()))
+    return FleetTable(devices), unknown, unreachable, skipped
+
+
+# ---------------------------- QUERY ----------------------------
+
+def fleet_query(vlan: int = None, exclude_vlans: list = None, unconfigured_only: bool = False,
+                devices: list = None, group_by: str = "device", limit: int = 50) -> dict:
+    """
+    Audits the access port VLANs of the whole fleet.
+
+    Arguments:
+        vlan (int): Only ports in this VLAN.
+        exclude_vlans (list[int]): Only ports NOT in these VLANs (e.g., the allowed ones).
+        unconfigured_only (bool): Only ports in a VLAN that does not exist on their device.
+        devices (list[str]): Device names, all CMDB devices by default.
+        group_by (str): "device" (matching ports per device) or "vlan" (counts per VLAN).
+        limit (int): Maximum number of devices in the "device" grouping.
+
+    Returns:
+        dict: {"devices": scanned, "unknown": [...], "unreachable": [...], "skipped": [...],
+        "matches": n, "groups": {...}, "truncated": bool}. "unknown" lists the names
+        not found in the CMDB, "unreachable" the devices that could not be read,
+        "skipped" the devices not read before the tool deadline: the result covers
+        the other devices.
+    """
+    if group_by not in ("device", "vlan"):
+        raise ValueError('group_by must be "device" or "vlan".')
+
+    start = time.perf_counter()
+    table, unknown, unreachable, skipped = gather_fleet(devices)
+    positions = table.select(vlan=vlan, exclude_vlans=exclude_vlans, unconfigured_only=unconfigured_only)
+    if group_by == "vlan":
+        groups = table.group_by_vlan(positions)
+        truncated = False
+    else:
+        groups = table.group_by_device(positions, limit)
+        truncated = len({table.device[i] for i in positions}) > limit
+    deadline = current_deadline()
+    if deadline is not None:
+        deadline.report(f"Fleet audit: {len(positions)} matching ports on {len(table.devices)} devices.")
+    print(f"==> fleet audit: {len(table.devices)} devices, {len(table)} ports, "
+          f"{len(positions)} matches in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    return {
+        "devices": len(table.devices),
+        "unknown": unknown,
+        "unreachable": unreachable,
+        "skipped": skipped,
+        "matches": len(positions),
+        "groups": groups,
+        "truncated": truncated,
+    }
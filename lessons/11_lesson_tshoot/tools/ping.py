@@ -1,22 +1,26 @@
 import subprocess
 
 
-def ping(host: str) -> bool:
+def ping(host: str, timeout: float = 5) -> bool:
     """
     Checks host availability via ICMP (ping)
 
     Arguments:
         host (str): IP address or domain name of the host.
+        timeout (float): Seconds after which the ping process is killed.
 
     Returns:
         bool: True if the host responds, otherwise False.
     """
     try:
-        # Ping the host 2 times (for Unix systems)
-        command = ["ping", "-c", "2", host]
-        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # Ping the host 2 times, wait at most 1 s per reply (for Unix systems)
+        command = ["ping", "-c", "2", "-W", "1", host]
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=timeout)
 
         return result.returncode == 0
+    except subprocess.TimeoutExpired:
+        # A hung ping is killed by subprocess.run() — the host is considered unavailable
+        return False
     except Exception:
         # In case of error — consider the host unavailable
         return False
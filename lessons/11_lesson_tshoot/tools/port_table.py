@@ -0,0 +1,105 @@
+import re
+
+# "Gi1/0/24", "Ten0/1", "Po10", "Gi0/1.100"
+PORT_RE = re.compile(r"^([A-Za-z][A-Za-z-]*?)(\d+(?:/\d+)*)(?:\.(\d+))?$")
+
+
+def port_key(port: str) -> tuple:
+    """
+    Natural sort key of a port name: (type, slot, module, port, subinterface).
+
+    "Gi0/2" -> ("Gi", 0, 0, 2, -1), so Gi0/2 sorts before Gi0/10.
+    Names that do not look like ports sort by the name, before the others of the same text.
+    """
+    match = PORT_RE.match(port)
+    if match is None:
+        return port, -1, -1, -1, -1
+    kind, numbers, sub = match.groups()
+    numbers = [int(number) for number in numbers.split("/")]
+    if len(numbers) > 3:
+        # Rare 4-level names: keep the extra levels in the type
+        kind += "/".join(map(str, numbers[:-3])) + "/"
+        numbers = numbers[-3:]
+    slot, module, number = [0] * (3 - len(numbers)) + numbers
+    return kind, slot, module, number, int(sub) if sub is not None else -1
+
+
+class PortTable:
+    """
+    Port -> VLAN table of one device, built once per parsed device output.
+
+    Ports are sorted in natural order when the table is built, with a
+    name -> position index; the full rendered table is cached, so repeated
+    calls for an unchanged device do no sorting or formatting.
+    Consecutive ports in the same VLAN are compressed into ranges:
+    Gi0/1, Gi0/2, ..., Gi0/8 -> "Gi0/1-8".
+    """
+
+    def __init__(self, hostname: str, rows: list):
+        keyed = sorted((port_key(row["port"]), row["port"], row["vlan"]) for row in rows)
+        self.hostname = hostname
+        self.keys = tuple(key for key, _, _ in keyed)
+        self.ports = tuple(port for _, port, _ in keyed)
+        self.vlans = tuple(vlan for _, _, vlan in keyed)
+        self.index = {port: i for i, port in enumerate(self.ports)}
+        self.full_runs = None
+        # Rendered output of the whole table per format, filled by the show tools
+        self.rendered = {}
+
+    def vlan(self, port: str):
+        """
+        Returns the VLAN of the port or None if there is no such port.
+        """
+        i = self.index.get(port)
+        return None if i is None else self.vlans[i]
+
+    def select(self, vlan: int = None, ports: list = None) -> list:
+        """
+        Returns the positions of the rows matching the filters, in table order.
+        """
+        if ports:
+            positions = sorted(self.index[port] for port in set(ports) if port in self.index)
+        else:
+            positions = range(len(self.ports))
+        if vlan is not None:
+            positions = [i for i in positions if self.vlans[i] == vlan]
+        return list(positions)
+
+    def runs(self, positions: list = None) -> list:
+        """
+        Compresses the rows into [(ports, vlan), ...]: "Gi0/1-8" for consecutive ports in one VLAN.
+        The result for the whole table is computed once.
+        """
+        if positions is None:
+            if self.full_runs is None:
+                self.full_runs = self.compress(range(len(self.ports)))
+            return self.full_runs
+        return self.compress(positions)
+
+    def compress(self, positions) -> list:
+        runs = []
+        first = last = None
+        for i in positions:
+            if last is not None and self.continues(last, i):
+                last = i
+                continue
+            if first is not None:
+                runs.append(self.run(first, last))
+            first = last = i
+        if first is not None:
+            runs.append(self.run(first, last))
+        return runs
+
+    def continues(self, last: int, i: int) -> bool:
+        previous, key = self.keys[last], self.keys[i]
+        return (
+            self.vlans[i] == self.vlans[last]
+            and key[:3] == previous[:3]
+            and key[3] == previous[3] + 1
+            and key[4] == previous[4] == -1
+        )
+
+    def run(self, first: int, last: int) -> tuple:
+        if first == last:
+            return self.ports[first], self.vlans[first]
+        return f"{self.ports[first]}-{self.keys[last][3]}", self.vlans[first]
@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+
+from tools import transport
+from tools.cli_parsers import PARSERS
+
+
+class ShowCache:
+    """
+    Parsed show command output per device, keyed by the device config version.
+
+    An entry is reused while the config version of the device is unchanged
+    (every configuration sent through run_commands() bumps it), and for at
+    most ttl seconds, so changes made outside this process are picked up.
+    Views built from an entry (view()) live as long as the entry.
+    """
+
+    def __init__(self, ttl: float = 60):
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def show(self, ip: str, command: str) -> tuple:
+        """
+        Runs a show command on the device or takes its parsed output from the cache.
+
+        Returns:
+            tuple[str, list[dict]]: Device hostname and the parsed rows (shared, read-only).
+
+        Exceptions:
+            TransportError: If the device is unknown or unreachable.
+        """
+        entry = self.entry(ip, command)
+        return entry[2], entry[3]
+
+    def view(self, ip: str, command: str, build):
+        """
+        Returns build(hostname, rows) for the cached output, built once per entry:
+        for example a sorted and indexed table instead of the raw rows.
+        """
+        entry = self.entry(ip, command)
+        views = entry[4]
+        with self.lock:
+            value = views.get(build)
+        if value is None:
+            value = build(entry[2], entry[3])
+            with self.lock:
+                value = views.setdefault(build, value)
+        return value
+
+    def entry(self, ip: str, command: str) -> tuple:
+        key = (ip, command)
+        # Read before the command: a change made meanwhile makes the entry stale, not wrong
+        version = transport.pool.config_version(ip)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version and entry[1] > now:
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        hostname, (output,) = transport.run_commands(ip, [command])
+        rows = PARSERS[command](output)
+        entry = (version, now + self.ttl, hostname, rows, {})
+        with self.lock:
+            self.entries[key] = entry
+        return entry
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+show_cache = ShowCache(ttl=float(os.getenv("SHOW_CACHE_TTL", "60")))
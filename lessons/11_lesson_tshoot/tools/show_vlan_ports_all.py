@@ -1,64 +1,86 @@
-# Simulation of VLAN state on switch ports
-VLAN_STATE = {
-    "192.168.1.10": {
-        f"Gi0/{i}": 10 if i <= 8 else 20 if i <= 16 else 30
-        for i in range(1, 25)
-    },
-    "192.168.1.11": {
-        f"Gi0/{i}": 1 if i % 2 == 0 else 40
-        for i in range(1, 25)
-    },
-    "192.168.1.12": {
-        f"Gi0/{i}": 50 if i <= 12 else 60
-        for i in range(1, 25)
-    },
-    "192.168.2.1": {
-        f"Gi1/0/{i}": 99 if i in [1, 2] else 10
-        for i in range(1, 25)
-    },
-    "192.168.2.2": {
-        f"Gi1/0/{i}": 20 if i <= 12 else 30
-        for i in range(1, 25)
-    },
-    "192.168.3.1": {
-        f"Ten0/{i}": 1 if i in [1, 4] else 99
-        for i in range(1, 9)
-    },
-    "192.168.254.1": {
-        f"Gi0/{i}": 1 if i <= 4 else 100
-        for i in range(0, 8)
-    },
-    "192.168.100.1": {
-        f"Gi0/{i}": 100 if i <= 4 else 1
-        for i in range(0, 8)
-    },
-    "10.0.0.1": {
-        f"Gi0/{i}": 1 if i % 2 == 0 else 99
-        for i in range(0, 8)
-    },
-    "10.0.0.2": {
-        f"Gi0/{i}": 100
-        for i in range(0, 8)
-    },
-}
-
-
-def show_vlan_ports_all(ip: str) -> str:
+import json
+import re
+
+from tools.port_table import PortTable
+from tools.show_cache import show_cache
+from tools.transport import TransportError, UnknownDeviceError
+
+# "Gi0/1-8": compressed port range
+PORT_RANGE_RE = re.compile(r"-\d+$")
+
+
+def vlan_table(ip: str, vlan: int = None, ports: list = None) -> dict:
+    """
+    Returns the port VLAN table of the device in columnar form, only the requested rows,
+    in natural port order with consecutive ports in one VLAN compressed into ranges:
+
+        {"device": "asw1", "ip": "192.168.1.10", "port": ["Gi0/1-8", "Gi0/9"], "vlan": [10, 20]}
+
+    Arguments:
+        ip (str): IP address of the device.
+        vlan (int): Only ports in this VLAN.
+        ports (list[str]): Only these ports.
+
+    Exceptions:
+        TransportError: If the device is unknown or unreachable.
+    """
+    return columns(ip, show_cache.view(ip, "show interfaces status", PortTable), vlan, ports)
+
+
+def columns(ip: str, table: PortTable, vlan: int = None, ports: list = None) -> dict:
+    """
+    Columnar view of the matching rows of a port table, see vlan_table().
+    """
+    if vlan is None and not ports:
+        runs = table.runs()
+    else:
+        runs = table.runs(table.select(vlan=vlan, ports=ports))
+    return {
+        "device": table.hostname,
+        "ip": ip,
+        "port": [port for port, _ in runs],
+        "vlan": [port_vlan for _, port_vlan in runs],
+    }
+
+
+def render(ip: str, table: dict, output: str) -> str:
+    if output == "json":
+        return json.dumps(table, ensure_ascii=False, separators=(",", ":"))
+
+    if not table["port"]:
+        return f"No matching ports on device {ip}."
+    result = [f"VLAN table of device {ip}:"]
+    for port, port_vlan in zip(table["port"], table["vlan"]):
+        result.append(f" - {'Ports' if PORT_RANGE_RE.search(port) else 'Port'} {port} → VLAN {port_vlan}")
+
+    return "\n".join(result)
+
+
+def show_vlan_ports_all(ip: str, vlan: int = None, ports: list = None, output: str = "text") -> str:
     """
     Shows the VLAN state of all device ports.
 
     Arguments:
         ip (str): IP address of the device.
+        vlan (int): Only ports in this VLAN.
+        ports (list[str]): Only these ports.
+        output (str): "text" for people, "json" (compact columnar table) for the agent.
 
     Returns:
-        str: List of ports and corresponding VLANs in text format.
+        str: List of ports and corresponding VLANs in text format,
+        "Gi0/1-8" stands for the ports Gi0/1 to Gi0/8.
     """
-    if ip not in VLAN_STATE:
+    try:
+        table = show_cache.view(ip, "show interfaces status", PortTable)
+    except UnknownDeviceError:
         return f"Device with IP  {ip} not found in the database."
+    except TransportError as e:
+        return f"Device {ip} is not reachable: {e}"
 
-    device_ports = VLAN_STATE[ip]
-    result = [f"VLAN table of device {ip}:"]
-    for port, vlan in sorted(device_ports.items()):
-        result.append(f" - Port {port} → VLAN {vlan}")
-
-    return "\n".join(result)
\ No newline at end of file
+    if vlan is not None or ports:
+        return render(ip, columns(ip, table, vlan, ports), output)
+    # The whole table is rendered once per device config version
+    rendered = table.rendered.get(output)
+    if rendered is None:
+        rendered = table.rendered.setdefault(output, render(ip, columns(ip, table), output))
+    return rendered
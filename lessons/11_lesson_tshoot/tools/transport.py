@@ -0,0 +1,462 @@
+"""
+Device transport: CLI sessions to network devices with a connection pool.
+
+Backends (DEVICE_TRANSPORT environment variable):
+- local:  in-process fake CLI over the shared device state (default, no network);
+- telnet: line-based CLI over TCP, for the fake switch server
+          (python -m tools.fake_switch) at DEVICE_TELNET_ADDRESS, "127.0.0.1:2323";
+- ssh:    real devices via netmiko, DEVICE_USERNAME / DEVICE_PASSWORD
+          (not covered by the fake switch server, see SshConnection).
+
+Opening an SSH session costs seconds, so sessions are kept open and reused:
+run_commands() takes a connection from the pool, runs the commands and
+gives the connection back. device_session() keeps one pooled session for
+several dependent steps (read under the configuration lock, then change).
+"""
+
+import os
+import re
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from tools.device_state import store
+from tools.fake_switch import CliSession
+
+PROMPT_RE = re.compile(r"^([\w.-]+)(?:\(config[\w-]*\))?#\s*$")
+
+# Config mode lines that do not change the configuration: leaving a submode, exec commands
+CONFIG_MODE_NAVIGATION = ("exit", "do")
+
+
+class TransportError(ConnectionError):
+    """
+    The device is unreachable or the session broke.
+    """
+
+
+class UnknownDeviceError(TransportError):
+    """
+    There is no device with this address.
+    """
+
+
+# ---------------------------- CONNECTIONS ----------------------------
+
+class LocalConnection:
+    """
+    In-process session to the fake CLI.
+    """
+
+    def __init__(self, ip: str):
+        device = store.get(ip)
+        if device is None:
+            raise UnknownDeviceError(f"Unknown device {ip}")
+        self.session = CliSession(device, store)
+        self.hostname = self.session.hostname
+
+    def run(self, commands: list) -> list:
+        return [self.session.execute(command) for command in commands]
+
+    def keepalive(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class TelnetConnection:
+    """
+    Line-based CLI session over TCP. The first line selects the device,
+    output of a command ends with the device prompt.
+    """
+
+    def __init__(self, ip: str, address: str = None, timeout: float = 10):
+        host, port = (address or os.getenv("DEVICE_TELNET_ADDRESS", "127.0.0.1:2323")).rsplit(":", 1)
+        try:
+            self.sock = socket.create_connection((host, int(port)), timeout=timeout)
+        except OSError as e:
+            raise TransportError(f"Cannot connect to {ip}: {e}") from e
+        self.last_line = ""
+        self.read_prompt(login=True)
+        self.sock.sendall(f"{ip}\n".encode())
+        banner = self.read_prompt()
+        if not PROMPT_RE.match(self.last_line):
+            self.close()
+            if banner.startswith("% Unknown device"):
+                raise UnknownDeviceError(f"Unknown device {ip}")
+            raise TransportError(f"Cannot log in to {ip}: {banner}")
+        self.hostname = PROMPT_RE.match(self.last_line).group(1)
+
+    def read_prompt(self, login: bool = False) -> str:
+        """
+        Reads until a line that looks like a prompt ("Device: " at login),
+        returns the output before it.
+        """
+        data = b""
+        while True:
+            try:
+                chunk = self.sock.recv(65536)
+            except OSError as e:
+                raise TransportError(str(e)) from e
+            if not chunk:
+                self.last_line = ""
+                return data.decode(errors="replace").strip()
+            data += chunk
+            lines = data.decode(errors="replace").split("\r\n")
+            if (login and lines[-1] == "Device: ") or PROMPT_RE.match(lines[-1]):
+                self.last_line = lines[-1]
+                return "\n".join(lines[:-1]).strip("\n")
+
+    def run(self, commands: list) -> list:
+        outputs = []
+        for command in commands:
+            try:
+                self.sock.sendall(f"{command}\n".encode())
+            except OSError as e:
+                raise TransportError(str(e)) from e
+            outputs.append(self.read_prompt())
+        return outputs
+
+    def keepalive(self) -> bool:
+        try:
+            self.run([""])
+            return True
+        except TransportError:
+            return False
+
+    def close(self) -> None:
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class SshConnection:
+    """
+    SSH session to a real Cisco IOS device via netmiko.
+
+    Untested: the fake switch server only speaks the telnet-like line
+    protocol, so this backend is not exercised by it. Check it against
+    a lab device before using it in production.
+    """
+
+    def __init__(self, ip: str):
+        # netmiko is only needed for real devices
+        from netmiko import ConnectHandler
+        try:
+            self.conn = ConnectHandler(
+                device_type="cisco_ios",
+                host=ip,
+                username=os.getenv("DEVICE_USERNAME"),
+                password=os.getenv("DEVICE_PASSWORD"),
+            )
+        except Exception as e:
+            raise TransportError(f"Cannot connect to {ip}: {e}") from e
+        self.hostname = self.conn.find_prompt().rstrip("#>")
+        self.config_mode = False
+
+    def run(self, commands: list) -> list:
+        """
+        Show commands and "do show" use send_command() (reads until the prompt).
+        Configuration lines are collected and sent in one send_config_set()
+        before the next "do" command, "end" or the end of the call; the output
+        slot of the first line of a batch gets its error lines ("% ...").
+        Configuration mode may span several calls (see device_session()).
+        """
+        outputs = []
+        config, config_slot = [], None
+        try:
+            for command in commands:
+                words = command.split()
+                if not self.config_mode and words in (["configure", "terminal"], ["conf", "t"]):
+                    output = self.conn.config_mode()
+                    self.config_mode = True
+                    outputs.append("\n".join(self.errors(output)))
+                    continue
+                if self.config_mode and words and words[0] in ("do", "end"):
+                    self.configure(config, config_slot, outputs)
+                    config = []
+                    if words[0] == "end":
+                        self.conn.exit_config_mode()
+                        self.config_mode = False
+                        outputs.append("")
+                    else:
+                        outputs.append(self.conn.send_command(command))
+                elif self.config_mode and words:
+                    if not config:
+                        config_slot = len(outputs)
+                    config.append(command)
+                    outputs.append("")
+                else:
+                    outputs.append(self.conn.send_command(command) if words else "")
+            self.configure(config, config_slot, outputs)
+        except Exception as e:
+            raise TransportError(str(e)) from e
+        return outputs
+
+    def errors(self, output: str) -> list:
+        return [line.strip() for line in output.splitlines() if line.strip().startswith("%")]
+
+    def configure(self, lines: list, slot: int, outputs: list) -> None:
+        if not lines:
+            return
+        output = self.conn.send_config_set(lines, enter_config_mode=False, exit_config_mode=False)
+        outputs[slot] = "\n".join(self.errors(output))
+
+    def keepalive(self) -> bool:
+        return self.conn.is_alive()
+
+    def close(self) -> None:
+        self.conn.disconnect()
+
+
+TRANSPORTS = {
+    "local": LocalConnection,
+    "telnet": TelnetConnection,
+    "ssh": SshConnection,
+}
+
+
+# ---------------------------- POOL ----------------------------
+
+def close_quietly(conn) -> None:
+    try:
+        conn.close()
+    except Exception as e:
+        print(f"==> error closing a device session: {e}")
+
+
+class ConnectionPool:
+    """
+    Pool of open CLI sessions per device.
+
+    - at most max_per_device sessions run commands on one device at a time
+      (devices limit concurrent VTY sessions), at most max_total overall;
+      the device slot is taken first, so callers queued on a busy device
+      do not hold global slots, and both waits end after acquire_timeout;
+    - idle sessions are reused, at most max_per_device are kept per device;
+    - a background thread sends keepalives to idle sessions one at a time
+      (the others stay available) and closes those idle for longer than
+      idle_timeout;
+    - a session that failed is closed instead of being returned to the pool.
+    """
+
+    def __init__(self, connect, max_per_device: int = 2, max_total: int = 32,
+                 idle_timeout: float = 300, keepalive_interval: float = 30, acquire_timeout: float = 30):
+        self.connect = connect
+        self.acquire_timeout = acquire_timeout
+        self.max_per_device = max_per_device
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.total_slots = threading.BoundedSemaphore(max_total)
+        self.device_slots = defaultdict(lambda: threading.BoundedSemaphore(max_per_device))
+        self.idle = defaultdict(deque)
+        self.lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.keepalive_thread = None
+        self.config_versions = defaultdict(int)
+
+    @contextmanager
+    def connection(self, ip: str):
+        """
+        Yields an open session to the device, returns it to the pool afterwards.
+        """
+        with self.lock:
+            device_slots = self.device_slots[ip]
+        # Device slot first: callers queued on a busy device must not hold global slots
+        if not device_slots.acquire(timeout=self.acquire_timeout):
+            raise TransportError(f"Device {ip} is busy: no free session in {self.acquire_timeout:g} s")
+        try:
+            if not self.total_slots.acquire(timeout=self.acquire_timeout):
+                raise TransportError(f"Too many device sessions: no free slot in {self.acquire_timeout:g} s")
+            try:
+                conn = self.checkout(ip)
+                try:
+                    yield conn
+                except BaseException:
+                    # The session may be left in a config mode or broken
+                    close_quietly(conn)
+                    raise
+                self.give_back(ip, conn, time.monotonic())
+            finally:
+                self.total_slots.release()
+        finally:
+            device_slots.release()
+
+    def checkout(self, ip: str):
+        """
+        Takes an idle session of the device or opens a new one.
+        """
+        with self.lock:
+            if self.idle[ip]:
+                conn, _ = self.idle[ip].pop()
+                self.reused += 1
+                return conn
+        conn = self.connect(ip)
+        with self.lock:
+            self.opened += 1
+        self.start_keepalive()
+        return conn
+
+    def give_back(self, ip: str, conn, since: float, oldest: bool = False) -> None:
+        """
+        Returns an idle session to the pool, closes it if the device already has max_per_device idle.
+        """
+        with self.lock:
+            idle = self.idle[ip]
+            if len(idle) < self.max_per_device:
+                if oldest:
+                    idle.appendleft((conn, since))
+                else:
+                    idle.append((conn, since))
+                return
+        close_quietly(conn)
+
+    def config_version(self, ip: str) -> int:
+        """
+        Number of configuration changes sent to the device through this pool.
+        """
+        with self.lock:
+            return self.config_versions[ip]
+
+    def bump_config_version(self, ip: str) -> None:
+        with self.lock:
+            self.config_versions[ip] += 1
+
+    def start_keepalive(self) -> None:
+        with self.lock:
+            if self.keepalive_thread is None:
+                self.keepalive_thread = threading.Thread(target=self.keepalive_loop, daemon=True)
+                self.keepalive_thread.start()
+
+    def keepalive_loop(self) -> None:
+        while True:
+            time.sleep(self.keepalive_interval)
+            try:
+                self.check_idle()
+            except Exception as e:
+                # The thread must survive, otherwise idle sessions are never reaped again
+                print(f"==> keepalive error: {e}")
+
+    def check_idle(self) -> None:
+        """
+        Sends a keepalive to every idle session, closes dead and expired ones.
+        Only the session being checked is taken out of the pool.
+        """
+        with self.lock:
+            idle = [(ip, conn, since) for ip, items in self.idle.items() for conn, since in items]
+        for ip, conn, since in idle:
+            with self.lock:
+                try:
+                    self.idle[ip].remove((conn, since))
+                except ValueError:
+                    # Taken by a caller meanwhile
+                    continue
+            if time.monotonic() - since > self.idle_timeout:
+                close_quietly(conn)
+                continue
+            try:
+                alive = conn.keepalive()
+            except Exception:
+                alive = False
+            if alive:
+                self.give_back(ip, conn, since, oldest=True)
+            else:
+                close_quietly(conn)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "opened": self.opened,
+                "reused": self.reused,
+                "idle": sum(len(items) for items in self.idle.values()),
+            }
+
+
+transport = os.getenv("DEVICE_TRANSPORT", "local")
+if transport not in TRANSPORTS:
+    raise ValueError(f"Unknown device transport: {transport}. Use one of {list(TRANSPORTS)}.")
+pool = ConnectionPool(TRANSPORTS[transport])
+
+
+def changes_config(commands: list) -> bool:
+    """
+    True if there are configuration lines between "configure terminal" and "end".
+
+    Exec commands (show, terminal length, ...) and an empty configure terminal / end
+    pair change nothing.
+    """
+    config_mode = False
+    for command in commands:
+        words = command.split()
+        if not words:
+            continue
+        if not config_mode:
+            config_mode = words[0] in ("configure", "conf")
+        elif words[0] == "end":
+            config_mode = False
+        elif words[0] not in CONFIG_MODE_NAVIGATION:
+            return True
+    return False
+
+
+class DeviceSession:
+    """
+    Pooled session lent out by device_session(): run() may be called several times.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.hostname = conn.hostname
+        self.commands = []
+
+    def run(self, commands: list) -> list:
+        self.commands.extend(commands)
+        return self.conn.run(commands)
+
+
+@contextmanager
+def device_session(ip: str):
+    """
+    Yields one pooled session to the device for several dependent run() calls,
+    e.g. reading the state in configuration mode and then changing it.
+    Configuration sent in the session bumps the config version of the device.
+
+    A session left by an exception is closed (the fake switch discards its
+    uncommitted changes and releases the configuration lock).
+
+    Exceptions:
+        UnknownDeviceError: If there is no such device.
+        TransportError: If the device is unreachable.
+    """
+    with pool.connection(ip) as conn:
+        session = DeviceSession(conn)
+        try:
+            yield session
+        finally:
+            if changes_config(session.commands):
+                pool.bump_config_version(ip)
+
+
+def run_commands(ip: str, commands: list) -> tuple:
+    """
+    Runs CLI commands on the device in one session from the pool.
+    Configuration commands bump the config version of the device.
+
+    Arguments:
+        ip (str): IP address of the device.
+        commands (list[str]): Command lines, configuration commands included.
+
+    Returns:
+        tuple[str, list[str]]: Device hostname and the output of every command.
+
+    Exceptions:
+        UnknownDeviceError: If there is no such device.
+        TransportError: If the device is unreachable.
+    """
+    with device_session(ip) as session:
+        return session.hostname, session.run(commands)